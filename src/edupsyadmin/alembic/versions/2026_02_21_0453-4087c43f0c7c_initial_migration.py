@@ -11,7 +11,7 @@ from collections.abc import Sequence
 import sqlalchemy as sa
 from alembic import op
 
-import edupsyadmin.db.clients
+import edupsyadmin.db.column_types
 
 # revision identifiers, used by Alembic.
 revision: str = "4087c43f0c7c"
@@ -26,57 +26,57 @@ def upgrade() -> None:
         "clients",
         sa.Column(
             "first_name_encr",
-            edupsyadmin.db.clients.EncryptedString(),
+            edupsyadmin.db.column_types.EncryptedString(),
             nullable=False,
         ),
         sa.Column(
             "last_name_encr",
-            edupsyadmin.db.clients.EncryptedString(),
+            edupsyadmin.db.column_types.EncryptedString(),
             nullable=False,
         ),
         sa.Column(
             "gender_encr",
-            edupsyadmin.db.clients.EncryptedString(),
+            edupsyadmin.db.column_types.EncryptedString(),
             nullable=False,
         ),
         sa.Column(
             "birthday_encr",
-            edupsyadmin.db.clients.EncryptedString(),
+            edupsyadmin.db.column_types.EncryptedString(),
             nullable=False,
         ),
         sa.Column(
             "street_encr",
-            edupsyadmin.db.clients.EncryptedString(),
+            edupsyadmin.db.column_types.EncryptedString(),
             nullable=False,
         ),
         sa.Column(
             "city_encr",
-            edupsyadmin.db.clients.EncryptedString(),
+            edupsyadmin.db.column_types.EncryptedString(),
             nullable=False,
         ),
         sa.Column(
             "parent_encr",
-            edupsyadmin.db.clients.EncryptedString(),
+            edupsyadmin.db.column_types.EncryptedString(),
             nullable=False,
         ),
         sa.Column(
             "telephone1_encr",
-            edupsyadmin.db.clients.EncryptedString(),
+            edupsyadmin.db.column_types.EncryptedString(),
             nullable=False,
         ),
         sa.Column(
             "telephone2_encr",
-            edupsyadmin.db.clients.EncryptedString(),
+            edupsyadmin.db.column_types.EncryptedString(),
             nullable=False,
         ),
         sa.Column(
             "email_encr",
-            edupsyadmin.db.clients.EncryptedString(),
+            edupsyadmin.db.column_types.EncryptedString(),
             nullable=False,
         ),
         sa.Column(
             "notes_encr",
-            edupsyadmin.db.clients.EncryptedString(),
+            edupsyadmin.db.column_types.EncryptedString(),
             nullable=False,
         ),
         sa.Column("client_id", sa.Integer(), nullable=False),
@@ -88,22 +88,22 @@ def upgrade() -> None:
         sa.Column("document_shredding_date", sa.Date(), nullable=True),
         sa.Column(
             "keyword_taet_encr",
-            edupsyadmin.db.clients.EncryptedString(),
+            edupsyadmin.db.column_types.EncryptedString(),
             nullable=False,
         ),
         sa.Column(
             "lrst_diagnosis_encr",
-            edupsyadmin.db.clients.EncryptedString(),
+            edupsyadmin.db.column_types.EncryptedString(),
             nullable=False,
         ),
         sa.Column(
             "lrst_last_test_date_encr",
-            edupsyadmin.db.clients.EncryptedString(),
+            edupsyadmin.db.column_types.EncryptedString(),
             nullable=False,
         ),
         sa.Column(
             "lrst_last_test_by_encr",
-            edupsyadmin.db.clients.EncryptedString(),
+            edupsyadmin.db.column_types.EncryptedString(),
             nullable=False,
         ),
         sa.Column("datetime_created", sa.DateTime(), nullable=False),
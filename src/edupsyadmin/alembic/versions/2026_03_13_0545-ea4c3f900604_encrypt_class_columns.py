@@ -12,7 +12,7 @@ import sqlalchemy as sa
 from alembic import op
 from sqlalchemy.sql import column, table
 
-import edupsyadmin.db.clients
+import edupsyadmin.db.column_types
 from edupsyadmin.core.encrypt import encr
 
 # revision identifiers, used by Alembic.
@@ -47,14 +47,14 @@ def upgrade() -> None:
         batch_op.add_column(
             sa.Column(
                 "class_name_encr",
-                edupsyadmin.db.clients.EncryptedString(),
+                edupsyadmin.db.column_types.EncryptedString(),
                 nullable=True,
             ),
         )
         batch_op.add_column(
             sa.Column(
                 "class_int_encr",
-                edupsyadmin.db.clients.EncryptedInteger(),
+                edupsyadmin.db.column_types.EncryptedInteger(),
                 nullable=True,
             ),
         )
@@ -13,6 +13,7 @@ from alembic import op
 from sqlalchemy.sql import column, table
 
 import edupsyadmin.db.clients
+import edupsyadmin.db.column_types
 from edupsyadmin.core.encrypt import encr
 
 # revision identifiers, used by Alembic.
@@ -48,21 +49,21 @@ def upgrade() -> None:
         batch_op.add_column(
             sa.Column(
                 "entry_date_encr",
-                edupsyadmin.db.clients.EncryptedDate(),
+                edupsyadmin.db.column_types.EncryptedDate(),
                 nullable=True,
             ),
         )
         batch_op.add_column(
             sa.Column(
                 "estimated_graduation_date_encr",
-                edupsyadmin.db.clients.EncryptedDate(),
+                edupsyadmin.db.column_types.EncryptedDate(),
                 nullable=True,
             ),
         )
         batch_op.add_column(
             sa.Column(
                 "document_shredding_date_encr",
-                edupsyadmin.db.clients.EncryptedDate(),
+                edupsyadmin.db.column_types.EncryptedDate(),
                 nullable=True,
             ),
         )
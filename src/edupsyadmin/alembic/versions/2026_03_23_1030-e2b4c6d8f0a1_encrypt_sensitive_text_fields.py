@@ -12,7 +12,7 @@ import sqlalchemy as sa
 from alembic import op
 from sqlalchemy.sql import column, table
 
-import edupsyadmin.db.clients
+import edupsyadmin.db.column_types
 from edupsyadmin.core.encrypt import encr
 
 # revision identifiers, used by Alembic.
@@ -30,28 +30,28 @@ def upgrade() -> None:
         batch_op.add_column(
             sa.Column(
                 "nos_rs_ausn_faecher_encr",
-                edupsyadmin.db.clients.EncryptedString(),
+                edupsyadmin.db.column_types.EncryptedString(),
                 nullable=True,
             ),
         )
         batch_op.add_column(
             sa.Column(
                 "nos_other_details_encr",
-                edupsyadmin.db.clients.EncryptedString(),
+                edupsyadmin.db.column_types.EncryptedString(),
                 nullable=True,
             ),
         )
         batch_op.add_column(
             sa.Column(
                 "nta_other_details_encr",
-                edupsyadmin.db.clients.EncryptedString(),
+                edupsyadmin.db.column_types.EncryptedString(),
                 nullable=True,
             ),
         )
         batch_op.add_column(
             sa.Column(
                 "nta_nos_notes_encr",
-                edupsyadmin.db.clients.EncryptedString(),
+                edupsyadmin.db.column_types.EncryptedString(),
                 nullable=True,
             ),
         )
@@ -10,7 +10,7 @@ from collections.abc import Sequence
 
 from alembic import op
 
-import edupsyadmin.db.clients
+import edupsyadmin.db.column_types
 
 # revision identifiers, used by Alembic.
 revision: str = "f3a5b7c9d1e2"
@@ -25,22 +25,22 @@ def upgrade() -> None:
     with op.batch_alter_table("clients") as batch_op:
         batch_op.alter_column(
             "nos_rs_ausn_faecher_encr",
-            type_=edupsyadmin.db.clients.EncryptedString(),
+            type_=edupsyadmin.db.column_types.EncryptedString(),
             nullable=False,
         )
         batch_op.alter_column(
             "nos_other_details_encr",
-            type_=edupsyadmin.db.clients.EncryptedString(),
+            type_=edupsyadmin.db.column_types.EncryptedString(),
             nullable=False,
         )
         batch_op.alter_column(
             "nta_other_details_encr",
-            type_=edupsyadmin.db.clients.EncryptedString(),
+            type_=edupsyadmin.db.column_types.EncryptedString(),
             nullable=False,
         )
         batch_op.alter_column(
             "nta_nos_notes_encr",
-            type_=edupsyadmin.db.clients.EncryptedString(),
+            type_=edupsyadmin.db.column_types.EncryptedString(),
             nullable=False,
         )
 
@@ -49,21 +49,21 @@ def downgrade() -> None:
     with op.batch_alter_table("clients") as batch_op:
         batch_op.alter_column(
             "nta_nos_notes_encr",
-            type_=edupsyadmin.db.clients.EncryptedString(),
+            type_=edupsyadmin.db.column_types.EncryptedString(),
             nullable=True,
         )
         batch_op.alter_column(
             "nta_other_details_encr",
-            type_=edupsyadmin.db.clients.EncryptedString(),
+            type_=edupsyadmin.db.column_types.EncryptedString(),
             nullable=True,
         )
         batch_op.alter_column(
             "nos_other_details_encr",
-            type_=edupsyadmin.db.clients.EncryptedString(),
+            type_=edupsyadmin.db.column_types.EncryptedString(),
             nullable=True,
         )
         batch_op.alter_column(
             "nos_rs_ausn_faecher_encr",
-            type_=edupsyadmin.db.clients.EncryptedString(),
+            type_=edupsyadmin.db.column_types.EncryptedString(),
             nullable=True,
         )
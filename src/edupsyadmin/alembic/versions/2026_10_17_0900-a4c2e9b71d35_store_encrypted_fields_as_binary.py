@@ -0,0 +1,141 @@
+"""store encrypted fields as binary
+
+Revision ID: a4c2e9b71d35
+Revises: 0f1497df963e
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.sql import column, table
+
+import edupsyadmin.db.column_types
+from edupsyadmin.core.encrypt import token_from_binary, token_to_binary
+
+# revision identifiers, used by Alembic.
+revision: str = "a4c2e9b71d35"
+down_revision: str | None = "0f1497df963e"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# (column name, text type) of all encrypted columns
+ENCRYPTED_COLUMNS = [
+    ("first_name_encr", edupsyadmin.db.column_types.EncryptedString),
+    ("last_name_encr", edupsyadmin.db.column_types.EncryptedString),
+    ("gender_encr", edupsyadmin.db.column_types.EncryptedString),
+    ("birthday_encr", edupsyadmin.db.column_types.EncryptedDate),
+    ("street_encr", edupsyadmin.db.column_types.EncryptedString),
+    ("city_encr", edupsyadmin.db.column_types.EncryptedString),
+    ("parent_encr", edupsyadmin.db.column_types.EncryptedString),
+    ("telephone1_encr", edupsyadmin.db.column_types.EncryptedString),
+    ("telephone2_encr", edupsyadmin.db.column_types.EncryptedString),
+    ("email_encr", edupsyadmin.db.column_types.EncryptedString),
+    ("notes_encr", edupsyadmin.db.column_types.EncryptedString),
+    ("class_name_encr", edupsyadmin.db.column_types.EncryptedString),
+    ("class_int_encr", edupsyadmin.db.column_types.EncryptedInteger),
+    ("keyword_taet_encr", edupsyadmin.db.column_types.EncryptedString),
+    ("lrst_diagnosis_encr", edupsyadmin.db.column_types.EncryptedString),
+    ("lrst_last_test_date_encr", edupsyadmin.db.column_types.EncryptedDate),
+    ("lrst_last_test_by_encr", edupsyadmin.db.column_types.EncryptedString),
+    ("entry_date_encr", edupsyadmin.db.column_types.EncryptedDate),
+    ("estimated_graduation_date_encr", edupsyadmin.db.column_types.EncryptedDate),
+    ("document_shredding_date_encr", edupsyadmin.db.column_types.EncryptedDate),
+    ("nos_rs_ausn_faecher_encr", edupsyadmin.db.column_types.EncryptedString),
+    ("nos_other_details_encr", edupsyadmin.db.column_types.EncryptedString),
+    ("nta_other_details_encr", edupsyadmin.db.column_types.EncryptedString),
+    ("nta_nos_notes_encr", edupsyadmin.db.column_types.EncryptedString),
+]
+COLUMN_NAMES = [name for name, _ in ENCRYPTED_COLUMNS]
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+
+    # Step 1: Fetch the text tokens
+    text_table = table(
+        "clients",
+        column("client_id", sa.Integer),
+        *(column(name, sa.String) for name in COLUMN_NAMES),
+    )
+    results = connection.execute(
+        sa.select(text_table.c.client_id, *(text_table.c[n] for n in COLUMN_NAMES)),
+    ).fetchall()
+
+    # Step 2: Change the column types
+    with op.batch_alter_table("clients") as batch_op:
+        for name in COLUMN_NAMES:
+            batch_op.alter_column(name, type_=sa.LargeBinary())
+
+    # Step 3: Store the tokens as bytes. This only changes the encoding, the
+    # ciphertexts themselves (and therefore the keys) stay the same.
+    binary_table = table(
+        "clients",
+        column("client_id", sa.Integer),
+        *(column(name, sa.LargeBinary) for name in COLUMN_NAMES),
+    )
+    for row in results:
+        client_id = row[0]
+        try:
+            values = {
+                name: None if token is None else token_to_binary(token)
+                for name, token in zip(COLUMN_NAMES, row[1:], strict=True)
+            }
+        except Exception as e:
+            raise RuntimeError(
+                f"Failed to convert data for client_id {client_id}. "
+                f"Migration aborted. Error: {e}",
+            ) from e
+        connection.execute(
+            binary_table.update()
+            .where(binary_table.c.client_id == client_id)
+            .values(**values),
+        )
+
+
+def downgrade() -> None:
+    connection = op.get_bind()
+
+    # Step 1: Fetch the binary tokens
+    binary_table = table(
+        "clients",
+        column("client_id", sa.Integer),
+        *(column(name, sa.LargeBinary) for name in COLUMN_NAMES),
+    )
+    results = connection.execute(
+        sa.select(
+            binary_table.c.client_id,
+            *(binary_table.c[n] for n in COLUMN_NAMES),
+        ),
+    ).fetchall()
+
+    # Step 2: Change the column types back to text
+    with op.batch_alter_table("clients") as batch_op:
+        for name, text_type in ENCRYPTED_COLUMNS:
+            batch_op.alter_column(name, type_=text_type())
+
+    # Step 3: Store the tokens as text again
+    text_table = table(
+        "clients",
+        column("client_id", sa.Integer),
+        *(column(name, sa.String) for name in COLUMN_NAMES),
+    )
+    for row in results:
+        client_id = row[0]
+        try:
+            values = {
+                name: None if token is None else token_from_binary(token)
+                for name, token in zip(COLUMN_NAMES, row[1:], strict=True)
+            }
+        except Exception as e:
+            raise RuntimeError(
+                f"Failed to convert data for client_id {client_id}. "
+                f"Migration rollback aborted. Error: {e}",
+            ) from e
+        connection.execute(
+            text_table.update()
+            .where(text_table.c.client_id == client_id)
+            .values(**values),
+        )
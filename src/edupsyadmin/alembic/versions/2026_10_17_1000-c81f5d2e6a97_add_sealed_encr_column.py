@@ -0,0 +1,73 @@
+"""add sealed_encr column
+
+Revision ID: c81f5d2e6a97
+Revises: a4c2e9b71d35
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+
+import json
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.sql import column, table
+
+from edupsyadmin.core.encrypt import encr
+
+# revision identifiers, used by Alembic.
+revision: str = "c81f5d2e6a97"
+down_revision: str | None = "a4c2e9b71d35"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Rows keep one token per encrypted column until they are written with
+    # envelope encryption enabled
+    with op.batch_alter_table("clients") as batch_op:
+        batch_op.add_column(sa.Column("sealed_encr", sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    connection = op.get_bind()
+
+    # Step 1: Fetch the sealed rows
+    clients_table = table(
+        "clients",
+        column("client_id", sa.Integer),
+        column("sealed_encr", sa.LargeBinary),
+    )
+    results = connection.execute(
+        sa.select(clients_table.c.client_id, clients_table.c.sealed_encr).where(
+            clients_table.c.sealed_encr.is_not(None),
+        ),
+    ).fetchall()
+
+    # Step 2: Write one token per encrypted column again
+    for client_id, sealed in results:
+        try:
+            plaintexts = json.loads(encr.decrypt(sealed))
+            values = {
+                name: encr.encrypt_binary(plaintext)
+                for name, plaintext in plaintexts.items()
+            }
+            fields_table = table(
+                "clients",
+                column("client_id", sa.Integer),
+                *(column(name, sa.LargeBinary) for name in values),
+            )
+            connection.execute(
+                fields_table.update()
+                .where(fields_table.c.client_id == client_id)
+                .values(**values),
+            )
+        except Exception as e:
+            raise RuntimeError(
+                f"Failed to unseal data for client_id {client_id}. "
+                f"Migration rollback aborted. Error: {e}",
+            ) from e
+
+    # Step 3: Drop the column only after successful data migration
+    with op.batch_alter_table("clients") as batch_op:
+        batch_op.drop_column("sealed_encr")
@@ -0,0 +1,117 @@
+"""add blind index columns
+
+Revision ID: 5d3b8e1f7a20
+Revises: c81f5d2e6a97
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+
+import json
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.sql import column, table
+
+from edupsyadmin.core.encrypt import encr
+from edupsyadmin.core.logger import logger
+
+# revision identifiers, used by Alembic.
+revision: str = "5d3b8e1f7a20"
+down_revision: str | None = "c81f5d2e6a97"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Blind index column -> encrypted column it is computed from
+BLIND_INDEX_SOURCES = {
+    "first_name_bidx": "first_name_encr",
+    "last_name_bidx": "last_name_encr",
+    "birthday_bidx": "birthday_encr",
+}
+BLIND_INDEX_COLUMNS = list(BLIND_INDEX_SOURCES)
+
+# system_metadata key of the indexes that wait for the encryption keys
+BACKFILL_KEY = "index_backfill_pending"
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("clients") as batch_op:
+        for name in BLIND_INDEX_COLUMNS:
+            batch_op.add_column(sa.Column(name, sa.LargeBinary(), nullable=True))
+            batch_op.create_index(f"ix_clients_{name}", [name])
+
+    # Index the existing rows with the primary key
+    connection = op.get_bind()
+    clients_table = table(
+        "clients",
+        column("client_id", sa.Integer),
+        column("sealed_encr", sa.LargeBinary),
+        *(column(name, sa.LargeBinary) for name in BLIND_INDEX_SOURCES.values()),
+        *(column(name, sa.LargeBinary) for name in BLIND_INDEX_COLUMNS),
+    )
+    rows = connection.execute(
+        sa.select(
+            clients_table.c.client_id,
+            clients_table.c.sealed_encr,
+            *(clients_table.c[name] for name in BLIND_INDEX_SOURCES.values()),
+        ),
+    ).fetchall()
+    if not rows:
+        return
+    if not encr.is_initialized:
+        logger.warning(
+            f"The blind indexes of {len(rows)} clients could not be computed "
+            "without the encryption keys; the next command that loads the "
+            "keys adds them.",
+        )
+        _mark_index_backfill_pending()
+        return
+
+    params = []
+    for row in rows:
+        if row.sealed_encr is not None:
+            fields = json.loads(encr.decrypt(row.sealed_encr))
+            plaintexts = [fields.get(key, "") for key in BLIND_INDEX_SOURCES.values()]
+        else:
+            plaintexts = [
+                encr.decrypt(row._mapping[key]) if row._mapping[key] else ""
+                for key in BLIND_INDEX_SOURCES.values()
+            ]
+        params.append(
+            {
+                "_client_id": row.client_id,
+                **{
+                    f"_{index_key}": encr.blind_index(plaintext)
+                    for index_key, plaintext in zip(
+                        BLIND_INDEX_COLUMNS, plaintexts, strict=True
+                    )
+                },
+            },
+        )
+    connection.execute(
+        clients_table.update()
+        .where(clients_table.c.client_id == sa.bindparam("_client_id"))
+        .values({name: sa.bindparam(f"_{name}") for name in BLIND_INDEX_COLUMNS}),
+        params,
+    )
+
+
+def _mark_index_backfill_pending() -> None:
+    """Record that the indexes wait for the keys, see edupsyadmin.db.revision."""
+    op.execute(
+        sa.text("DELETE FROM system_metadata WHERE key = :key").bindparams(
+            key=BACKFILL_KEY,
+        ),
+    )
+    op.execute(
+        sa.text(
+            "INSERT INTO system_metadata (key, value) VALUES (:key, :value)",
+        ).bindparams(key=BACKFILL_KEY, value=revision),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("clients") as batch_op:
+        for name in BLIND_INDEX_COLUMNS:
+            batch_op.drop_index(f"ix_clients_{name}")
+            batch_op.drop_column(name)
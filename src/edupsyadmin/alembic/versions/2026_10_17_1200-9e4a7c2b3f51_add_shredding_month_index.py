@@ -0,0 +1,104 @@
+"""add shredding month index
+
+Revision ID: 9e4a7c2b3f51
+Revises: 5d3b8e1f7a20
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+
+import json
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.sql import column, table
+
+from edupsyadmin.core.encrypt import encr
+from edupsyadmin.core.logger import logger
+
+# revision identifiers, used by Alembic.
+revision: str = "9e4a7c2b3f51"
+down_revision: str | None = "5d3b8e1f7a20"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# system_metadata key of the indexes that wait for the encryption keys
+BACKFILL_KEY = "index_backfill_pending"
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("clients") as batch_op:
+        batch_op.add_column(
+            sa.Column("document_shredding_month_bidx", sa.LargeBinary(), nullable=True),
+        )
+        batch_op.create_index(
+            "ix_clients_document_shredding_month_bidx",
+            ["document_shredding_month_bidx"],
+        )
+
+    # Index the existing rows with the primary key
+    connection = op.get_bind()
+    clients_table = table(
+        "clients",
+        column("client_id", sa.Integer),
+        column("sealed_encr", sa.LargeBinary),
+        column("document_shredding_date_encr", sa.LargeBinary),
+        column("document_shredding_month_bidx", sa.LargeBinary),
+    )
+    rows = connection.execute(
+        sa.select(
+            clients_table.c.client_id,
+            clients_table.c.sealed_encr,
+            clients_table.c.document_shredding_date_encr,
+        ),
+    ).fetchall()
+    if not rows:
+        return
+    if not encr.is_initialized:
+        logger.warning(
+            f"The shredding month indexes of {len(rows)} clients could not be "
+            "computed without the encryption keys; the next command that loads "
+            "the keys adds them.",
+        )
+        _mark_index_backfill_pending()
+        return
+
+    params = []
+    for client_id, sealed, token in rows:
+        if sealed is not None:
+            plaintext = json.loads(encr.decrypt(sealed)).get(
+                "document_shredding_date_encr",
+                "",
+            )
+        else:
+            plaintext = encr.decrypt(token) if token else ""
+        # the month of an ISO date ("YYYY-MM"), "" without a date
+        params.append(
+            {"_client_id": client_id, "_month": encr.blind_index(plaintext[:7])},
+        )
+    connection.execute(
+        clients_table.update()
+        .where(clients_table.c.client_id == sa.bindparam("_client_id"))
+        .values(document_shredding_month_bidx=sa.bindparam("_month")),
+        params,
+    )
+
+
+def _mark_index_backfill_pending() -> None:
+    """Record that the indexes wait for the keys, see edupsyadmin.db.revision."""
+    op.execute(
+        sa.text("DELETE FROM system_metadata WHERE key = :key").bindparams(
+            key=BACKFILL_KEY,
+        ),
+    )
+    op.execute(
+        sa.text(
+            "INSERT INTO system_metadata (key, value) VALUES (:key, :value)",
+        ).bindparams(key=BACKFILL_KEY, value=revision),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("clients") as batch_op:
+        batch_op.drop_index("ix_clients_document_shredding_month_bidx")
+        batch_op.drop_column("document_shredding_month_bidx")
@@ -0,0 +1,31 @@
+"""add overview filter indexes
+
+Revision ID: b6d1f08e4c27
+Revises: 9e4a7c2b3f51
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b6d1f08e4c27"
+down_revision: str | None = "9e4a7c2b3f51"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Plaintext columns that the overview filters and sorts by
+FILTER_COLUMNS = ["school", "case_active", "notenschutz", "nachteilsausgleich"]
+
+
+def upgrade() -> None:
+    # SQLite can add an index without rebuilding the table
+    for name in FILTER_COLUMNS:
+        op.create_index(f"ix_clients_{name}", "clients", [name])
+
+
+def downgrade() -> None:
+    for name in FILTER_COLUMNS:
+        op.drop_index(f"ix_clients_{name}", table_name="clients")
@@ -0,0 +1,217 @@
+"""asyncio variant of the clients manager, for the Textual TUI."""
+
+import asyncio
+from collections.abc import AsyncIterator, Sequence
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from edupsyadmin.api import overview_cache
+from edupsyadmin.api.client_view import ClientView
+from edupsyadmin.api.exceptions import ClientNotFoundError
+from edupsyadmin.api.managers import OVERVIEW_PAGE_SIZE, ClientsManager
+from edupsyadmin.api.types import ClientRecord
+from edupsyadmin.core.config import config
+from edupsyadmin.core.logger import logger
+from edupsyadmin.db import clients as clients_db
+from edupsyadmin.db.engine import create_async_db_engine
+
+# Rows per decryption in a worker thread; the event loop runs (and a load can
+# be cancelled) between two chunks
+DECRYPT_CHUNK_SIZE = 100
+
+
+class AsyncClientsManager:
+    """Access the clients database from asyncio code, such as the TUI.
+
+    The queries run on an asyncio engine (``aiosqlite`` for SQLite) that
+    belongs to this manager. Encrypted values are fetched as raw tokens and
+    decrypted in a worker thread, in chunks of ``DECRYPT_CHUNK_SIZE`` rows, so
+    the event loop is not blocked and a task awaiting a load can be cancelled
+    in between. Writes run the ORM code of :class:`ClientsManager` in the
+    asyncio session; they touch single clients, whose encryption is cheap.
+
+    Validation, statements and decryption are shared with the synchronous
+    manager, which is available as :attr:`sync_manager` for code that runs
+    before the event loop starts.
+
+    The engine is bound to the event loop that uses it first; call
+    :meth:`dispose` before that loop ends.
+    """
+
+    def __init__(self, database_url: str) -> None:
+        self.sync_manager = ClientsManager(database_url)
+        self.database_url = database_url
+        self.engine = create_async_db_engine(database_url)
+        self.Session = async_sessionmaker(bind=self.engine, expire_on_commit=False)
+
+    async def dispose(self) -> None:
+        """Close the connections of the engine."""
+        await self.engine.dispose()
+
+    async def add_client(self, **client_data: Any) -> int:
+        logger.debug("trying to add client")
+        async with self.Session() as session, session.begin():
+            return await session.run_sync(ClientsManager._add_client, client_data)
+
+    async def get_decrypted_client(self, client_id: int) -> ClientRecord:
+        """Get a ClientRecord for the given client_id.
+
+        To fetch and decrypt only some fields, use :meth:`get_client_fields`.
+        """
+        logger.debug(f"trying to access client (client_id = {client_id})")
+        return ClientRecord.model_validate(
+            await self.get_client_fields(client_id, list(self.sync_manager._colmap)),
+        )
+
+    async def get_client_view(self, client_id: int) -> ClientView:
+        """Get a ClientView for the given client_id."""
+        logger.debug(f"trying to access client view (client_id = {client_id})")
+        return ClientView.model_validate(
+            await self.get_client_fields(client_id, list(self.sync_manager._colmap)),
+        )
+
+    async def get_client_fields(
+        self,
+        client_id: int,
+        columns: Sequence[str],
+    ) -> dict[str, Any]:
+        """Fetch only the given columns of a client and decrypt just those.
+
+        The returned dict has exactly the keys in ``columns``.
+        """
+        logger.debug(f"trying to access fields of client (client_id = {client_id})")
+        self.sync_manager._validate_columns(columns)
+        stmt = select(*self.sync_manager._raw_columns(columns)).where(
+            clients_db.Client.client_id == client_id,
+        )
+        async with self.Session() as session:
+            row = (await session.execute(stmt)).mappings().one_or_none()
+        if row is None:
+            raise ClientNotFoundError(client_id)
+        return (await self._decrypt_rows([dict(row)], list(columns)))[0]
+
+    async def iter_clients_overview_pages(
+        self,
+        nta_nos: bool = False,
+        schools: list[str] | None = None,
+        columns: list[str] | str | None = None,
+        *,
+        active_only: bool = False,
+        page_size: int = OVERVIEW_PAGE_SIZE,
+        after: int | None = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Yield the overview in pages of at most ``page_size`` rows.
+
+        Works as :meth:`ClientsManager.iter_clients_overview_pages`, but the
+        arguments are only checked once the iteration starts.
+        """
+        logger.debug("trying to query client data for overview in pages")
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        overview_columns = self.sync_manager._overview_columns(columns)
+        conditions = self.sync_manager._overview_conditions(
+            nta_nos,
+            schools,
+            active_only,
+        )
+        if config.core.overview_cache and after is None:
+            rows = await self._cached_overview(
+                overview_columns,
+                conditions,
+                {"nta_nos": nta_nos, "schools": schools, "active_only": active_only},
+            )
+            for start in range(0, len(rows), page_size):
+                yield rows[start : start + page_size]
+            return
+        async for page in self._overview_pages(
+            overview_columns,
+            conditions,
+            page_size,
+            after,
+        ):
+            yield page
+
+    async def _cached_overview(
+        self,
+        columns: list[str],
+        conditions: Sequence[Any],
+        arguments: dict[str, Any],
+    ) -> list[dict[str, Any]]:
+        """The overview from the persistent cache, if the data is unchanged."""
+        arguments = {**arguments, "columns": columns}
+        async with self.Session() as session:
+            version = await session.run_sync(overview_cache.data_version, arguments)
+            token = await session.run_sync(overview_cache.load_token, version)
+        if token is not None:
+            rows = await asyncio.to_thread(overview_cache.decode, token)
+            if rows is not None:
+                logger.debug("using the cached overview")
+                return rows
+        rows = [
+            row
+            async for page in self._overview_pages(columns, conditions)
+            for row in page
+        ]
+        token = await asyncio.to_thread(overview_cache.encode, columns, rows)
+        async with self.Session() as session, session.begin():
+            await session.run_sync(overview_cache.store_token, version, token)
+        return rows
+
+    async def _overview_pages(
+        self,
+        columns: list[str],
+        conditions: Sequence[Any],
+        page_size: int = OVERVIEW_PAGE_SIZE,
+        after: int | None = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        client_id = clients_db.Client.client_id
+        stmt = self.sync_manager._overview_page_statement(
+            columns,
+            conditions,
+            page_size,
+        )
+        while True:
+            page_stmt = stmt if after is None else stmt.where(client_id > after)
+            async with self.Session() as session:
+                result = await session.execute(page_stmt)
+                rows = [dict(row) for row in result.mappings()]
+            if not rows:
+                return
+            after = rows[-1]["_cursor"]
+            for row in rows:
+                del row["_cursor"]
+            yield await self._decrypt_rows(rows, columns)
+            if len(rows) < page_size:
+                return
+
+    async def _decrypt_rows(
+        self,
+        rows: list[dict[str, Any]],
+        columns: list[str],
+    ) -> list[dict[str, Any]]:
+        """Decrypt the rows in a worker thread, chunk by chunk."""
+        decrypted: list[dict[str, Any]] = []
+        for start in range(0, len(rows), DECRYPT_CHUNK_SIZE):
+            decrypted += await asyncio.to_thread(
+                self.sync_manager._decrypt_rows,
+                rows[start : start + DECRYPT_CHUNK_SIZE],
+                columns,
+            )
+        return decrypted
+
+    async def edit_client(
+        self,
+        client_ids: list[int],
+        new_data: dict[str, Any],
+    ) -> None:
+        logger.debug(f"editing clients (ids = {client_ids})")
+        self.sync_manager._validate_keys(new_data)
+        async with self.Session() as session, session.begin():
+            await session.run_sync(self.sync_manager._edit_client, client_ids, new_data)
+
+    async def delete_client(self, client_id: int) -> None:
+        logger.debug(f"deleting client {client_id}")
+        async with self.Session() as session, session.begin():
+            await session.run_sync(ClientsManager._delete_client, client_id)
@@ -1,15 +1,17 @@
+from collections.abc import Mapping
 from datetime import datetime
 from os import PathLike
 from pathlib import Path
+from typing import Any
 
 from edupsyadmin.api.managers import ClientsManager
 from edupsyadmin.api.reports import (
+    REPORT_CLIENT_COLUMNS,
     ResultsItem,
     TestReport,
     TestReportData,
     normal_distribution_plot,
 )
-from edupsyadmin.api.types import ClientRecord
 from edupsyadmin.utils.convert_measures import iq_to_t, iq_to_z
 from edupsyadmin.utils.datediff import mydatediff
 from edupsyadmin.utils.path_utils import normalize_path
@@ -41,7 +43,7 @@ def calculate_raw_totals(
 
 
 def generate_cft_report(
-    client_dict: ClientRecord,
+    client_dict: Mapping[str, Any],
     client_id: int,
     test_date: str,
     raw_part1_min: int | None,
@@ -57,7 +59,7 @@ def generate_cft_report(
     """
     Generate a CFT 20-R report PDF.
 
-    :param client_dict: Decrypted client data.
+    :param client_dict: Decrypted client fields (see REPORT_CLIENT_COLUMNS).
     :param client_id: The ID of the client.
     :param test_date: Date of the test (ISO format).
     :param raw_part1_min: Raw score part 1 (min).
@@ -72,13 +74,13 @@ def generate_cft_report(
     :return: Path to the generated PDF.
     """
     testdate = datetime.strptime(test_date, "%Y-%m-%d").date()
-    birthday = client_dict.birthday_encr
+    birthday = client_dict["birthday_encr"]
 
     if birthday is None:
         raise ValueError(f"No birthday found for client {client_id}")
 
     age_str = mydatediff(birthday, testdate)
-    grade = client_dict.class_int_encr
+    grade = client_dict["class_int_encr"]
     directory_path = normalize_path(directory)
 
     raw_total_min, raw_total_max = calculate_raw_totals(
@@ -118,7 +120,9 @@ def generate_cft_report(
 
     # create the pdf
     name = (
-        (client_dict.first_name_encr or "") + " " + (client_dict.last_name_encr or "")
+        (client_dict["first_name_encr"] or "")
+        + " "
+        + (client_dict["last_name_encr"] or "")
     ).strip() or str(client_id)
 
     data = TestReportData(
@@ -152,7 +156,7 @@ def create_report(
     """Interactive CLI wrapper for generating a CFT 20-R report."""
     client_dict = ClientsManager(
         database_url=database_url,
-    ).get_decrypted_client(client_id)
+    ).get_client_fields(client_id, REPORT_CLIENT_COLUMNS)
 
     raw_part1_min = input_int_or_none("Teil 1 min: ")
     raw_part1_max = input_int_or_none("Teil 1 max: ")
@@ -1,6 +1,7 @@
+import asyncio
 from collections.abc import Mapping, Sequence
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from liquid import parse
 from liquid.exceptions import LiquidError
@@ -13,6 +14,9 @@ from edupsyadmin.api.types import FillFormResult
 from edupsyadmin.core.logger import logger
 from edupsyadmin.utils.path_utils import normalize_path
 
+if TYPE_CHECKING:
+    from edupsyadmin.api.async_managers import AsyncClientsManager
+
 
 def _ensure_output_not_exists(out_fn: Path) -> None:
     if out_fn.exists():
@@ -311,6 +315,18 @@ def fill_form(
         write_form_md(fp, out_fp, aliased_data)
 
 
+def _normalize_batch_paths(
+    form_paths: Sequence[str | Path],
+    out_dir: Path | None,
+) -> tuple[list[Path], Path | None]:
+    form_paths_normalized = [normalize_path(p) for p in form_paths]
+    try:
+        out_dir_path = normalize_path(out_dir) if out_dir else None
+    except ValueError:
+        out_dir_path = None
+    return form_paths_normalized, out_dir_path
+
+
 def batch_fill_forms(
     clients_manager: ClientsManager,
     client_ids: Sequence[int],
@@ -331,11 +347,7 @@ def batch_fill_forms(
     :return: list of FillFormResult
     """
     results: list[FillFormResult] = []
-    form_paths_normalized = [normalize_path(p) for p in form_paths]
-    try:
-        out_dir_path = normalize_path(out_dir) if out_dir else None
-    except ValueError:
-        out_dir_path = None
+    form_paths_normalized, out_dir_path = _normalize_batch_paths(form_paths, out_dir)
 
     for client_id in client_ids:
         try:
@@ -354,3 +366,46 @@ def batch_fill_forms(
                 {"client_id": client_id, "success": False, "error": e},
             )
     return results
+
+
+async def async_batch_fill_forms(
+    clients_manager: AsyncClientsManager,
+    client_ids: Sequence[int],
+    form_paths: Sequence[str | Path],
+    out_dir: Path | None = None,
+    password: str | None = None,
+) -> list[FillFormResult]:
+    """
+    Fill forms for multiple clients from asyncio code, such as the TUI.
+
+    Works as :func:`batch_fill_forms`, but the clients are loaded with the
+    asyncio manager and the forms are written in a worker thread.
+
+    :param clients_manager: an instance of AsyncClientsManager
+    :param client_ids: a list of client IDs
+    :param form_paths: a list of paths to forms or templates
+    :param out_dir: optional output directory
+    :param password: password to encrypt the pdf with
+    :return: list of FillFormResult
+    """
+    results: list[FillFormResult] = []
+    form_paths_normalized, out_dir_path = _normalize_batch_paths(form_paths, out_dir)
+
+    for client_id in client_ids:
+        try:
+            view = await clients_manager.get_client_view(client_id)
+            await asyncio.to_thread(
+                fill_form,
+                view,
+                form_paths_normalized,
+                out_dir=out_dir_path,
+                password=password,
+            )
+            results.append(
+                {"client_id": client_id, "success": True, "error": None},
+            )
+        except Exception as e:
+            results.append(
+                {"client_id": client_id, "success": False, "error": e},
+            )
+    return results
@@ -2,17 +2,19 @@
 import csv
 import math
 import os
+from collections.abc import Mapping
 from datetime import datetime
 from pathlib import Path
+from typing import Any
 
 from edupsyadmin.api.managers import ClientsManager
 from edupsyadmin.api.reports import (
+    REPORT_CLIENT_COLUMNS,
     ResultsItem,
     TestReport,
     TestReportData,
     normal_distribution_plot,
 )
-from edupsyadmin.api.types import ClientRecord
 from edupsyadmin.core.config import config
 from edupsyadmin.utils.convert_measures import percentile_to_t, t_to_z
 from edupsyadmin.utils.datediff import mydatediff
@@ -105,7 +107,7 @@ def get_indices(
 
 
 def generate_lgvt_report(
-    client_dict: ClientRecord,
+    client_dict: Mapping[str, Any],
     client_id: int,
     test_date: str,
     results: list[ResultsItem],
@@ -118,10 +120,12 @@ def generate_lgvt_report(
     """Pure logic to generate the LGVT report PDF."""
     t_day = datetime.strptime(test_date, "%Y-%m-%d").date()
     name = (
-        (client_dict.first_name_encr or "") + " " + (client_dict.last_name_encr or "")
+        (client_dict["first_name_encr"] or "")
+        + " "
+        + (client_dict["last_name_encr"] or "")
     ).strip() or str(client_id)
-    schoolyear = int(client_dict.class_int_encr or 0)
-    birthday = client_dict.birthday_encr
+    schoolyear = int(client_dict["class_int_encr"] or 0)
+    birthday = client_dict["birthday_encr"]
 
     if birthday is None:
         raise ValueError(f"No birthday found for client {client_id}")
@@ -170,8 +174,8 @@ def mk_report(
 
     client_dict = ClientsManager(
         database_url=database_url,
-    ).get_decrypted_client(client_id)
-    schoolyear = int(client_dict.class_int_encr or 0)
+    ).get_client_fields(client_id, REPORT_CLIENT_COLUMNS)
+    schoolyear = int(client_dict["class_int_encr"] or 0)
 
     with normalize_path(fn_csv).open(encoding="utf-8") as f:
         csv_data = list(csv.DictReader(f))
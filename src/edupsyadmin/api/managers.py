@@ -1,15 +1,60 @@
 import logging  # just for interaction with the sqlalchemy logger
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from datetime import date, datetime
+from itertools import chain
 from typing import Any
 
-from sqlalchemy import create_engine, func, inspect, or_, select
-from sqlalchemy.orm import sessionmaker
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import (
+    Select,
+    delete,
+    func,
+    inspect,
+    or_,
+    select,
+    type_coerce,
+    update,
+)
+from sqlalchemy.orm import Session, load_only, sessionmaker
 
+from edupsyadmin.api import overview_cache
 from edupsyadmin.api.client_view import ClientView
 from edupsyadmin.api.exceptions import ClientNotFoundError
-from edupsyadmin.api.types import ClientRecord
+from edupsyadmin.api.types import AddClientResult, ClientRecord
 from edupsyadmin.core.config import config
+from edupsyadmin.core.encrypt import encr
 from edupsyadmin.core.logger import logger
 from edupsyadmin.db import clients as clients_db
+from edupsyadmin.db.column_types import (
+    EncryptedType,
+    decrypt_columns,
+    decryption_cache,
+    unseal_fields,
+)
+from edupsyadmin.db.converters import to_date_or_none
+from edupsyadmin.db.engine import get_engine
+
+# Storage details of envelope encryption and the blind indexes; they are
+# neither shown nor set by the user
+INTERNAL_COLUMNS = frozenset(
+    {
+        "sealed_encr",
+        *clients_db.BLIND_INDEX_COLUMNS,
+        clients_db.SHREDDING_MONTH_COLUMN,
+    },
+)
+
+# Rows per query and decryption batch of the overview
+OVERVIEW_PAGE_SIZE = 500
+
+# How far back clients_due_for_shredding looks for shredding dates by default;
+# older dates are not found
+SHREDDING_LOOKBACK_YEARS = 50
+
+# Blind indexes per IN (...) of clients_due_for_shredding; the month indexes
+# of all keys would exceed the bound parameter limit of older SQLite versions
+# (999) with a few keys
+SHREDDING_INDEX_CHUNK_SIZE = 500
 
 
 class ClientsManager:
@@ -23,29 +68,152 @@ class ClientsManager:
         # connect to database
         logger.debug(f"trying to connect to database at {database_url}")
         self.database_url = database_url
-        self.engine = create_engine(database_url, echo=False)
+        self.engine = get_engine(database_url)
         self.Session = sessionmaker(bind=self.engine)
+        decryption_cache.configure(
+            max_entries=config.core.decryption_cache_entries,
+            max_bytes=config.core.decryption_cache_bytes,
+        )
+        encr.set_parallelism(
+            workers=config.core.decryption_workers,
+            use_processes=config.core.decryption_processes,
+        )
+        encr.set_cipher_suite(config.core.cipher_suite)
 
         # Cache mapper and column metadata
         self._mapper = inspect(clients_db.Client)
         self._colmap = {
-            col.key: getattr(clients_db.Client, col.key) for col in self._mapper.columns
+            col.key: getattr(clients_db.Client, col.key)
+            for col in self._mapper.columns
+            if col.key not in INTERNAL_COLUMNS
+        }
+        self._valid_keys = {c.key for c in self._mapper.column_attrs} - INTERNAL_COLUMNS
+        self._encrypted_types: dict[str, EncryptedType] = {
+            col.key: col.type
+            for col in self._mapper.columns
+            if isinstance(col.type, EncryptedType)
         }
-        self._valid_keys = {c.key for c in self._mapper.column_attrs}
 
         logger.debug(f"created connection to database at {database_url}")
 
     def add_client(self, **client_data: Any) -> int:
         logger.debug("trying to add client")
-        with self.Session() as session:
-            with session.begin():
-                new_client = clients_db.Client(**client_data)
-                session.add(new_client)
-            # Accessing client_id after commit (end of begin block)
-            logger.info(f"added client: {new_client}")
-            return new_client.client_id
+        with self.Session() as session, session.begin():
+            return self._add_client(session, client_data)
+
+    @staticmethod
+    def _add_client(session: Session, client_data: Mapping[str, Any]) -> int:
+        """Add a client within the transaction of ``session``."""
+        new_client = clients_db.Client(**client_data)
+        session.add(new_client)
+        session.flush()
+        logger.info(f"added client: {new_client}")
+        return new_client.client_id
+
+    def add_clients(
+        self,
+        clients_data: Iterable[Mapping[str, Any]],
+        strict: bool = False,
+    ) -> list[AddClientResult]:
+        """Add several clients in one transaction.
+
+        Every row is validated by the :class:`~edupsyadmin.db.clients.Client`
+        constructor, as in :meth:`add_client`, and explicit ``client_id``
+        values must not exist yet. The valid rows are inserted with a single
+        executemany and committed once.
+
+        :param clients_data: one mapping of client fields per client
+        :param strict: raise the first error and add no client at all,
+            instead of skipping the invalid rows
+        :return: one result per row of ``clients_data``, in the same order,
+            with the new ``client_id`` or the ``error`` of the row
+        """
+        results: list[AddClientResult] = []
+        new_clients: list[tuple[AddClientResult, clients_db.Client]] = []
+        for data in clients_data:
+            result = AddClientResult(client_id=None, error=None)
+            results.append(result)
+            try:
+                new_clients.append((result, clients_db.Client(**data)))
+            except (TypeError, ValueError) as e:
+                if strict:
+                    raise
+                result["error"] = e
+        logger.debug(f"trying to add {len(new_clients)} of {len(results)} clients")
+
+        with self.Session() as session, session.begin():
+            taken_ids = self._reject_taken_client_ids(session, new_clients, strict)
+            new_clients = [(r, c) for r, c in new_clients if r["error"] is None]
+            self._assign_client_ids(
+                session,
+                [new_client for _, new_client in new_clients],
+                taken_ids,
+            )
+            session.add_all([new_client for _, new_client in new_clients])
+            session.flush()
+            for result, new_client in new_clients:
+                result["client_id"] = new_client.client_id
+        logger.info(f"added {len(new_clients)} clients")
+        return results
+
+    @staticmethod
+    def _reject_taken_client_ids(
+        session: Session,
+        new_clients: list[tuple[AddClientResult, clients_db.Client]],
+        strict: bool,
+    ) -> set[int]:
+        """Set an error for new clients whose explicit id is already taken.
+
+        :return: the explicit ids of the new clients
+        """
+        explicit_ids = [c.client_id for _, c in new_clients if c.client_id is not None]
+        taken_ids = set(
+            session.scalars(
+                select(clients_db.Client.client_id).where(
+                    clients_db.Client.client_id.in_(explicit_ids),
+                ),
+            ),
+        )
+        for result, new_client in new_clients:
+            if new_client.client_id is None:
+                continue
+            if new_client.client_id in taken_ids:
+                error = ValueError(
+                    f"Client with ID {new_client.client_id} already exists.",
+                )
+                if strict:
+                    raise error
+                result["error"] = error
+            taken_ids.add(new_client.client_id)
+        return taken_ids
+
+    @staticmethod
+    def _assign_client_ids(
+        session: Session,
+        new_clients: list[clients_db.Client],
+        taken_ids: set[int],
+    ) -> None:
+        """Give new clients without an explicit id the next free ids.
+
+        SQLite cannot return the generated keys of a batch in order, so the
+        ORM would insert the rows one by one. With all keys set beforehand
+        (like SQLite sets them: the largest id plus one) it uses executemany.
+        """
+        next_id = (
+            session.scalar(select(func.max(clients_db.Client.client_id))) or 0
+        ) + 1
+        for new_client in new_clients:
+            if new_client.client_id is None:
+                while next_id in taken_ids:
+                    next_id += 1
+                new_client.client_id = next_id
+                next_id += 1
 
     def get_decrypted_client(self, client_id: int) -> ClientRecord:
+        """Get a ClientRecord for the given client_id.
+
+        To fetch and decrypt only some fields, use :meth:`get_client_fields`.
+        """
         logger.debug(f"trying to access client (client_id = {client_id})")
         with self.Session() as session:
             client = session.get(clients_db.Client, client_id)
@@ -62,14 +230,269 @@ class ClientsManager:
                 raise ClientNotFoundError(client_id)
             return ClientView.model_validate(client)
 
+    def get_client_fields(
+        self,
+        client_id: int,
+        columns: Sequence[str],
+    ) -> dict[str, Any]:
+        """Fetch only the given columns of a client and decrypt just those.
+
+        The returned dict has exactly the keys in ``columns``.
+        """
+        logger.debug(f"trying to access fields of client (client_id = {client_id})")
+        self._validate_columns(columns)
+        stmt = select(*self._raw_columns(columns)).where(
+            clients_db.Client.client_id == client_id,
+        )
+        with self.Session() as session:
+            row = session.execute(stmt).mappings().one_or_none()
+        if row is None:
+            raise ClientNotFoundError(client_id)
+        return self._decrypt_rows([dict(row)], list(columns))[0]
+
     def get_clients_overview(
         self,
         nta_nos: bool = False,
         schools: list[str] | None = None,
         columns: list[str] | str | None = None,
+        *,
+        active_only: bool = False,
+        order_by: Sequence[str] | None = None,
+        descending: bool = False,
+        limit: int | None = None,
+        offset: int = 0,
     ) -> list[dict[str, Any]]:
+        """Get an overview of the clients.
+
+        The filters (``nta_nos``, ``schools``, ``active_only``), the sorting
+        and ``limit``/``offset`` run in SQL, so only the returned rows are
+        decrypted. ``order_by`` takes plaintext columns (encrypted values
+        cannot be compared in SQL); ties are broken by ``client_id``, which
+        is also the order without ``order_by``.
+        """
         logger.debug("trying to query client data for overview")
+        overview_columns = self._overview_columns(columns)
+        conditions = self._overview_conditions(nta_nos, schools, active_only)
+        if order_by is None and limit is None and not offset:
+            if config.core.overview_cache:
+                return self._cached_overview(
+                    overview_columns,
+                    conditions,
+                    {
+                        "nta_nos": nta_nos,
+                        "schools": schools,
+                        "active_only": active_only,
+                    },
+                )
+            return self._query_overview(overview_columns, conditions)
+        return self._query_overview_window(
+            overview_columns,
+            conditions,
+            self._order_by_clauses(order_by or [], descending),
+            limit,
+            offset,
+        )
+
+    def iter_clients_overview_pages(
+        self,
+        nta_nos: bool = False,
+        schools: list[str] | None = None,
+        columns: list[str] | str | None = None,
+        *,
+        active_only: bool = False,
+        page_size: int = OVERVIEW_PAGE_SIZE,
+        after: int | None = None,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """Yield the overview in pages of at most ``page_size`` rows.
+
+        The rows are ordered by ``client_id``. Each page is fetched and
+        decrypted on its own (keyset pagination on ``client_id``), so only
+        one page is held in memory at a time and no read transaction stays
+        open between pages. ``after`` is the cursor: only clients with a
+        larger ``client_id`` are returned; pass the ``client_id`` of the last
+        row received to resume. The other arguments work as in
+        :meth:`get_clients_overview`.
+        """
+        logger.debug("trying to query client data for overview in pages")
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        overview_columns = self._overview_columns(columns)
+        conditions = self._overview_conditions(nta_nos, schools, active_only)
+        if config.core.overview_cache and after is None:
+            rows = self._cached_overview(
+                overview_columns,
+                conditions,
+                {"nta_nos": nta_nos, "schools": schools, "active_only": active_only},
+            )
+            return (rows[i : i + page_size] for i in range(0, len(rows), page_size))
+        return self._overview_pages(overview_columns, conditions, page_size, after)
+
+    def find_clients(
+        self,
+        name: str | None = None,
+        *,
+        first_name: str | None = None,
+        last_name: str | None = None,
+        birthday: date | str | None = None,
+        nta_nos: bool = False,
+        schools: list[str] | None = None,
+        columns: list[str] | str | None = None,
+        active_only: bool = False,
+    ) -> list[dict[str, Any]]:
+        """Find clients by name and/or birthday.
+
+        ``name`` matches the first or the last name; all given criteria must
+        match. Values are compared after normalizing case, Unicode form and
+        whitespace. The search runs in SQL on the blind index columns, so
+        only the matching rows are decrypted. The other arguments work as in
+        :meth:`get_clients_overview`.
+        """
+        logger.debug("trying to find clients")
+        # (blind index columns of which one has to match, searched indexes)
+        criteria: list[tuple[list[str], list[bytes]]] = []
+        if name:
+            criteria.append(
+                (["first_name_bidx", "last_name_bidx"], encr.blind_indexes(name)),
+            )
+        if first_name:
+            criteria.append((["first_name_bidx"], encr.blind_indexes(first_name)))
+        if last_name:
+            criteria.append((["last_name_bidx"], encr.blind_indexes(last_name)))
+        birthday_date = to_date_or_none(birthday)
+        if birthday_date is not None:
+            criteria.append(
+                (["birthday_bidx"], encr.blind_indexes(birthday_date.isoformat())),
+            )
+        if not criteria:
+            raise ValueError("At least one search criterion is required.")
+
+        client = clients_db.Client
+        search_conditions = [
+            or_(*(getattr(client, key).in_(indexes) for key in index_keys))
+            for index_keys, indexes in criteria
+        ]
+        overview_columns = self._overview_columns(columns)
+        filters = self._overview_conditions(nta_nos, schools, active_only)
+        rows = self._query_overview(overview_columns, search_conditions + filters)
+
+        index_sources = {
+            key: clients_db.BLIND_INDEX_COLUMNS[key]
+            for index_keys, _ in criteria
+            for key in index_keys
+        }
+
+        def matches(row: Mapping[str, Any]) -> bool:
+            return all(
+                any(
+                    self._blind_index(index_sources[key], row) in indexes
+                    for key in index_keys
+                )
+                for index_keys, indexes in criteria
+            )
+
+        unindexed = [
+            row
+            for row in self._unindexed_rows(overview_columns, index_sources, filters)
+            if matches(row)
+        ]
+        if not unindexed:
+            return rows
+        rows += [{key: row[key] for key in overview_columns} for row in unindexed]
+        rows.sort(key=lambda row: row["client_id"])
+        return rows
+
+    def clients_due_for_shredding(
+        self,
+        as_of: date | None = None,
+        columns: list[str] | str | None = None,
+        lookback_years: int = SHREDDING_LOOKBACK_YEARS,
+    ) -> list[dict[str, Any]]:
+        """Find the clients whose documents are due for shredding.
+
+        A client is due if its ``document_shredding_date_encr`` is on or
+        before ``as_of`` (default: today). The candidates are narrowed down in
+        SQL with the blind index of the month of the shredding date, so only
+        the clients of the last ``lookback_years`` years up to ``as_of`` are
+        decrypted. Shredding dates before that window are not found (a blind
+        index only matches equal months). The month indexes are queried in chunks of
+        :data:`SHREDDING_INDEX_CHUNK_SIZE`. Clients without a month index
+        (see :meth:`_unindexed_rows`) are decrypted and compared as well.
+        ``columns`` works as in :meth:`get_clients_overview`;
+        ``document_shredding_date_encr`` is always included.
+        """
+        if as_of is None:
+            as_of = date.today()
+        logger.debug(f"trying to find clients due for shredding as of {as_of}")
+        if lookback_years < 0:
+            raise ValueError("lookback_years must not be negative")
+        first_month = as_of.replace(day=1) - relativedelta(years=lookback_years)
+        month_indexes = []
+        month = first_month
+        while month <= as_of:
+            month_indexes += encr.blind_indexes(clients_db.shredding_month(month))
+            month += relativedelta(months=1)
+
+        query_columns = list(
+            dict.fromkeys(
+                [*self._overview_columns(columns), "document_shredding_date_encr"],
+            ),
+        )
+        month_column = clients_db.Client.document_shredding_month_bidx
+        rows = []
+        for start in range(0, len(month_indexes), SHREDDING_INDEX_CHUNK_SIZE):
+            chunk = month_indexes[start : start + SHREDDING_INDEX_CHUNK_SIZE]
+            rows += self._query_overview(query_columns, [month_column.in_(chunk)])
+        # rows without a month index are decrypted and compared instead
+        rows += self._unindexed_rows(
+            query_columns,
+            {clients_db.SHREDDING_MONTH_COLUMN: "document_shredding_date_encr"},
+            [],
+        )
+        # every client has one month, so the chunks do not overlap
+        rows.sort(key=lambda row: row["client_id"])
+        # the month of as_of can still hold clients that are due later
+        return [
+            row
+            for row in rows
+            if row["document_shredding_date_encr"] is not None
+            and row["document_shredding_date_encr"] <= as_of
+        ]
 
+    def _unindexed_rows(
+        self,
+        columns: list[str],
+        index_sources: Mapping[str, str],
+        conditions: Sequence[Any],
+    ) -> list[dict[str, Any]]:
+        """
+        The rows with a missing blind index, to be matched after decryption.
+
+        ``index_sources`` maps the blind index columns to the encrypted
+        columns they are computed from; those are decrypted in addition to
+        ``columns``. The indexes are only missing if a migration ran without
+        the encryption keys (see ``backfill_blind_indexes`` in
+        :mod:`edupsyadmin.api.migration`), so this is usually a single indexed
+        query without results.
+        """
+        client = clients_db.Client
+        missing = or_(*(getattr(client, key).is_(None) for key in index_sources))
+        query_columns = list(dict.fromkeys([*columns, *index_sources.values()]))
+        rows = self._query_overview(query_columns, [missing, *conditions])
+        if rows:
+            logger.warning(
+                f"{len(rows)} clients have no blind indexes yet and were "
+                "decrypted to be searched; `edupsyadmin rotate-key` computes "
+                "the missing indexes.",
+            )
+        return rows
+
+    @staticmethod
+    def _blind_index(key: str, row: Mapping[str, Any]) -> bytes:
+        """The blind index of the decrypted field ``key`` of an overview row."""
+        return encr.blind_index(clients_db.SEALED_COLUMNS[key].to_plaintext(row[key]))
+
+    def _overview_columns(self, columns: list[str] | str | None) -> list[str]:
+        """The columns of an overview: fixed base columns plus ``columns``."""
         # Always-present base columns
         required_columns = [
             "client_id",
@@ -81,42 +504,39 @@ class ClientsManager:
         ]
 
         if columns in ("all", ["all"]):
-            final_columns = list(self._colmap.keys())
+            return list(self._colmap.keys())
+
+        # Defaults for extra columns when none provided
+        default_extras = [
+            "notenschutz",
+            "nachteilsausgleich",
+            "min_sessions",
+            "lrst_diagnosis_encr",
+            "keyword_taet_encr",
+        ]
+
+        if columns is None or (isinstance(columns, list) and not columns):
+            extras = default_extras
+        elif isinstance(columns, str):
+            extras = [columns]
         else:
-            # Defaults for extra columns when none provided
-            default_extras = [
-                "notenschutz",
-                "nachteilsausgleich",
-                "min_sessions",
-                "lrst_diagnosis_encr",
-                "keyword_taet_encr",
-            ]
-
-            if columns is None or (isinstance(columns, list) and not columns):
-                extras = default_extras
-            elif isinstance(columns, str):
-                extras = [columns]
-            else:
-                extras = columns
-
-            # Validate extras against available columns
-            invalid = set(extras) - set(self._colmap.keys())
-            if invalid:
-                allowed = ", ".join(sorted(self._colmap.keys()))
-                raise ValueError(
-                    f"Invalid column names: {', '.join(sorted(invalid))}. "
-                    f"Allowed: {allowed}",
-                )
+            extras = columns
 
-            # Merge required + extras, de-duplicate while preserving order
-            final_columns = list(dict.fromkeys(required_columns + extras))
+        self._validate_columns(extras)
 
-        # Build SELECT
-        selected_cols = [self._colmap[name].label(name) for name in final_columns]
-        stmt = select(*selected_cols)
+        # Merge required + extras, de-duplicate while preserving order
+        return list(dict.fromkeys(required_columns + extras))
 
-        # Optional filters
+    def _overview_conditions(
+        self,
+        nta_nos: bool,
+        schools: list[str] | None,
+        active_only: bool = False,
+    ) -> list[Any]:
+        """The optional filters of an overview."""
         conditions = []
+        if active_only:
+            conditions.append(clients_db.Client.case_active.is_(True))
         if nta_nos:
             conditions.append(
                 or_(
@@ -126,49 +546,304 @@ class ClientsManager:
             )
         if schools:
             conditions.append(clients_db.Client.school.in_(schools))
-        if conditions:
-            stmt = stmt.where(*conditions)
+        return conditions
+
+    def _query_overview(
+        self,
+        columns: list[str],
+        conditions: Sequence[Any],
+    ) -> list[dict[str, Any]]:
+        return list(
+            chain.from_iterable(self._overview_pages(columns, conditions)),
+        )
 
+    def _cached_overview(
+        self,
+        columns: list[str],
+        conditions: Sequence[Any],
+        arguments: dict[str, Any],
+    ) -> list[dict[str, Any]]:
+        """The overview from the persistent cache, if the data is unchanged."""
+        arguments = {**arguments, "columns": columns}
+        with self.Session() as session:
+            version = overview_cache.data_version(session, arguments)
+            rows = overview_cache.load(session, version)
+        if rows is not None:
+            logger.debug("using the cached overview")
+            return rows
+        rows = self._query_overview(columns, conditions)
+        with self.Session() as session, session.begin():
+            overview_cache.store(session, version, columns, rows)
+        return rows
+
+    def _query_overview_window(
+        self,
+        columns: list[str],
+        conditions: Sequence[Any],
+        order_by: Sequence[Any],
+        limit: int | None,
+        offset: int,
+    ) -> list[dict[str, Any]]:
+        """Fetch and decrypt one sorted slice of an overview."""
+        if limit is not None and limit < 0:
+            raise ValueError("limit must not be negative")
+        if offset < 0:
+            raise ValueError("offset must not be negative")
+        stmt = (
+            select(*self._raw_columns(columns))
+            .where(*conditions)
+            .order_by(*order_by)
+            .limit(limit)
+            .offset(offset)
+        )
         with self.Session() as session:
-            result = session.execute(stmt, execution_options={"yield_per": 100})
-            return [dict(row) for row in result.mappings()]
+            rows = [dict(row) for row in session.execute(stmt).mappings()]
+        return self._decrypt_rows(rows, columns)
+
+    def _order_by_clauses(
+        self,
+        order_by: Sequence[str],
+        descending: bool,
+    ) -> list[Any]:
+        """ORDER BY clauses for plaintext columns, with client_id last."""
+        if isinstance(order_by, str):
+            order_by = [order_by]
+        self._validate_columns(order_by)
+        encrypted = [name for name in order_by if name in self._encrypted_types]
+        if encrypted:
+            raise ValueError(
+                f"Cannot sort by encrypted columns: {', '.join(encrypted)}",
+            )
+        keys = [self._colmap[name] for name in dict.fromkeys(order_by)]
+        keys.append(clients_db.Client.client_id)
+        return [key.desc() for key in keys] if descending else keys
+
+    def _overview_pages(
+        self,
+        columns: list[str],
+        conditions: Sequence[Any],
+        page_size: int = OVERVIEW_PAGE_SIZE,
+        after: int | None = None,
+    ) -> Iterator[list[dict[str, Any]]]:
+        client_id = clients_db.Client.client_id
+        stmt = self._overview_page_statement(columns, conditions, page_size)
+        while True:
+            page_stmt = stmt if after is None else stmt.where(client_id > after)
+            with self.Session() as session:
+                rows = [dict(row) for row in session.execute(page_stmt).mappings()]
+            if not rows:
+                return
+            after = rows[-1]["_cursor"]
+            for row in rows:
+                del row["_cursor"]
+            yield self._decrypt_rows(rows, columns)
+            if len(rows) < page_size:
+                return
+
+    def _overview_page_statement(
+        self,
+        columns: list[str],
+        conditions: Sequence[Any],
+        page_size: int,
+    ) -> Select[Any]:
+        """The SELECT of one overview page, before the cursor condition."""
+        client_id = clients_db.Client.client_id
+        # encrypted columns are fetched as raw tokens and decrypted column by
+        # column afterwards. client_id is needed for the cursor
+        return (
+            select(*self._raw_columns(columns), client_id.label("_cursor"))
+            .where(*conditions)
+            .order_by(client_id)
+            .limit(page_size)
+        )
+
+    def _validate_columns(self, columns: Sequence[str]) -> None:
+        invalid = set(columns) - set(self._colmap.keys())
+        if invalid:
+            allowed = ", ".join(sorted(self._colmap.keys()))
+            raise ValueError(
+                f"Invalid column names: {', '.join(sorted(invalid))}. "
+                f"Allowed: {allowed}",
+            )
+
+    def _raw_columns(self, columns: Sequence[str]) -> list[Any]:
+        """Labelled columns for a SELECT; encrypted ones yield raw tokens."""
+        selected = [
+            type_coerce(
+                self._colmap[name],
+                self._encrypted_types[name].impl_instance,
+            ).label(name)
+            if name in self._encrypted_types
+            else self._colmap[name].label(name)
+            for name in columns
+        ]
+        if any(name in self._encrypted_types for name in columns):
+            # rows stored with envelope encryption keep their values here
+            selected.append(clients_db.Client.sealed_encr.label("sealed_encr"))
+        return selected
+
+    def _decrypt_rows(
+        self,
+        rows: list[dict[str, Any]],
+        columns: list[str],
+    ) -> list[dict[str, Any]]:
+        """Replace raw tokens in encrypted columns with decrypted values."""
+        encrypted = [name for name in columns if name in self._encrypted_types]
+        field_rows = []
+        sealed_rows = []
+        sealed_tokens = []
+        for row in rows:
+            token = row.pop("sealed_encr", None)
+            if token is None:
+                field_rows.append(row)
+            else:
+                sealed_rows.append(row)
+                sealed_tokens.append(token)
+        decrypted = decrypt_columns(
+            self._encrypted_types,
+            {name: [row[name] for row in field_rows] for name in encrypted},
+        )
+        for name, values in decrypted.items():
+            for row, value in zip(field_rows, values, strict=True):
+                row[name] = value
+
+        # rows stored with envelope encryption
+        for row, plaintexts in zip(
+            sealed_rows,
+            unseal_fields(sealed_tokens),
+            strict=True,
+        ):
+            for name in encrypted:
+                row[name] = self._encrypted_types[name].from_plaintext(
+                    plaintexts.get(name, ""),
+                )
+        return rows
 
     def edit_client(self, client_ids: list[int], new_data: dict[str, Any]) -> None:
         logger.debug(f"editing clients (ids = {client_ids})")
+        self._validate_keys(new_data)
+        with self.Session() as session, session.begin():
+            self._edit_client(session, client_ids, new_data)
 
-        # Validate keys
+    def _validate_keys(self, new_data: Mapping[str, Any]) -> None:
         invalid_keys = set(new_data.keys()) - self._valid_keys
         if invalid_keys:
             raise ValueError(f"Invalid keys found: {', '.join(invalid_keys)}")
 
-        with self.Session() as session, session.begin():
-            stmt = select(clients_db.Client).where(
-                clients_db.Client.client_id.in_(client_ids),
-            )
-            clients = session.scalars(stmt).all()
+    def _edit_client(
+        self,
+        session: Session,
+        client_ids: list[int],
+        new_data: dict[str, Any],
+    ) -> None:
+        """Edit clients within the transaction of ``session``."""
+        if new_data and new_data.keys() <= clients_db.SET_BASED_UPDATE_COLUMNS:
+            # rows stored in the other storage mode are rewritten below
+            client_ids = self._update_plaintext_columns(session, client_ids, new_data)
+            if not client_ids:
+                return
+
+        # only the fields that are read while updating get decrypted
+        clients = clients_db.load_clients_deferred(
+            session,
+            clients_db.Client.client_id.in_(client_ids),
+        )
 
-            found_ids = {client.client_id for client in clients}
-            not_found_ids = set(client_ids) - found_ids
+        self._warn_not_found(
+            client_ids,
+            {client.client_id for client in clients},
+        )
 
-            if not_found_ids:
-                logger.warning(
-                    f"clients with following ids could not be found: {not_found_ids}",
+        for client in clients:
+            for key, value in new_data.items():
+                logger.debug(
+                    f"changing value for key: {key} for client: {client.client_id}",
                 )
+                setattr(client, key, value)
 
-            for client in clients:
-                for key, value in new_data.items():
-                    logger.debug(
-                        f"changing value for key: {key} for client: {client.client_id}",
-                    )
-                    setattr(client, key, value)
+    @staticmethod
+    def _update_plaintext_columns(
+        session: Session,
+        client_ids: list[int],
+        new_data: dict[str, Any],
+    ) -> list[int]:
+        """Update plaintext columns with a single UPDATE statement.
+
+        The rows are not loaded, so nothing is decrypted or re-encrypted; the
+        derived plaintext flags and the modification time are set in the same
+        statement. Only for the keys in ``SET_BASED_UPDATE_COLUMNS``.
+
+        :return: the ids of the rows that are not stored in the configured
+            storage mode and were left for the ORM to rewrite
+        """
+        values = clients_db.validate_values(new_data)
+        client = clients_db.Client
+        rows = session.execute(
+            select(client.client_id, client.sealed_encr.is_not(None)).where(
+                client.client_id.in_(client_ids),
+            ),
+        ).all()
+        ClientsManager._warn_not_found(client_ids, {row[0] for row in rows})
+
+        envelope = config.core.envelope_encryption
+        same_mode = [row[0] for row in rows if row[1] == envelope]
+        if same_mode:
+            logger.debug(f"updating {sorted(values)} with a single statement")
+            session.execute(
+                update(client)
+                .where(client.client_id.in_(same_mode))
+                .values(
+                    **values,
+                    **clients_db.derived_flag_values(values),
+                    datetime_lastmodified=datetime.now(),
+                )
+                .execution_options(synchronize_session=False),
+            )
+        return [row[0] for row in rows if row[1] != envelope]
+
+    @staticmethod
+    def _warn_not_found(client_ids: list[int], found_ids: set[int]) -> None:
+        not_found_ids = set(client_ids) - found_ids
+        if not_found_ids:
+            logger.warning(
+                f"clients with following ids could not be found: {not_found_ids}",
+            )
 
     def delete_client(self, client_id: int) -> None:
         logger.debug(f"deleting client {client_id}")
         with self.Session() as session, session.begin():
-            client = session.get(clients_db.Client, client_id)
-            if not client:
-                raise ClientNotFoundError(client_id)
-            session.delete(client)
+            self._delete_client(session, client_id)
+
+    @staticmethod
+    def _delete_client(session: Session, client_id: int) -> None:
+        """Delete a client within the transaction of ``session``."""
+        # only the primary key is needed to delete the row, so none of the
+        # encrypted columns are loaded (and decrypted)
+        client = session.get(
+            clients_db.Client,
+            client_id,
+            options=[load_only(clients_db.Client.client_id)],
+        )
+        if not client:
+            raise ClientNotFoundError(client_id)
+        session.delete(client)
+        # the cached overview must not keep the data of deleted clients
+        overview_cache.clear(session)
+
+    def delete_clients(self, client_ids: Sequence[int]) -> int:
+        """Delete several clients in one transaction.
+
+        :return: the number of deleted clients
+        """
+        logger.debug(f"deleting clients (ids = {list(client_ids)})")
+        with self.Session() as session, session.begin():
+            result = session.execute(
+                delete(clients_db.Client).where(
+                    clients_db.Client.client_id.in_(client_ids),
+                ),
+            )
+            overview_cache.clear(session)
+        return result.rowcount
 
     def get_total_count(self) -> int:
         """Get the total number of clients in the database."""
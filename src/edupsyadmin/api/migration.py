@@ -1,23 +1,70 @@
 """Database encryption migration utilities."""
 
-from collections.abc import Iterator
+import json
+import time
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
 from importlib import resources
 from pathlib import Path
+from typing import Any, Final
 
 import sqlalchemy as sa
 from alembic import command
 from alembic.config import Config
 from alembic.runtime.migration import MigrationContext
 from alembic.script import ScriptDirectory
-from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy import (
+    ColumnElement,
+    LargeBinary,
+    RowMapping,
+    Update,
+    bindparam,
+    delete,
+    func,
+    inspect,
+    or_,
+    select,
+    text,
+    type_coerce,
+    update,
+)
 from sqlalchemy.orm import Session
-from sqlalchemy.orm.attributes import flag_modified
 
+from edupsyadmin.api import overview_cache
 from edupsyadmin.api.exceptions import MigrationError
 from edupsyadmin.api.migration_fs import create_db_backup
+from edupsyadmin.core.config import config
 from edupsyadmin.core.encrypt import encr
 from edupsyadmin.core.logger import logger
-from edupsyadmin.db.clients import Client
+from edupsyadmin.db.clients import (
+    BLIND_INDEX_COLUMNS,
+    SEALED_COLUMNS,
+    SHREDDING_MONTH_COLUMN,
+    Client,
+    SystemMetadata,
+    shredding_month,
+)
+from edupsyadmin.db.column_types import seal_fields
+from edupsyadmin.db.engine import get_engine
+from edupsyadmin.db.revision import INDEX_BACKFILL_KEY
+
+# Clients per batch of a key rotation
+ROTATION_BATCH_SIZE = 500
+
+# system_metadata key of the checkpoint of a resumable key rotation
+ROTATION_CHECKPOINT_KEY: Final[str] = "rotation_checkpoint"
+
+
+@dataclass(frozen=True)
+class RotationStats:
+    """Number of clients re-encrypted by a key rotation and the time it took."""
+
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
 
 
 def upgrade_db(database_url: str, salt_path: Path | None = None) -> None:
@@ -56,7 +103,7 @@ def upgrade_db(database_url: str, salt_path: Path | None = None) -> None:
         head_revision = script.get_current_head()
 
         # Connect to the database to check its state
-        engine = create_engine(database_url)
+        engine = get_engine(database_url)
         with engine.connect() as connection:
             context = MigrationContext.configure(connection)
             current_revision = context.get_current_revision()
@@ -83,9 +130,15 @@ def upgrade_db(database_url: str, salt_path: Path | None = None) -> None:
             # A migration is needed.
             # Create a backup if we are upgrading an existing database with data.
             if table_names:
+                if engine.dialect.name == "sqlite":
+                    # move changes from the write-ahead log into the file
+                    connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
                 db_path = Path(database_url.removeprefix("sqlite:///"))
                 create_db_backup(db_path)
 
+        # The migrations run on a connection of the shared engine (see env.py)
+        with engine.begin() as connection:
+            alembic_cfg.attributes["connection"] = connection
             if is_legacy:
                 logger.info(
                     "Legacy database detected. Stamping with the initial "
@@ -96,8 +149,8 @@ def upgrade_db(database_url: str, salt_path: Path | None = None) -> None:
                 command.stamp(alembic_cfg, "4087c43f0c7c")
                 logger.info("Database stamped successfully.")
 
-        # For all cases, run upgrade.
-        command.upgrade(alembic_cfg, "head")
+            # For all cases, run upgrade.
+            command.upgrade(alembic_cfg, "head")
         logger.info("Database migration completed successfully.")
 
     except Exception as e:
@@ -106,61 +159,101 @@ def upgrade_db(database_url: str, salt_path: Path | None = None) -> None:
         raise MigrationError(f"Database migration failed: {e}") from e
 
 
-def re_encrypt_all_data(db_session: Session, batch_size: int = 100) -> None:
+def re_encrypt_all_data(
+    db_session: Session,
+    batch_size: int = ROTATION_BATCH_SIZE,
+    *,
+    checkpoint: bool = False,
+    resume: bool = False,
+) -> RotationStats:
     """
     Re-encrypt all data with the current primary key.
 
     Assumes the global `encr` has already been initialized with MultiFernet
     (primary first, then any older keys) by CLI setup. This preserves the
     rotate_key command behavior.
+
+    The raw tokens are read in batches of ``batch_size`` clients, ordered by
+    ``client_id`` (keyset pagination), decrypted with whichever key fits and
+    encrypted with the primary key; each batch is written back with one
+    executemany UPDATE. The ORM (and its validation) is not involved, as the
+    plaintexts do not change. The blind indexes are recomputed with the
+    primary key, and the rows are stored in the mode set by
+    ``envelope_encryption``. The verification checks that every token is
+    tagged with the primary key.
+
+    By default, everything runs in one transaction, which is only committed
+    after the verification; on failure nothing is changed. With
+    ``checkpoint``, every batch is committed together with a checkpoint in
+    ``system_metadata`` (the last ``client_id`` and the id of the primary
+    key), so a failure only loses the current batch. ``resume`` continues
+    after the checkpoint of an interrupted run; it implies ``checkpoint``.
     """
     if not encr.is_initialized:
         raise MigrationError("Encryption is not initialized.")
 
+    after = _load_checkpoint(db_session) if resume else None
+    checkpoint = checkpoint or resume
+
     logger.info(
         "Starting data re-encryption to rotate all fields to the primary key...",
     )
 
+    start = time.perf_counter()
     try:
-        total_clients = db_session.query(Client).count()
-        if total_clients == 0:
+        total_clients = db_session.scalar(select(func.count()).select_from(Client))
+        if not total_clients:
             logger.info("No clients in the database. Nothing to re-encrypt.")
-            return
+            _clear_checkpoint(db_session)
+            _clear_index_backfill(db_session)
+            db_session.commit()
+            return RotationStats(rows=0, seconds=0.0)
+
+        pending_clients = total_clients
+        if after is None:
+            logger.info(f"Found {total_clients} clients to process.")
+        else:
+            pending_clients = db_session.scalar(
+                select(func.count()).where(Client.client_id > after),
+            )
+            logger.info(
+                f"Resuming after client_id={after}: "
+                f"{pending_clients} of {total_clients} clients left to process.",
+            )
 
-        logger.info(f"Found {total_clients} clients to process.")
+        # the cached overview is encrypted with the old key; it is rebuilt
+        # on the next overview
+        overview_cache.clear(db_session)
 
+        update_stmt = _rotation_update_statement()
+        seal = config.core.envelope_encryption
         processed_count = 0
-        encrypted_fields = _get_encrypted_field_names()
-
-        for batch in _get_client_batches(db_session, batch_size):
-            for client in batch:
-                for field_name in encrypted_fields:
-                    try:
-                        current_value = getattr(client, field_name)  # decrypt
-                        setattr(
-                            client,
-                            field_name,
-                            current_value,
-                        )  # re-encrypt with primary
-                        # Ensure UPDATE even if plaintext unchanged
-                        flag_modified(client, field_name)
-                    except ValueError as e:
-                        raise MigrationError(
-                            "Validation failed during re-encryption for "
-                            f"client_id={client.client_id}, field='{field_name}'. "
-                            f"Details: {e}",
-                        ) from e
-
-            db_session.commit()
+        for batch in _iter_token_batches(db_session, batch_size, after):
+            db_session.execute(update_stmt, _rotate_batch(batch, seal))
             processed_count += len(batch)
+            if checkpoint:
+                _store_checkpoint(db_session, batch[-1]["client_id"])
+                db_session.commit()
             logger.info(
-                f"Progress: {processed_count}/{total_clients} clients processed.",
+                f"Progress: {processed_count}/{pending_clients} clients processed.",
             )
 
         logger.info("Verifying re-encryption...")
         _verify_migration(db_session, total_clients)
-
-        logger.info("Data re-encryption completed successfully.")
+        _clear_checkpoint(db_session)
+        # all blind indexes were recomputed
+        _clear_index_backfill(db_session)
+        db_session.commit()
+
+        stats = RotationStats(
+            rows=processed_count,
+            seconds=time.perf_counter() - start,
+        )
+        logger.info(
+            f"Data re-encryption completed successfully: {stats.rows} clients "
+            f"in {stats.seconds:.2f} s ({stats.rows_per_second:.0f} rows/s).",
+        )
+        return stats
 
     except Exception as e:
         logger.error(f"Data re-encryption failed: {e}")
@@ -168,65 +261,282 @@ def re_encrypt_all_data(db_session: Session, batch_size: int = 100) -> None:
         raise MigrationError(f"Data re-encryption failed: {e}") from e
 
 
-def _get_client_batches(db_session: Session, batch_size: int) -> Iterator[list[Client]]:
-    offset = 0
+def backfill_blind_indexes(
+    database_url: str,
+    batch_size: int = ROTATION_BATCH_SIZE,
+) -> int:
+    """
+    Compute the blind indexes that the migrations left empty.
+
+    The migrations that add blind index columns need the encryption keys to
+    index the existing rows. If a command without the keys (e.g.
+    ``edit-config``) runs them, the indexes stay NULL and the migrations set
+    :data:`~edupsyadmin.db.revision.INDEX_BACKFILL_KEY`. This computes the
+    indexes of all rows with a missing one and removes the marker, in one
+    transaction. Returns the number of clients that were indexed.
+    """
+    if not encr.is_initialized:
+        raise MigrationError("Encryption is not initialized.")
+
+    columns = Client.__table__.c
+    index_keys = [*BLIND_INDEX_COLUMNS, SHREDDING_MONTH_COLUMN]
+    unindexed = or_(*(columns[key].is_(None) for key in index_keys))
+    update_stmt = (
+        update(Client.__table__)
+        .where(columns.client_id == bindparam("_client_id"))
+        .values({key: bindparam(f"_{key}") for key in index_keys})
+    )
+    indexed_count = 0
+    try:
+        with Session(get_engine(database_url)) as db_session, db_session.begin():
+            for batch in _iter_token_batches(
+                db_session,
+                batch_size,
+                criteria=[unindexed],
+            ):
+                params = [
+                    {"_client_id": row["client_id"], **_index_params(plaintexts)}
+                    for row, plaintexts in zip(
+                        batch,
+                        _decrypt_batch(batch),
+                        strict=True,
+                    )
+                ]
+                db_session.execute(update_stmt, params)
+                indexed_count += len(batch)
+            _clear_index_backfill(db_session)
+    except Exception as e:
+        logger.error(f"Computing the blind indexes failed: {e}")
+        raise MigrationError(f"Computing the blind indexes failed: {e}") from e
+    logger.info(f"Computed the blind indexes of {indexed_count} clients.")
+    return indexed_count
+
+
+def count_clients_off_primary_key(
+    db_session: Session,
+    batch_size: int = ROTATION_BATCH_SIZE,
+) -> int:
+    """
+    Count the clients with a token that is not tagged with the primary key.
+
+    Only the tags of the tokens are read, nothing is decrypted. Old keys can
+    be dropped safely once this is 0.
+    """
+    count = 0
+    for batch in _iter_token_batches(db_session, batch_size):
+        for row in batch:
+            tokens = [row["sealed_encr"], *(row[key] for key in SEALED_COLUMNS)]
+            if not all(encr.is_primary_token(token) for token in tokens if token):
+                count += 1
+    return count
+
+
+def rotation_checkpoint(db_session: Session) -> dict[str, Any] | None:
+    """The checkpoint of an interrupted key rotation, if there is one."""
+    stored = db_session.get(SystemMetadata, ROTATION_CHECKPOINT_KEY)
+    return None if stored is None else json.loads(stored.value)
+
+
+def _load_checkpoint(db_session: Session) -> int:
+    """The last client_id of the checkpoint that a resumed rotation continues."""
+    saved = rotation_checkpoint(db_session)
+    if saved is None:
+        raise MigrationError("There is no interrupted key rotation to resume.")
+    if saved["key_id"] != encr.primary_key_id:
+        raise MigrationError(
+            "The interrupted key rotation used a different primary key "
+            f"({saved['key_id']}); run the rotation again without resuming.",
+        )
+    return saved["last_client_id"]
+
+
+def _store_checkpoint(db_session: Session, last_client_id: int) -> None:
+    db_session.merge(
+        SystemMetadata(
+            key=ROTATION_CHECKPOINT_KEY,
+            value=json.dumps(
+                {"last_client_id": last_client_id, "key_id": encr.primary_key_id},
+            ),
+        ),
+    )
+
+
+def _clear_checkpoint(db_session: Session) -> None:
+    db_session.execute(
+        delete(SystemMetadata).where(SystemMetadata.key == ROTATION_CHECKPOINT_KEY),
+    )
+
+
+def _clear_index_backfill(db_session: Session) -> None:
+    db_session.execute(
+        delete(SystemMetadata).where(SystemMetadata.key == INDEX_BACKFILL_KEY),
+    )
+
+
+def _iter_token_batches(
+    db_session: Session,
+    batch_size: int,
+    after: int | None = None,
+    *,
+    criteria: Sequence[ColumnElement[bool]] = (),
+) -> Iterator[list[RowMapping]]:
+    """
+    Yield the raw tokens of the clients in batches, ordered by client_id.
+
+    With ``after``, only the clients with a greater client_id are read; with
+    ``criteria``, only the clients matching them.
+    """
+    columns = Client.__table__.c
+    stmt = (
+        select(
+            columns.client_id,
+            columns.sealed_encr,
+            *(
+                type_coerce(columns[key], col_type.impl_instance).label(key)
+                for key, col_type in SEALED_COLUMNS.items()
+            ),
+        )
+        .where(*criteria)
+        .order_by(columns.client_id)
+        .limit(batch_size)
+    )
     while True:
-        stmt = select(Client).offset(offset).limit(batch_size)
-        batch = list(db_session.scalars(stmt))
+        page_stmt = stmt if after is None else stmt.where(columns.client_id > after)
+        batch = list(db_session.execute(page_stmt).mappings())
         if not batch:
-            break
+            return
         yield batch
-        offset += batch_size
-
-
-def _get_encrypted_field_names() -> list[str]:
-    return [
-        "first_name_encr",
-        "last_name_encr",
-        "gender_encr",
-        "birthday_encr",
-        "street_encr",
-        "city_encr",
-        "parent_encr",
-        "telephone1_encr",
-        "telephone2_encr",
-        "email_encr",
-        "notes_encr",
-        "entry_date_encr",
-        "class_name_encr",
-        "class_int_encr",
-        "estimated_graduation_date_encr",
-        "document_shredding_date_encr",
-        "keyword_taet_encr",
-        "lrst_diagnosis_encr",
-        "lrst_last_test_date_encr",
-        "lrst_last_test_by_encr",
-        "nos_rs_ausn_faecher_encr",
-        "nos_other_details_encr",
-        "nta_other_details_encr",
-        "nta_nos_notes_encr",
+        if len(batch) < batch_size:
+            return
+        after = batch[-1]["client_id"]
+
+
+def _rotation_update_statement() -> Update:
+    """An UPDATE of the tokens and blind indexes of one client, for executemany.
+
+    The bind parameters are typed as the raw storage types, so the encrypted
+    column types do not encrypt the new tokens again.
+    """
+    columns = Client.__table__.c
+    return (
+        update(Client.__table__)
+        .where(columns.client_id == bindparam("_client_id"))
+        .values(
+            {
+                key: bindparam(f"_{key}", type_=LargeBinary())
+                for key in (
+                    *SEALED_COLUMNS,
+                    "sealed_encr",
+                    *BLIND_INDEX_COLUMNS,
+                    SHREDDING_MONTH_COLUMN,
+                )
+            },
+        )
+    )
+
+
+def _decrypt_batch(batch: list[RowMapping]) -> list[dict[str, str]]:
+    """The plaintexts of the encrypted fields of a batch of raw rows."""
+    # decrypt all tokens of the batch in one call, so that a configured
+    # worker pool can share the work
+    sealed_rows = [row for row in batch if row["sealed_encr"] is not None]
+    field_tokens = [
+        row[key]
+        for row in batch
+        if row["sealed_encr"] is None
+        for key in SEALED_COLUMNS
+        if row[key]
     ]
+    unsealed = iter(encr.decrypt_many([row["sealed_encr"] for row in sealed_rows]))
+    decrypted = iter(encr.decrypt_many(field_tokens))
+
+    plaintext_rows: list[dict[str, str]] = []
+    for row in batch:
+        if row["sealed_encr"] is not None:
+            fields = json.loads(next(unsealed))
+            plaintext_rows.append({key: fields.get(key, "") for key in SEALED_COLUMNS})
+        else:
+            plaintext_rows.append(
+                {key: next(decrypted) if row[key] else "" for key in SEALED_COLUMNS},
+            )
+    return plaintext_rows
+
+
+def _index_params(plaintexts: dict[str, str]) -> dict[str, bytes]:
+    """The bind parameters of the blind indexes of a client's plaintexts."""
+    params = {
+        f"_{index_key}": encr.blind_index(plaintexts[key])
+        for index_key, key in BLIND_INDEX_COLUMNS.items()
+    }
+    params[f"_{SHREDDING_MONTH_COLUMN}"] = encr.blind_index(
+        shredding_month(
+            SEALED_COLUMNS["document_shredding_date_encr"].from_plaintext(
+                plaintexts["document_shredding_date_encr"],
+            ),
+        ),
+    )
+    return params
+
+
+def _rotate_batch(batch: list[RowMapping], seal: bool) -> list[dict[str, Any]]:
+    """The parameters of the rotation UPDATE for a batch of raw rows."""
+    plaintext_rows = _decrypt_batch(batch)
+    if seal:
+        sealed_tokens: list[bytes | None] = [
+            seal_fields(plaintexts) for plaintexts in plaintext_rows
+        ]
+        field_tokens = [b""] * (len(batch) * len(SEALED_COLUMNS))
+    else:
+        sealed_tokens = [None] * len(batch)
+        field_tokens = encr.encrypt_binary_many(
+            plaintext
+            for plaintexts in plaintext_rows
+            for plaintext in plaintexts.values()
+        )
+
+    tokens = iter(field_tokens)
+    params = []
+    for row, plaintexts, sealed_token in zip(
+        batch,
+        plaintext_rows,
+        sealed_tokens,
+        strict=True,
+    ):
+        row_params = {f"_{key}": next(tokens) for key in SEALED_COLUMNS}
+        row_params["_client_id"] = row["client_id"]
+        row_params["_sealed_encr"] = sealed_token
+        row_params.update(_index_params(plaintexts))
+        params.append(row_params)
+    return params
 
 
 def _verify_migration(db_session: Session, expected_count: int) -> None:
     try:
-        stmt = select(Client)
-        clients = list(db_session.scalars(stmt))
-
-        if len(clients) != expected_count:
+        count = db_session.scalar(select(func.count()).select_from(Client))
+        if count != expected_count:
             raise MigrationError(
-                f"Client count mismatch: expected {expected_count}, "
-                f"found {len(clients)}",
+                f"Client count mismatch: expected {expected_count}, found {count}",
             )
 
-        sample_size = min(10, len(clients))
-        for client in clients[:sample_size]:
+        # the rows were rewritten behind the ORM's back
+        db_session.expire_all()
+        stmt = select(Client).order_by(Client.client_id).limit(10)
+        for client in db_session.scalars(stmt):
             _ = client.first_name_encr
             _ = client.last_name_encr
             _ = client.birthday_encr
             _ = client.nos_rs_ausn_faecher_encr
             _ = client.nta_nos_notes_encr
 
-        logger.info(f"Verification successful: all {len(clients)} clients accessible")
+        off_primary = count_clients_off_primary_key(db_session)
+        if off_primary:
+            raise MigrationError(
+                f"{off_primary} clients still have tokens of an old key",
+            )
+
+        logger.info(
+            f"Verification successful: all {count} clients accessible "
+            "and encrypted with the primary key",
+        )
     except Exception as e:
         raise MigrationError(f"Verification failed: {e}") from e
@@ -0,0 +1,133 @@
+"""Persistent cache of the last clients overview.
+
+The rows of the overview are stored as a single encrypted token in the
+``system_metadata`` table, so loading them costs one decryption instead of
+one per row and column. Next to it, a hash of the overview arguments and of
+the state of the ``clients`` table is stored in plaintext. Every write sets
+``datetime_lastmodified`` of its row and every delete changes the row count,
+so comparing this hash is enough to find out whether the cached rows are
+still valid, without decrypting them.
+
+``PRAGMA data_version`` would be cheaper to query, but it only counts the
+changes seen by one connection and is lost when the program exits.
+"""
+
+import hashlib
+import json
+from collections.abc import Mapping, Sequence
+from datetime import date, datetime
+from typing import Any, Final
+
+from cryptography.fernet import InvalidToken
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from edupsyadmin.core.encrypt import encr
+from edupsyadmin.core.logger import logger
+from edupsyadmin.db.clients import Client, SystemMetadata
+
+# system_metadata keys of the cached rows and of their version
+CACHE_KEY: Final[str] = "overview_cache"
+VERSION_KEY: Final[str] = "overview_cache_version"
+
+# Columns whose values are stored as ISO strings -> their type
+_ISO_COLUMNS: dict[str, type[date]] = {
+    col.key: col.type.python_type
+    for col in Client.__table__.columns
+    if col.type.python_type in (date, datetime)
+}
+
+
+def data_version(session: Session, arguments: Mapping[str, Any]) -> str:
+    """Hash the overview arguments with the row count and last modification."""
+    count, last_modified = session.execute(
+        select(func.count(), func.max(Client.datetime_lastmodified)),
+    ).one()
+    payload = json.dumps(
+        [arguments, count, str(last_modified)],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load(session: Session, version: str) -> list[dict[str, Any]] | None:
+    """Return the cached rows if they were stored for ``version``."""
+    token = load_token(session, version)
+    return None if token is None else decode(token)
+
+
+def load_token(session: Session, version: str) -> str | None:
+    """Return the encrypted rows if they were stored for ``version``."""
+    stored = session.get(SystemMetadata, VERSION_KEY)
+    token = session.get(SystemMetadata, CACHE_KEY)
+    if stored is None or token is None or stored.value != version:
+        return None
+    return token.value
+
+
+def decode(token: str) -> list[dict[str, Any]] | None:
+    """Decrypt the rows of :func:`load_token`; None for an unknown key."""
+    try:
+        cached = json.loads(encr.decrypt(token))
+    except InvalidToken:
+        logger.info("the overview cache was encrypted with an unknown key")
+        return None
+    columns = cached["columns"]
+    return [
+        {
+            name: _load_value(name, value)
+            for name, value in zip(columns, row, strict=True)
+        }
+        for row in cached["rows"]
+    ]
+
+
+def store(
+    session: Session,
+    version: str,
+    columns: Sequence[str],
+    rows: Sequence[Mapping[str, Any]],
+) -> None:
+    """Replace the cached rows with ``rows``."""
+    store_token(session, version, encode(columns, rows))
+
+
+def store_token(session: Session, version: str, token: str) -> None:
+    """Replace the cached rows with the result of :func:`encode`."""
+    session.merge(SystemMetadata(key=CACHE_KEY, value=token))
+    session.merge(SystemMetadata(key=VERSION_KEY, value=version))
+
+
+def encode(columns: Sequence[str], rows: Sequence[Mapping[str, Any]]) -> str:
+    """Encrypt ``rows`` for :func:`store_token`."""
+    payload = json.dumps(
+        {
+            "columns": list(columns),
+            "rows": [
+                [_dump_value(name, row[name]) for name in columns] for row in rows
+            ],
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return encr.encrypt(payload)
+
+
+def clear(session: Session) -> None:
+    """Drop the cached rows, e.g. after clients were deleted."""
+    session.execute(
+        delete(SystemMetadata).where(SystemMetadata.key.in_([CACHE_KEY, VERSION_KEY])),
+    )
+
+
+def _dump_value(name: str, value: Any) -> Any:
+    if name in _ISO_COLUMNS and value is not None:
+        return value.isoformat()
+    return value
+
+
+def _load_value(name: str, value: Any) -> Any:
+    if name in _ISO_COLUMNS and value is not None:
+        return _ISO_COLUMNS[name].fromisoformat(value)
+    return value
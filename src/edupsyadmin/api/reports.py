@@ -28,6 +28,14 @@ from reportlab.platypus import (
 
 ResultsItem = str | tuple[str, str]
 
+# client fields used by the test reports; only these are fetched and decrypted
+REPORT_CLIENT_COLUMNS = [
+    "first_name_encr",
+    "last_name_encr",
+    "birthday_encr",
+    "class_int_encr",
+]
+
 # Register bundled fonts for consistent cross-platform rendering
 _REGULAR_FONT = files("edupsyadmin.data").joinpath("LiberationSans-Regular.ttf")
 _BOLD_FONT = files("edupsyadmin.data").joinpath("LiberationSans-Bold.ttf")
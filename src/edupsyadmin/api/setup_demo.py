@@ -15,6 +15,7 @@ from edupsyadmin.core.encrypt import (
     set_keys_in_keyring,
 )
 from edupsyadmin.core.logger import logger
+from edupsyadmin.db.engine import dispose_engines
 from edupsyadmin.utils.path_utils import normalize_path
 
 
@@ -28,6 +29,7 @@ def setup_demo() -> None:
     demo_app_uid = "liebermann-schulpsychologie.github.io.demo"
 
     # remove old demo files to have a clean slate
+    dispose_engines(demo_db_url)
     demo_db_path.unlink(missing_ok=True)
     demo_salt_path.unlink(missing_ok=True)
 
@@ -117,8 +119,7 @@ def setup_demo() -> None:
         },
     ]
 
-    for client_data in sample_clients:
-        clients_manager.add_client(**client_data)
+    clients_manager.add_clients(sample_clients, strict=True)
 
     logger.info("Demo environment created successfully!")
     print("\nThe following files have been created in your current directory:")
@@ -64,6 +64,17 @@ class ClientRecord(BaseModel):
     min_sessions: int = 45
     n_sessions: int = 1
     case_active: bool = True
+    # storage detail of envelope encryption; never exported
+    sealed_encr: bytes | None = Field(default=None, exclude=True, repr=False)
+    # blind indexes for the search by name; never exported
+    first_name_bidx: bytes | None = Field(default=None, exclude=True, repr=False)
+    last_name_bidx: bytes | None = Field(default=None, exclude=True, repr=False)
+    birthday_bidx: bytes | None = Field(default=None, exclude=True, repr=False)
+    document_shredding_month_bidx: bytes | None = Field(
+        default=None,
+        exclude=True,
+        repr=False,
+    )
 
 
 class FillFormResult(TypedDict, total=True):
@@ -72,3 +83,10 @@ class FillFormResult(TypedDict, total=True):
     client_id: int
     success: bool
     error: Exception | None
+
+
+class AddClientResult(TypedDict, total=True):
+    """Result of adding a single client with ``ClientsManager.add_clients``."""
+
+    client_id: int | None
+    error: Exception | None
@@ -1,10 +1,11 @@
 import argparse
 import importlib
 import importlib.resources
+import json
 import shutil
 from argparse import ArgumentParser, RawDescriptionHelpFormatter
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from edupsyadmin.__version__ import __version__
 from edupsyadmin.api.exceptions import ClientNotFoundError, MigrationError
@@ -20,6 +21,9 @@ from edupsyadmin.core.paths import (
     DEFAULT_SALT_PATH,
 )
 
+if TYPE_CHECKING:
+    from edupsyadmin.db.profiling import DbProfile
+
 __all__ = ("main",)
 
 
@@ -125,6 +129,19 @@ def _args(argv: list[str] | None) -> argparse.Namespace:
         help=argparse.SUPPRESS,
     )
 
+    parser.add_argument(
+        "--profile-db",
+        action="store_true",
+        help="print the number and duration of the database statements at exit",
+    )
+    parser.add_argument(
+        "--profile-db-json",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help="write the database profile as JSON to PATH (implies --profile-db)",
+    )
+
     parser.set_defaults(command=None)
     subparsers = parser.add_subparsers(title="subcommands", dest="command_name")
     _setup_subparsers(subparsers)
@@ -223,6 +240,12 @@ def _run_db_migrations(args: argparse.Namespace) -> int:
     """Run database migrations if the command requires database access."""
     no_db_commands = ["info", "flatten-pdfs"]
     if args.command_name not in no_db_commands:
+        # only load alembic if the database needs a migration
+        from edupsyadmin.db.revision import is_up_to_date
+
+        if is_up_to_date(args.database_url):
+            logger.info("Database is up to date.")
+            return 0
         try:
             upgrade_db = lazy_import("edupsyadmin.api.migration").upgrade_db
             upgrade_db(args.database_url, salt_path=args.salt_path)
@@ -232,6 +255,23 @@ def _run_db_migrations(args: argparse.Namespace) -> int:
     return 0
 
 
+def _complete_index_backfill(args: argparse.Namespace) -> int:
+    """Compute the blind indexes that a migration without the keys left empty."""
+    if not encr.is_initialized:
+        return 0
+    from edupsyadmin.db.revision import index_backfill_pending
+
+    if not index_backfill_pending(args.database_url):
+        return 0
+    try:
+        migration = lazy_import("edupsyadmin.api.migration")
+        migration.backfill_blind_indexes(args.database_url)
+    except MigrationError as err:
+        logger.critical(err)
+        return 1
+    return 0
+
+
 def _setup_app_encryption(args: argparse.Namespace) -> None:
     """Set up encryption for commands that require it."""
     no_encryption_commands = ["info", "edit-config", "setup-demo", "flatten-pdfs"]
@@ -239,39 +279,44 @@ def _setup_app_encryption(args: argparse.Namespace) -> None:
         _setup_encryption(args.app_uid, args.app_username)
 
 
-def main(argv: list[str] | None = None) -> int:
-    """Execute the application CLI.
-
-    :param argv: argument list to parse (sys.argv by default)
-    :return: exit status
-    """
-    args = _args(argv)
-
-    from edupsyadmin.utils.path_utils import normalize_path
-
-    # Migrate versioned paths to stable paths if necessary
-    if args.database_url.startswith("sqlite:///"):
-        db_path = normalize_path(args.database_url.removeprefix("sqlite:///"))
-    else:
-        db_path = Path(args.database_url)
-
-    migrate_to_stable_paths(
-        config_file=args.config_path,
-        salt_file=args.salt_path,
-        db_file=db_path,
+def _report_db_profile(args: argparse.Namespace, profile: DbProfile) -> None:
+    """Print the database profile and write it as JSON, if requested."""
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title="Database statements")
+    for column in ("statement", "count", "total (ms)", "max (ms)", "rows"):
+        table.add_column(column, justify="left" if column == "statement" else "right")
+    for kind, stats in [*sorted(profile.statements.items()), ("total", profile.total)]:
+        table.add_row(
+            kind,
+            str(stats.count),
+            f"{stats.total_seconds * 1000:.1f}",
+            f"{stats.max_seconds * 1000:.1f}",
+            str(stats.rows),
+        )
+    console = Console(stderr=True)
+    console.print(table)
+    console.print(
+        f"Decryption: {profile.decryption.calls} calls, "
+        f"{profile.decryption.total_seconds * 1000:.1f} ms",
     )
 
-    _handle_config_and_logging(args)
-
-    if (result := _determine_app_username(args)) != 0:
-        return result
-
-    _determine_app_uid(args)
+    if args.profile_db_json:
+        with args.profile_db_json.open("w", encoding="utf-8") as f:
+            json.dump(
+                {"command": args.command_name, **profile.as_dict()},
+                f,
+                indent=2,
+            )
 
-    _setup_app_encryption(args)
 
+def _execute_command(args: argparse.Namespace) -> int:
+    """Migrate the database and execute the command of ``args``."""
     if (result := _run_db_migrations(args)) != 0:
         return result
+    if (result := _complete_index_backfill(args)) != 0:
+        return result
 
     command = args.command
     logger.debug(f"Executing command: {args.command_name}")
@@ -305,3 +350,48 @@ def main(argv: list[str] | None = None) -> int:
         return 1
     logger.debug("successful completion")
     return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Execute the application CLI.
+
+    :param argv: argument list to parse (sys.argv by default)
+    :return: exit status
+    """
+    args = _args(argv)
+
+    from edupsyadmin.utils.path_utils import normalize_path
+
+    # Migrate versioned paths to stable paths if necessary
+    if args.database_url.startswith("sqlite:///"):
+        db_path = normalize_path(args.database_url.removeprefix("sqlite:///"))
+    else:
+        db_path = Path(args.database_url)
+
+    migrate_to_stable_paths(
+        config_file=args.config_path,
+        salt_file=args.salt_path,
+        db_file=db_path,
+    )
+
+    _handle_config_and_logging(args)
+
+    if (result := _determine_app_username(args)) != 0:
+        return result
+
+    _determine_app_uid(args)
+
+    _setup_app_encryption(args)
+
+    if not (args.profile_db or args.profile_db_json):
+        return _execute_command(args)
+
+    # a regular import: the encrypted column types record into the same profile
+    from edupsyadmin.db.profiling import db_profile
+
+    db_profile.enable()
+    try:
+        return _execute_command(args)
+    finally:
+        db_profile.disable()
+        _report_db_profile(args, db_profile)
@@ -21,6 +21,12 @@ COMMAND_EPILOG = textwrap.dedent(
           # Show clients from 'TutorialSchule' who have 'NTA' or 'NOS'
           edupsyadmin get-clients --nta_nos --school TutorialSchule
 
+          # Show only the clients whose case is still active
+          edupsyadmin get-clients --active_only
+
+          # Show clients whose first or last name is 'Müller'
+          edupsyadmin get-clients --name müller
+
           # Show all details for client with ID 2
           edupsyadmin get-clients --client_id 2
 
@@ -40,6 +46,11 @@ def add_arguments(parser: ArgumentParser) -> None:
         action="store_true",
         help="show only students with Nachteilsausgleich or Notenschutz",
     )
+    parser.add_argument(
+        "--active_only",
+        action="store_true",
+        help="show only clients whose case is active",
+    )
     parser.add_argument(
         "--school",
         nargs="*",
@@ -47,6 +58,14 @@ def add_arguments(parser: ArgumentParser) -> None:
         default=[],
         help="filter by school name",
     )
+    parser.add_argument(
+        "--name",
+        type=str,
+        help=(
+            "show only clients with this first or last name "
+            "(not case-sensitive; ignored with --tui)"
+        ),
+    )
     parser.add_argument("--out", help="path for an output file", type=normalize_path)
     parser.add_argument(
         "--client_id",
@@ -72,11 +91,16 @@ def execute(args: Namespace) -> None:
     logger.info(f"Database contains {total} entries.")
 
     if args.tui:
+        if args.name:
+            logger.warning("--name is ignored when the results are shown in a tui")
         clients_overview_app_cls = lazy_import(
             "edupsyadmin.tui.clients_overview_app",
         ).ClientsOverviewApp
+        async_manager_cls = lazy_import(
+            "edupsyadmin.api.async_managers",
+        ).AsyncClientsManager
         clients_overview_app_cls(
-            clients_manager=clients_manager,
+            clients_manager=async_manager_cls(database_url=args.database_url),
             nta_nos=args.nta_nos,
             schools=args.school,
             columns=args.columns,
@@ -91,11 +115,21 @@ def execute(args: Namespace) -> None:
             display_client_details(client_data)
             data_to_export = [client_data.model_dump()]
         else:
-            data = clients_manager.get_clients_overview(
-                nta_nos=args.nta_nos,
-                schools=args.school,
-                columns=args.columns,
-            )
+            if args.name:
+                data = clients_manager.find_clients(
+                    args.name,
+                    nta_nos=args.nta_nos,
+                    schools=args.school,
+                    columns=args.columns,
+                    active_only=args.active_only,
+                )
+            else:
+                data = clients_manager.get_clients_overview(
+                    nta_nos=args.nta_nos,
+                    schools=args.school,
+                    columns=args.columns,
+                    active_only=args.active_only,
+                )
             # Sort manually
             data.sort(key=lambda x: (x.get("school", ""), x.get("last_name_encr", "")))
             data_to_export = data
@@ -14,16 +14,31 @@ COMMAND_DESCRIPTION = textwrap.dedent(
     in the database so that they are all encrypted with the current primary key.
     This is a good security practice to perform after changing your password
     (which generates a new primary key).
+
+    The rows are written with the cipher suite set by the ``cipher_suite``
+    setting and in the storage mode set by the ``envelope_encryption``
+    setting, so this command also converts existing rows after one of these
+    settings was changed.
+
+    By default, all rows are re-encrypted in a single transaction: if the
+    command fails or is interrupted, the database is left unchanged. With
+    ``--checkpoint``, each batch of clients is committed together with a
+    checkpoint, so an interrupted run can be continued with ``--resume``.
+    Old keys are only offered for deletion once every row is encrypted with
+    the primary key.
     """,
 )
 COMMAND_HELP = "Re-encrypt all data with the current primary key"
 COMMAND_EPILOG = textwrap.dedent(
     """
-    Example:
+    Examples:
       edupsyadmin rotate-key
+      edupsyadmin rotate-key --checkpoint
+      edupsyadmin rotate-key --resume
 
     IMPORTANT: Make a backup of your database before running this command!
-    This operation can take a long time for large databases. Do not interrupt it.
+    This operation can take a long time for large databases. Without
+    --checkpoint, an interruption discards all progress.
 """,
 )
 
@@ -31,19 +46,37 @@ COMMAND_EPILOG = textwrap.dedent(
 def add_arguments(parser: ArgumentParser) -> None:
     """CLI adaptor for the rotate_key command."""
     parser.set_defaults(command=execute)
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help=(
+            "commit every batch of clients and record the progress, so that "
+            "an interrupted run can be resumed"
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue an interrupted run that was started with --checkpoint",
+    )
 
 
 def execute(args: Namespace) -> None:
     """Execute the data re-encryption process."""
     # The `_setup_encryption` function in cli/__init__.py has already loaded
     # all available keys into the global `encr` instance.
+    resume = args.resume
+    checkpoint = resume or args.checkpoint
 
     print("\nWARNING: Database-wide re-encryption")
     print("=" * 50)
     print("This will re-encrypt all sensitive data with your newest key.")
     print("- Make sure you have a backup of your database!")
     print("- This process can take several minutes for large databases.")
-    print("- Do NOT interrupt this process once it has started.")
+    if checkpoint:
+        print("- If it is interrupted, continue with: edupsyadmin rotate-key --resume")
+    else:
+        print("- Do NOT interrupt this process once it has started.")
     print("=" * 50)
 
     response = input("\nDo you want to continue? (yes/no): ").strip().lower()
@@ -53,15 +86,32 @@ def execute(args: Namespace) -> None:
 
     try:
         clients_manager_cls = lazy_import("edupsyadmin.api.managers").ClientsManager
-        re_encrypt_all_data = lazy_import(
-            "edupsyadmin.api.migration"
-        ).re_encrypt_all_data
+        migration = lazy_import("edupsyadmin.api.migration")
 
         clients_manager = clients_manager_cls(database_url=args.database_url)
         with clients_manager.Session() as session:
-            re_encrypt_all_data(session)
+            stats = migration.re_encrypt_all_data(
+                session,
+                checkpoint=checkpoint,
+                resume=resume,
+            )
 
         print("\nSUCCESS: All data has been re-encrypted with the primary key.")
+        if stats.rows:
+            print(
+                f"{stats.rows} clients in {stats.seconds:.2f} s "
+                f"({stats.rows_per_second:.0f} rows/s)",
+            )
+
+        # other processes may have written rows in the meantime
+        with clients_manager.Session() as session:
+            off_primary = migration.count_clients_off_primary_key(session)
+        if off_primary:
+            print(
+                f"\nWARNING: {off_primary} clients still have data encrypted "
+                "with an old key. The old keys are kept; run rotate-key again.",
+            )
+            return
 
         cleanup_response = (
             input(
@@ -91,7 +141,11 @@ def execute(args: Namespace) -> None:
     except MigrationError as e:
         logger.error(f"Re-encryption failed: {e}")
         print(f"\nERROR: {e}")
-        print("The database has been rolled back to its previous state.")
+        if checkpoint:
+            print("The batches that were completed have been kept.")
+            print("Continue with: edupsyadmin rotate-key --resume")
+        else:
+            print("The database has been rolled back to its previous state.")
         sys.exit(1)
     except Exception as e:
         logger.critical(f"An unexpected error occurred during re-encryption: {e}")
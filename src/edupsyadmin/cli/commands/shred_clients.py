@@ -0,0 +1,114 @@
+import textwrap
+from argparse import ArgumentParser, Namespace
+from datetime import date
+
+from rich.console import Console
+from rich.table import Table
+
+from edupsyadmin.cli.utils import lazy_import
+
+COMMAND_DESCRIPTION = (
+    "List the clients whose documents are due for shredding and optionally delete them"
+)
+COMMAND_HELP = "List (and delete) clients that are due for shredding"
+COMMAND_EPILOG = textwrap.dedent(
+    """\
+    Examples:
+      # List the clients whose shredding date has been reached
+      edupsyadmin shred-clients
+
+      # List the clients that will be due at the end of 2027
+      edupsyadmin shred-clients --as_of 2027-12-31
+
+      # Also check shredding dates up to 100 years back (default: 50)
+      edupsyadmin shred-clients --lookback_years 100
+
+      # Delete all clients whose shredding date has been reached
+      edupsyadmin shred-clients --delete
+
+      # Delete them without a confirmation (e.g. in scripts)
+      edupsyadmin shred-clients --delete --yes
+""",
+)
+
+
+def add_arguments(parser: ArgumentParser) -> None:
+    """CLI adaptor for the shred-clients command."""
+    parser.set_defaults(command=execute)
+    parser.add_argument(
+        "--as_of",
+        type=date.fromisoformat,
+        default=None,
+        help="reference date in the format YYYY-MM-DD (default: today)",
+    )
+    parser.add_argument(
+        "--lookback_years",
+        type=int,
+        default=None,
+        help=(
+            "how many years before the reference date shredding dates are "
+            "checked (default: 50); older dates are not found"
+        ),
+    )
+    parser.add_argument(
+        "--delete",
+        action="store_true",
+        help="delete the listed clients from the database in one transaction",
+    )
+    parser.add_argument(
+        "--yes",
+        action="store_true",
+        help="delete without asking for a confirmation",
+    )
+
+
+def execute(args: Namespace) -> None:
+    """Execute the shred-clients command."""
+    managers = lazy_import("edupsyadmin.api.managers")
+    clients_manager = managers.ClientsManager(
+        database_url=args.database_url,
+    )
+
+    lookback_years = args.lookback_years
+    if lookback_years is None:
+        lookback_years = managers.SHREDDING_LOOKBACK_YEARS
+    # shredding dates are found by month, so older ones cannot be found
+    print(
+        f"Shredding dates of the last {lookback_years} years are checked; "
+        "use --lookback_years to look further back.",
+    )
+    data = clients_manager.clients_due_for_shredding(
+        as_of=args.as_of,
+        columns=["document_shredding_date_encr"],
+        lookback_years=lookback_years,
+    )
+    if not data:
+        print("No clients are due for shredding.")
+        return
+
+    data.sort(key=lambda x: (x["document_shredding_date_encr"], x["client_id"]))
+    table = Table(title="Clients Due for Shredding")
+    cols = [c for c in data[0] if c != "case_active"]
+    for col in cols:
+        table.add_column(col, no_wrap=True)
+    for row in data:
+        table.add_row(*(str(row.get(c, "")) for c in cols))
+    Console().print(table)
+
+    if args.delete:
+        if not args.yes:
+            response = (
+                input(
+                    f"\nDo you want to permanently delete these {len(data)} "
+                    "clients? (yes/no): ",
+                )
+                .strip()
+                .lower()
+            )
+            if response not in ("yes", "y"):
+                print("No clients were deleted.")
+                return
+        deleted = clients_manager.delete_clients(
+            [row["client_id"] for row in data],
+        )
+        print(f"Deleted {deleted} clients.")
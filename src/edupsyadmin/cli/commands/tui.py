@@ -57,12 +57,14 @@ def _suppress_console_logging() -> None:
 
 def execute(args: Namespace) -> None:
     """Entry point for the TUI."""
-    clients_manager_cls = lazy_import("edupsyadmin.api.managers").ClientsManager
+    clients_manager_cls = lazy_import(
+        "edupsyadmin.api.async_managers",
+    ).AsyncClientsManager
     clients_manager = clients_manager_cls(
         database_url=args.database_url,
     )
     logger = lazy_import("edupsyadmin.core.logger").logger
-    total = clients_manager.get_total_count()
+    total = clients_manager.sync_manager.get_total_count()
     logger.info(f"Database contains {total} entries.")
 
     # Suppress console logging BEFORE creating managers or starting TUI
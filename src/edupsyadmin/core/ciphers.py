@@ -0,0 +1,159 @@
+"""Cipher suites for the ciphertext tokens of :mod:`edupsyadmin.core.encrypt`.
+
+Every suite is identified by a text token prefix and a binary version byte,
+so tokens of different suites can be stored side by side and decrypted
+without knowing which suite is configured. All suites use the same (Fernet)
+keys; the AEAD suites derive their own 256-bit key from it with HKDF.
+"""
+
+import base64
+import os
+from abc import ABC, abstractmethod
+from typing import ClassVar, Final
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+NONCE_LENGTH: Final[int] = 12
+TAG_LENGTH: Final[int] = 16
+
+
+class CipherSuite(ABC):
+    """Authenticated encryption of byte strings with a single key.
+
+    Ciphertexts are raw bytes; :mod:`edupsyadmin.core.encrypt` prepends the
+    suite tag and the key id to build a token. :meth:`decrypt` raises
+    :class:`~cryptography.fernet.InvalidToken` for every ciphertext it cannot
+    authenticate, whatever the suite.
+    """
+
+    name: ClassVar[str]
+    text_prefix: ClassVar[str]
+    binary_version: ClassVar[bytes]
+
+    @abstractmethod
+    def encrypt(self, data: bytes) -> bytes:
+        """Encrypts data and returns the raw ciphertext."""
+
+    @abstractmethod
+    def decrypt(self, ciphertext: bytes | memoryview) -> bytes:
+        """Decrypts a raw ciphertext."""
+
+    def encrypt_text(self, data: bytes) -> str:
+        """Encrypts data and returns the ciphertext as urlsafe base64."""
+        return base64.urlsafe_b64encode(self.encrypt(data)).decode("ascii")
+
+    def decrypt_text(self, ciphertext: str) -> bytes:
+        """Decrypts a ciphertext in urlsafe base64."""
+        try:
+            raw = base64.urlsafe_b64decode(ciphertext)
+        except ValueError as e:
+            raise InvalidToken from e
+        return self.decrypt(raw)
+
+
+class FernetSuite(CipherSuite):
+    """Fernet (AES-128-CBC with HMAC-SHA256), compatible with older tokens."""
+
+    name = "fernet"
+    text_prefix = "f1."
+    binary_version = b"\x01"
+
+    def __init__(self, key: bytes) -> None:
+        self._fernet = Fernet(key)
+
+    def encrypt(self, data: bytes) -> bytes:
+        return base64.urlsafe_b64decode(self._fernet.encrypt(data))
+
+    def decrypt(self, ciphertext: bytes | memoryview) -> bytes:
+        return self._fernet.decrypt(base64.urlsafe_b64encode(ciphertext))
+
+    # A Fernet token already is urlsafe base64, so the text methods skip the
+    # decoding and encoding of the generic implementation
+
+    def encrypt_text(self, data: bytes) -> str:
+        return self._fernet.encrypt(data).decode("ascii")
+
+    def decrypt_text(self, ciphertext: str) -> bytes:
+        return self._fernet.decrypt(ciphertext.encode("ascii"))
+
+
+class _AEADSuite(CipherSuite):
+    """A random 96-bit nonce followed by the AEAD ciphertext and tag."""
+
+    hkdf_info: ClassVar[bytes]
+
+    def __init__(self, key: bytes) -> None:
+        self._aead = self._create_aead(derive_subkey(key, self.hkdf_info))
+
+    @staticmethod
+    @abstractmethod
+    def _create_aead(key: bytes) -> AESGCM | ChaCha20Poly1305: ...
+
+    def encrypt(self, data: bytes) -> bytes:
+        nonce = os.urandom(NONCE_LENGTH)
+        return nonce + self._aead.encrypt(nonce, data, None)
+
+    def decrypt(self, ciphertext: bytes | memoryview) -> bytes:
+        if len(ciphertext) < NONCE_LENGTH + TAG_LENGTH:
+            raise InvalidToken
+        try:
+            return self._aead.decrypt(
+                ciphertext[:NONCE_LENGTH],
+                ciphertext[NONCE_LENGTH:],
+                None,
+            )
+        except InvalidTag as e:
+            raise InvalidToken from e
+
+
+class AESGCMSuite(_AEADSuite):
+    """AES-256-GCM."""
+
+    name = "aes-gcm"
+    text_prefix = "g1."
+    binary_version = b"\x02"
+    hkdf_info = b"edupsyadmin aes-gcm"
+
+    @staticmethod
+    def _create_aead(key: bytes) -> AESGCM:
+        return AESGCM(key)
+
+
+class ChaCha20Poly1305Suite(_AEADSuite):
+    """ChaCha20-Poly1305."""
+
+    name = "chacha20-poly1305"
+    text_prefix = "c1."
+    binary_version = b"\x03"
+    hkdf_info = b"edupsyadmin chacha20-poly1305"
+
+    @staticmethod
+    def _create_aead(key: bytes) -> ChaCha20Poly1305:
+        return ChaCha20Poly1305(key)
+
+
+DEFAULT_CIPHER_SUITE: Final[str] = FernetSuite.name
+CIPHER_SUITES: Final[dict[str, type[CipherSuite]]] = {
+    suite.name: suite for suite in (FernetSuite, AESGCMSuite, ChaCha20Poly1305Suite)
+}
+TEXT_PREFIX_LENGTH: Final[int] = 3
+SUITES_BY_TEXT_PREFIX: Final[dict[str, type[CipherSuite]]] = {
+    suite.text_prefix: suite for suite in CIPHER_SUITES.values()
+}
+SUITES_BY_BINARY_VERSION: Final[dict[bytes, type[CipherSuite]]] = {
+    suite.binary_version: suite for suite in CIPHER_SUITES.values()
+}
+
+
+def derive_subkey(key: bytes, info: bytes) -> bytes:
+    """Derives a 256-bit key for the purpose named by ``info`` from a Fernet key."""
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=info,
+    ).derive(base64.urlsafe_b64decode(key))
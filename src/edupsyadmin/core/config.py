@@ -7,14 +7,40 @@ values.
 """
 
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal
 
 import yaml
 from pydantic import BaseModel, Field
 
 from edupsyadmin.core.logger import logger
 
-__all__ = ("AppConfig", "CoreConfig", "SchoolConfig", "SchoolpsyConfig", "config")
+__all__ = (
+    "AppConfig",
+    "CoreConfig",
+    "SchoolConfig",
+    "SchoolpsyConfig",
+    "SqliteConfig",
+    "config",
+)
+
+
+# Names of the cipher suites in edupsyadmin.core.ciphers.CIPHER_SUITES; that
+# module is not imported here, as it loads the cryptography backends
+CipherSuiteName = Literal["fernet", "aes-gcm", "chacha20-poly1305"]
+
+
+class SqliteConfig(BaseModel):
+    """Pydantic model for the 'sqlite' subsection of the 'core' section.
+
+    The values are set as PRAGMAs on every new SQLite connection.
+    """
+
+    journal_mode: Literal["delete", "truncate", "persist", "memory", "wal"] = "wal"
+    synchronous: Literal["off", "normal", "full", "extra"] = "normal"
+    mmap_size: int = 256 * 1024 * 1024  # bytes; 0 disables memory mapping
+    cache_size: int = -64 * 1024  # negative: KiB, positive: pages
+    temp_store: Literal["default", "file", "memory"] = "memory"
+    busy_timeout: int = 5000  # milliseconds to wait for a locked database
 
 
 class CoreConfig(BaseModel):
@@ -25,6 +51,14 @@ class CoreConfig(BaseModel):
     app_username: str
     config: str | None = None  # This is added at runtime
     kdf_iterations: int | None = None
+    decryption_cache_entries: int = 0  # 0 disables the cache
+    decryption_cache_bytes: int = 8 * 1024 * 1024
+    decryption_workers: int = 1  # > 1 decrypts large batches in parallel
+    decryption_processes: bool = False  # use processes instead of threads
+    envelope_encryption: bool = False  # one token for all fields of a client
+    cipher_suite: CipherSuiteName = "fernet"
+    overview_cache: bool = False  # keep the last overview as one encrypted token
+    sqlite: SqliteConfig = Field(default_factory=SqliteConfig)
     template_directory: Path | None = None
     output_directory: Path | None = None
 
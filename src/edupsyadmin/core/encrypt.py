@@ -1,50 +1,425 @@
+import atexit
 import base64
+import contextlib
+import hashlib
+import hmac
 import json
 import os
+import time
+import unicodedata
+from collections.abc import Callable, Iterable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from typing import Final
 
 import keyring
-from cryptography.fernet import Fernet, MultiFernet
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from keyring.errors import PasswordDeleteError
 
+from edupsyadmin.core.ciphers import (
+    CIPHER_SUITES,
+    DEFAULT_CIPHER_SUITE,
+    SUITES_BY_BINARY_VERSION,
+    SUITES_BY_TEXT_PREFIX,
+    TEXT_PREFIX_LENGTH,
+    CipherSuite,
+    derive_subkey,
+)
 from edupsyadmin.core.logger import logger
 
 DEFAULT_KDF_ITERATIONS: Final[int] = 600000
 OLD_KDF_ITERATIONS: Final[int] = 480000  # Needed for migration
+# Calibrated iterations never go below the OWASP (2021) minimum for
+# PBKDF2-HMAC-SHA256
+KDF_MIN_ITERATIONS: Final[int] = 310000
+KDF_TARGET_SECONDS: Final[float] = 1.0
+KDF_CALIBRATION_ITERATIONS: Final[int] = 50000
+KDF_ALGORITHM: Final[str] = "pbkdf2-sha256"
+# system_metadata key of the KDF parameters for a key: "kdf:<key id>"
+KDF_METADATA_PREFIX: Final[str] = "kdf:"
+
+# All keys are stored as {"version": 1, "keys": [...]} in one keyring entry
+# with the service name "<app uid>_keys"
+KEYRING_SERVICE_SUFFIX: Final[str] = "_keys"
+KEYRING_FORMAT_VERSION: Final[int] = 1
+KEY_CACHE_SECONDS: Final[float] = 60.0
+
+KEY_ID_LENGTH: Final[int] = 8
+KEY_ID_CONTEXT: Final[bytes] = b"edupsyadmin key id"
+
+# Blind indexes: truncated HMAC-SHA256 of a normalized value, with a key
+# derived from each encryption key
+BLIND_INDEX_CONTEXT: Final[bytes] = b"edupsyadmin blind index"
+BLIND_INDEX_LENGTH: Final[int] = 16
+
+# Text tokens: the prefix of the cipher suite and the key id, followed by the
+# base64-encoded ciphertext (``f1.<key id>.<fernet token>``).
+# Binary tokens: the version byte of the cipher suite and the raw key id,
+# followed by the raw ciphertext. Untagged binary tokens are raw Fernet
+# tokens, which always start with the Fernet version byte 0x80.
+BINARY_KEY_ID_LENGTH: Final[int] = KEY_ID_LENGTH // 2
+BINARY_HEADER_LENGTH: Final[int] = 1 + BINARY_KEY_ID_LENGTH
+
+# A ciphertext token as stored in a text (str) or binary (bytes) column
+Token = str | bytes
+
+# decrypt_many only uses the worker pool for batches of at least this size
+PARALLEL_MIN_TOKENS: Final[int] = 1024
+PARALLEL_MIN_CHUNK: Final[int] = 256
 
 
 class Encryption:
-    """Handles encryption and decryption of data using MultiFernet for key rotation."""
+    """Handles encryption and decryption of data with support for key rotation.
+
+    New tokens are tagged with the cipher suite and the id of the key that
+    encrypted them (``f1.<key id>.<fernet token>``), so decryption can pick
+    the right suite and key directly instead of trying every key. New tokens
+    use the configured cipher suite (see :meth:`set_cipher_suite`); tokens of
+    all suites can always be decrypted. Untagged Fernet tokens written by
+    older versions are still decrypted by trying all keys. Binary tokens
+    (:meth:`encrypt_binary`) carry the same information without the base64
+    encoding.
+    """
 
     _fernet: MultiFernet | None = None
+    _primary: CipherSuite | None = None
+    _primary_key_id: str = ""
+    _text_prefix: str = ""
+    _binary_header: bytes = b""
+    # Cipher suite name -> key id -> cipher, and the ciphers in key order
+    _ciphers_by_key_id: dict[str, dict[str, CipherSuite]]
+    _ciphers: dict[str, list[CipherSuite]]
+    _index_keys: list[bytes]
+    _keys: list[bytes]
+
+    def __init__(self) -> None:
+        self._key_change_callbacks: list[Callable[[], None]] = []
+        self._cipher_suite = DEFAULT_CIPHER_SUITE
+        self._workers = 1
+        self._use_processes = False
+        self._executor: Executor | None = None
+
+    def on_keys_changed(self, callback: Callable[[], None]) -> None:
+        """Registers a callback that runs whenever the keys are replaced."""
+        self._key_change_callbacks.append(callback)
 
     def set_keys(self, keys: list[bytes]) -> None:
         """Initializes the MultiFernet instance with a given list of keys."""
         if not keys:
             raise ValueError("Key list cannot be empty.")
         logger.debug(f"Setting new MultiFernet with {len(keys)} key(s).")
-        self._fernet = MultiFernet([Fernet(key) for key in keys])
+        fernets = [Fernet(key) for key in keys]
+        key_ids = [key_id(key) for key in keys]
+        self._ciphers = {
+            name: [suite(key) for key in keys] for name, suite in CIPHER_SUITES.items()
+        }
+        # Reversed so that a newer key wins if two key ids ever collide
+        self._ciphers_by_key_id = {
+            name: dict(reversed(list(zip(key_ids, ciphers, strict=True))))
+            for name, ciphers in self._ciphers.items()
+        }
+        self._index_keys = [derive_subkey(key, BLIND_INDEX_CONTEXT) for key in keys]
+        self._primary_key_id = key_ids[0]
+        self._fernet = MultiFernet(fernets)
+        self._keys = list(keys)
+        self._select_primary()
+        # Process workers hold a copy of the old keys
+        self.shutdown_workers()
+        for callback in self._key_change_callbacks:
+            callback()
+
+    def set_cipher_suite(self, name: str) -> None:
+        """
+        Sets the cipher suite for new tokens.
+
+        Tokens of the other suites can still be decrypted, so existing data
+        is only converted when it is written again.
+        """
+        if name not in CIPHER_SUITES:
+            raise ValueError(
+                f"Unknown cipher suite '{name}'. "
+                f"Choose one of: {', '.join(CIPHER_SUITES)}",
+            )
+        self._cipher_suite = name
+        if self._fernet is not None:
+            self._select_primary()
+
+    def _select_primary(self) -> None:
+        suite = CIPHER_SUITES[self._cipher_suite]
+        self._primary = self._ciphers[self._cipher_suite][0]
+        self._text_prefix = f"{suite.text_prefix}{self._primary_key_id}."
+        self._binary_header = suite.binary_version + bytes.fromhex(
+            self._primary_key_id,
+        )
+
+    def set_parallelism(self, workers: int, use_processes: bool = False) -> None:
+        """
+        Sets how many workers decrypt_many may use for large batches.
+
+        With ``use_processes`` the batches are decrypted in worker processes,
+        which receive the keys once when they start. Otherwise a thread pool
+        is used.
+        """
+        workers = max(1, workers)
+        if (workers, use_processes) == (self._workers, self._use_processes):
+            return
+        self.shutdown_workers()
+        self._workers = workers
+        self._use_processes = use_processes
+
+    def shutdown_workers(self) -> None:
+        """Stops the worker pool used for parallel decryption, if any."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
 
     @property
     def is_initialized(self) -> bool:
         """Returns whether an encryption key is configured."""
         return self._fernet is not None
 
+    @property
+    def primary_key_id(self) -> str:
+        """Returns the id of the primary key (see :func:`key_id`)."""
+        if self._fernet is None:
+            raise RuntimeError("Encryption keys not set.")
+        return self._primary_key_id
+
+    def is_primary_token(self, token: Token) -> bool:
+        """
+        Returns whether a token was encrypted with the primary key.
+
+        Only the tag is checked, so nothing is decrypted. Untagged tokens of
+        older versions do not name their key and never count as primary.
+        """
+        if self._fernet is None:
+            raise RuntimeError("Encryption keys not set.")
+        if isinstance(token, bytes):
+            return (
+                token[:1] in SUITES_BY_BINARY_VERSION
+                and token[1:BINARY_HEADER_LENGTH].hex() == self._primary_key_id
+            )
+        if token[:TEXT_PREFIX_LENGTH] not in SUITES_BY_TEXT_PREFIX:
+            return False
+        kid, _, _ = token[TEXT_PREFIX_LENGTH:].partition(".")
+        return kid == self._primary_key_id
+
     def encrypt(self, data: str) -> str:
         """Encrypts a string using the primary key."""
+        if self._fernet is None or self._primary is None:
+            raise RuntimeError("Encryption keys not set.")
+        return self._text_prefix + self._primary.encrypt_text(data.encode("utf-8"))
+
+    def encrypt_binary(self, data: str) -> bytes:
+        """Encrypts a string using the primary key and returns a binary token."""
+        if self._fernet is None or self._primary is None:
+            raise RuntimeError("Encryption keys not set.")
+        return self._binary_header + self._primary.encrypt(data.encode("utf-8"))
+
+    def decrypt(self, token: Token) -> str:
+        """Decrypts a text or binary token with the key it was encrypted with."""
         if self._fernet is None:
             raise RuntimeError("Encryption keys not set.")
-        return self._fernet.encrypt(data.encode("utf-8")).decode("utf-8")
+        return self._decrypt_token(token).decode("utf-8")
+
+    def encrypt_many(self, data: Iterable[str]) -> list[str]:
+        """Encrypts several strings with the primary key in one pass."""
+        if self._fernet is None or self._primary is None:
+            raise RuntimeError("Encryption keys not set.")
+        encrypt_text = self._primary.encrypt_text
+        prefix = self._text_prefix
+        return [prefix + encrypt_text(value.encode("utf-8")) for value in data]
+
+    def encrypt_binary_many(self, data: Iterable[str]) -> list[bytes]:
+        """Encrypts several strings with the primary key to binary tokens."""
+        if self._fernet is None or self._primary is None:
+            raise RuntimeError("Encryption keys not set.")
+        encrypt = self._primary.encrypt
+        header = self._binary_header
+        return [header + encrypt(value.encode("utf-8")) for value in data]
+
+    def blind_index(self, value: str) -> bytes:
+        """
+        Returns a keyed hash of a value for equality search with the primary key.
 
-    def decrypt(self, token: str) -> str:
-        """Decrypts a token string, trying all available keys."""
+        The value is normalized first (see :func:`normalize_index_value`).
+        """
         if self._fernet is None:
             raise RuntimeError("Encryption keys not set.")
-        token_bytes = token.encode("utf-8")
-        return self._fernet.decrypt(token_bytes).decode("utf-8")
+        return _blind_index(self._index_keys[0], value)
+
+    def blind_indexes(self, value: str) -> list[bytes]:
+        """
+        Returns the blind indexes of a value for all keys.
+
+        Searching for all of them also finds rows that were indexed with an
+        older key and have not been re-encrypted yet.
+        """
+        if self._fernet is None:
+            raise RuntimeError("Encryption keys not set.")
+        return list(dict.fromkeys(_blind_index(k, value) for k in self._index_keys))
+
+    def decrypt_many(self, tokens: Iterable[Token]) -> list[str]:
+        """
+        Decrypts several text or binary tokens in one pass.
+
+        Large batches are split into chunks and decrypted on the worker pool
+        if parallelism is configured (see :meth:`set_parallelism`). The
+        result is always in the order of the input.
+        """
+        if self._fernet is None:
+            raise RuntimeError("Encryption keys not set.")
+        tokens = list(tokens)
+        if self._workers > 1 and len(tokens) >= PARALLEL_MIN_TOKENS:
+            return self._decrypt_parallel(tokens)
+        decrypt_token = self._decrypt_token
+        return [decrypt_token(token).decode("utf-8") for token in tokens]
+
+    def _decrypt_parallel(self, tokens: list[Token]) -> list[str]:
+        chunk_size = max(PARALLEL_MIN_CHUNK, -(-len(tokens) // (self._workers * 4)))
+        chunks = [
+            tokens[start : start + chunk_size]
+            for start in range(0, len(tokens), chunk_size)
+        ]
+        if self._executor is None:
+            logger.debug(
+                f"starting {self._workers} decryption "
+                f"{'processes' if self._use_processes else 'threads'}",
+            )
+            if self._use_processes:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._workers,
+                    initializer=_init_decryption_worker,
+                    initargs=(self._keys,),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._workers,
+                    thread_name_prefix="decrypt",
+                )
+        chunk_decrypt = (
+            _decrypt_chunk_in_worker if self._use_processes else self._decrypt_chunk
+        )
+        plaintexts: list[str] = []
+        for chunk_plaintexts in self._executor.map(chunk_decrypt, chunks):
+            plaintexts.extend(chunk_plaintexts)
+        return plaintexts
+
+    def _decrypt_chunk(self, tokens: list[Token]) -> list[str]:
+        decrypt_token = self._decrypt_token
+        return [decrypt_token(token).decode("utf-8") for token in tokens]
+
+    def _decrypt_token(self, token: Token) -> bytes:
+        """Decrypts a tagged or untagged token to bytes."""
+        assert self._fernet is not None
+        if isinstance(token, bytes):
+            return self._decrypt_binary(token)
+        suite = SUITES_BY_TEXT_PREFIX.get(token[:TEXT_PREFIX_LENGTH])
+        if suite is None:
+            return self._fernet.decrypt(token.encode("utf-8"))
+        kid, _, ciphertext = token[TEXT_PREFIX_LENGTH:].partition(".")
+        cipher = self._ciphers_by_key_id[suite.name].get(kid)
+        if cipher is not None:
+            try:
+                return cipher.decrypt_text(ciphertext)
+            except InvalidToken:
+                # Another key may share the id; fall back to trying all
+                pass
+        for cipher in self._ciphers[suite.name]:
+            try:
+                return cipher.decrypt_text(ciphertext)
+            except InvalidToken:
+                continue
+        raise InvalidToken
+
+    def _decrypt_binary(self, token: bytes) -> bytes:
+        assert self._fernet is not None
+        suite = SUITES_BY_BINARY_VERSION.get(token[:1])
+        if suite is None:
+            return self._fernet.decrypt(base64.urlsafe_b64encode(token))
+        ciphertext = memoryview(token)[BINARY_HEADER_LENGTH:]
+        cipher = self._ciphers_by_key_id[suite.name].get(
+            token[1:BINARY_HEADER_LENGTH].hex(),
+        )
+        if cipher is not None:
+            try:
+                return cipher.decrypt(ciphertext)
+            except InvalidToken:
+                pass
+        for cipher in self._ciphers[suite.name]:
+            try:
+                return cipher.decrypt(ciphertext)
+            except InvalidToken:
+                continue
+        raise InvalidToken
+
+
+# Encryption instance of a decryption worker process
+_worker_encryption: Encryption | None = None
+
+
+def _init_decryption_worker(keys: list[bytes]) -> None:
+    global _worker_encryption
+    _worker_encryption = Encryption()
+    _worker_encryption.set_keys(keys)
+
+
+def _decrypt_chunk_in_worker(tokens: list[Token]) -> list[str]:
+    if _worker_encryption is None:
+        raise RuntimeError("Decryption worker was not initialized.")
+    return _worker_encryption._decrypt_chunk(tokens)
+
+
+def normalize_index_value(value: str) -> str:
+    """Normalizes a value for a blind index: NFKC, case folding, single spaces."""
+    return " ".join(unicodedata.normalize("NFKC", value).casefold().split())
+
+
+def _blind_index(index_key: bytes, value: str) -> bytes:
+    digest = hmac.new(
+        index_key,
+        normalize_index_value(value).encode("utf-8"),
+        hashlib.sha256,
+    ).digest()
+    return digest[:BLIND_INDEX_LENGTH]
+
+
+def key_id(key: bytes) -> str:
+    """Returns a short, non-secret identifier for an encryption key."""
+    digest = hmac.new(key, KEY_ID_CONTEXT, hashlib.sha256).hexdigest()
+    return digest[:KEY_ID_LENGTH]
+
+
+def token_to_binary(token: str) -> bytes:
+    """
+    Converts a text token to the equivalent binary token.
+
+    This only changes the encoding, so no key is needed. Empty strings stay
+    empty.
+    """
+    if not token:
+        return b""
+    suite = SUITES_BY_TEXT_PREFIX.get(token[:TEXT_PREFIX_LENGTH])
+    if suite is not None:
+        kid, _, token = token[TEXT_PREFIX_LENGTH:].partition(".")
+        return (
+            suite.binary_version + bytes.fromhex(kid) + base64.urlsafe_b64decode(token)
+        )
+    return base64.urlsafe_b64decode(token)
+
+
+def token_from_binary(token: bytes) -> str:
+    """Converts a binary token back to the equivalent text token."""
+    if not token:
+        return ""
+    suite = SUITES_BY_BINARY_VERSION.get(token[:1])
+    if suite is not None:
+        kid = token[1:BINARY_HEADER_LENGTH].hex()
+        ciphertext = base64.urlsafe_b64encode(token[BINARY_HEADER_LENGTH:])
+        return f"{suite.text_prefix}{kid}.{ciphertext.decode('ascii')}"
+    return base64.urlsafe_b64encode(token).decode("ascii")
 
 
 def derive_key_from_password(password: str, salt: bytes, iterations: int) -> bytes:
@@ -60,6 +435,32 @@ def derive_key_from_password(password: str, salt: bytes, iterations: int) -> byt
     return base64.urlsafe_b64encode(kdf.derive(password.encode()))
 
 
+def calibrate_kdf_iterations(
+    target_seconds: float = KDF_TARGET_SECONDS,
+    min_iterations: int = KDF_MIN_ITERATIONS,
+    rounds: int = 3,
+) -> int:
+    """
+    Measures PBKDF2 on this machine and returns the number of iterations
+    that takes about ``target_seconds``, but at least ``min_iterations``.
+
+    The result is rounded down to a multiple of 10000.
+    """
+    salt = os.urandom(16)
+    elapsed = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        derive_key_from_password("calibration", salt, KDF_CALIBRATION_ITERATIONS)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    iterations = int(KDF_CALIBRATION_ITERATIONS * target_seconds / elapsed)
+    iterations = max(min_iterations, iterations // 10000 * 10000)
+    logger.debug(
+        f"Calibrated key derivation: {iterations} iterations "
+        f"for a target of {target_seconds} s.",
+    )
+    return iterations
+
+
 def check_key_validity(key: bytes | None) -> bool:
     """Checks if a given key is a valid Fernet key."""
     if key is None:
@@ -102,39 +503,93 @@ def _get_legacy_keys(uid: str, username: str) -> list[bytes]:
     return [key_data.encode("utf-8")]
 
 
-def get_keys_from_keyring(uid: str, username: str) -> list[bytes]:
+# (app uid, username) -> (expiry time, keys) of get_keys_from_keyring
+_key_cache: dict[tuple[str, str], tuple[float, list[bytes]]] = {}
+
+
+def _get_indexed_keys(uid: str, username: str) -> list[bytes] | None:
     """
-    Retrieves a list of base64-encoded encryption keys from the keyring.
+    Retrieves the keys stored as one keyring entry per key plus a count.
 
-    This functions supports versioned keys (new format) and falls back to
-    legacy formats (JSON list or single string) if versioned keys are not found.
+    Returns None if there are no keys in this format.
     """
+    count_str = keyring.get_password(f"{uid}_key_count", username)
+    if not count_str:
+        return None
+    keys = []
+    for idx in range(int(count_str)):
+        key_str = keyring.get_password(f"{uid}_key_{idx}", username)
+        if key_str:
+            keys.append(key_str.encode("utf-8"))
+    return keys
+
+
+def _delete_indexed_keys(uid: str, username: str) -> None:
+    """Deletes the keys stored as one keyring entry per key, if any."""
     try:
         count_str = keyring.get_password(f"{uid}_key_count", username)
         if not count_str:
-            # Fallback to legacy format
-            return _get_legacy_keys(uid, username)
+            return
+        for idx in range(int(count_str)):
+            with contextlib.suppress(PasswordDeleteError):
+                keyring.delete_password(f"{uid}_key_{idx}", username)
+        # The count goes last, so an interrupted cleanup is retried next time
+        keyring.delete_password(f"{uid}_key_count", username)
+        logger.debug(f"Deleted {count_str} key(s) stored in the indexed format.")
+    except Exception as e:
+        # Non-critical: the keys in the current format are already stored
+        logger.warning(f"Error during cleanup of old keys: {e}")
+
+
+def clear_key_cache() -> None:
+    """Forgets all keys cached by :func:`get_keys_from_keyring`."""
+    _key_cache.clear()
 
-        count = int(count_str)
-        keys = []
-        for idx in range(count):
-            key_str = keyring.get_password(f"{uid}_key_{idx}", username)
-            if key_str:
-                keys.append(key_str.encode("utf-8"))
 
-        return keys
+def get_keys_from_keyring(uid: str, username: str) -> list[bytes]:
+    """
+    Retrieves a list of base64-encoded encryption keys from the keyring.
+
+    All keys are stored in one versioned keyring entry, so this needs a single
+    keyring call; the result is cached for ``KEY_CACHE_SECONDS``. Keys in the
+    indexed format (a count plus one entry per key) are migrated to the
+    current format. The legacy formats (JSON list or single string) are
+    still read.
+    """
+    cached = _key_cache.get((uid, username))
+    if cached is not None and cached[0] > time.monotonic():
+        return list(cached[1])
+    try:
+        data = keyring.get_password(f"{uid}{KEYRING_SERVICE_SUFFIX}", username)
+        if data:
+            entry = json.loads(data)
+            if entry.get("version") != KEYRING_FORMAT_VERSION:
+                raise ValueError(f"Unknown keyring format: {entry.get('version')}")
+            keys = [key.encode("utf-8") for key in entry["keys"]]
+        else:
+            indexed_keys = _get_indexed_keys(uid, username)
+            if indexed_keys is None:
+                # Fallback to legacy format
+                return _get_legacy_keys(uid, username)
+            keys = indexed_keys
+            if keys:
+                logger.info("Migrating the encryption keys to a single entry.")
+                set_keys_in_keyring(uid, username, keys)
     except Exception as e:
         logger.error(f"Error retrieving keys: {e}")
         return []
+    _key_cache[(uid, username)] = (time.monotonic() + KEY_CACHE_SECONDS, keys)
+    return list(keys)
 
 
 def set_keys_in_keyring(uid: str, username: str, keys: list[bytes]) -> None:
     """
     Stores a list of base64-encoded encryption keys in the keyring.
 
-    Keys are stored with version numbers for better reliability.
-    Legacy keys are no longer removed to avoid issues where keyring backends
-    might partially match service names.
+    All keys are stored in a single, versioned keyring entry. Keys stored in
+    the older indexed format are removed afterwards. Legacy keys are no
+    longer removed to avoid issues where keyring backends might partially
+    match service names.
 
     :param uid: Application unique identifier
     :param username: Username for keyring storage
@@ -144,37 +599,17 @@ def set_keys_in_keyring(uid: str, username: str, keys: list[bytes]) -> None:
 
     # 1. Store new keys FIRST (before any deletion)
     # This ensures we never have a state with no keys at all
-    keyring.set_password(f"{uid}_key_count", username, str(len(keys)))
-
-    for idx, key in enumerate(keys):
-        keyring.set_password(f"{uid}_key_{idx}", username, key.decode("utf-8"))
-
+    entry = {
+        "version": KEYRING_FORMAT_VERSION,
+        "keys": [key.decode("utf-8") for key in keys],
+    }
+    keyring.set_password(f"{uid}{KEYRING_SERVICE_SUFFIX}", username, json.dumps(entry))
+    _key_cache[(uid, username)] = (time.monotonic() + KEY_CACHE_SECONDS, list(keys))
     logger.debug(f"Successfully stored {len(keys)} new key(s).")
 
-    # 2. Clean up old versioned keys (if we are reducing the number of keys)
+    # 2. Clean up keys in the indexed format
     # This happens AFTER new keys are safely stored
-    try:
-        # Try to find if there are any keys beyond our current count
-        # We'll try up to a reasonable maximum (e.g., 10 keys)
-        max_keys_to_check = 10
-        for idx in range(len(keys), max_keys_to_check):
-            try:
-                old_key = keyring.get_password(f"{uid}_key_{idx}", username)
-                if old_key:
-                    keyring.delete_password(f"{uid}_key_{idx}", username)
-                    logger.debug(f"Deleted orphaned key at index {idx}")
-                else:
-                    # No more keys found, we can stop
-                    break
-            except Exception as e:
-                logger.debug(f"No key found at index {idx} or error deleting: {e}")
-                # Continue trying to clean up remaining keys
-                continue
-
-    except Exception as e:
-        # Non-critical: cleanup failure shouldn't break the operation
-        # since new keys are already stored
-        logger.warning(f"Error during cleanup of old keys: {e}")
+    _delete_indexed_keys(uid, username)
 
 
 def load_or_create_salt(salt_path: Path) -> bytes:
@@ -192,10 +627,11 @@ def load_or_create_salt(salt_path: Path) -> bytes:
 
 def get_salt_from_db(database_url: str) -> bytes:
     """Fetches the salt from the database metadata table."""
-    from sqlalchemy import create_engine, text
+    from sqlalchemy import text
+
+    from edupsyadmin.db.engine import get_engine
 
-    engine = create_engine(database_url)
-    with engine.connect() as conn:
+    with get_engine(database_url).connect() as conn:
         try:
             result = conn.execute(
                 text("SELECT value FROM system_metadata WHERE key = 'salt'"),
@@ -211,8 +647,91 @@ def get_salt_from_db(database_url: str) -> bytes:
     )
 
 
+def get_kdf_iterations_from_db(database_url: str, kid: str) -> int:
+    """
+    Fetches the PBKDF2 iterations the key with id ``kid`` was derived with.
+
+    Keys derived before the parameters were stored used
+    ``DEFAULT_KDF_ITERATIONS``.
+    """
+    from sqlalchemy import text
+
+    from edupsyadmin.db.engine import get_engine
+
+    with get_engine(database_url).connect() as conn:
+        value = conn.execute(
+            text("SELECT value FROM system_metadata WHERE key = :key"),
+            {"key": f"{KDF_METADATA_PREFIX}{kid}"},
+        ).scalar_one_or_none()
+    if value is None:
+        return DEFAULT_KDF_ITERATIONS
+    parameters = json.loads(value)
+    if parameters.get("algorithm") != KDF_ALGORITHM:
+        raise ValueError(
+            f"Unsupported key derivation algorithm: {parameters.get('algorithm')}",
+        )
+    return int(parameters["iterations"])
+
+
+def set_kdf_iterations_in_db(database_url: str, kid: str, iterations: int) -> None:
+    """Stores the PBKDF2 iterations of a key next to the salt in the database."""
+    from sqlalchemy import text
+
+    from edupsyadmin.db.engine import get_engine
+
+    value = json.dumps({"algorithm": KDF_ALGORITHM, "iterations": iterations})
+    with get_engine(database_url).begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO system_metadata (key, value) VALUES (:key, :value) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            ),
+            {"key": f"{KDF_METADATA_PREFIX}{kid}", "value": value},
+        )
+
+
+def rederive_stored_key(
+    password: str,
+    salt: bytes,
+    database_url: str,
+    skip: Iterable[str] = (),
+) -> bytes | None:
+    """
+    Re-derives a key that was derived from ``password`` before, if any.
+
+    For every key with stored parameters (see :func:`set_kdf_iterations_in_db`)
+    except those whose id is in ``skip``, the password is derived with the
+    stored iterations of that key; if the result has the id of the key, it is
+    that key. This recovers a key after the keyring was lost, even though new
+    keys get calibrated iterations. Returns None if no stored key matches.
+    """
+    from sqlalchemy import text
+
+    from edupsyadmin.db.engine import get_engine
+
+    with get_engine(database_url).connect() as conn:
+        stored_keys = conn.execute(
+            text("SELECT key FROM system_metadata WHERE key LIKE :prefix"),
+            {"prefix": f"{KDF_METADATA_PREFIX}%"},
+        ).scalars()
+        kids = {key.removeprefix(KDF_METADATA_PREFIX) for key in stored_keys}
+    kids -= set(skip)
+
+    # kid -> iterations, derived once per distinct number of iterations
+    iterations_by_kid = {
+        kid: get_kdf_iterations_from_db(database_url, kid) for kid in sorted(kids)
+    }
+    for iterations in dict.fromkeys(iterations_by_kid.values()):
+        key = derive_key_from_password(password, salt, iterations)
+        if iterations_by_kid.get(key_id(key)) == iterations:
+            logger.debug(f"Re-derived the stored key {key_id(key)}.")
+            return key
+    return None
+
+
 # global encryption instance
 encr = Encryption()
+atexit.register(encr.shutdown_workers)
 
 
 def delete_legacy_key_from_keyring(uid: str, username: str) -> None:
@@ -223,6 +742,7 @@ def delete_legacy_key_from_keyring(uid: str, username: str) -> None:
     It should be used with caution.
     """
     logger.debug(f"Attempting to delete legacy key for '{username}' with uid '{uid}'.")
+    clear_key_cache()
     try:
         keyring.delete_password(uid, username)
         logger.info(f"Successfully deleted legacy key for '{username}'.")
@@ -1,19 +1,44 @@
+from collections.abc import Collection, Mapping
 from datetime import date, datetime
+from typing import Any
 
 from sqlalchemy import (
     Boolean,
+    ColumnElement,
     DateTime,
     Integer,
+    LargeBinary,
     String,
     event,
+    func,
+    inspect,
+    literal,
+    or_,
+    select,
 )
-from sqlalchemy.orm import Mapped, mapped_column, validates
+from sqlalchemy.orm import (
+    Mapped,
+    Session,
+    defer,
+    mapped_column,
+    validates,
+)
+from sqlalchemy.orm.attributes import flag_modified, set_committed_value
 
 from edupsyadmin.core.config import config
+from edupsyadmin.core.encrypt import encr
 from edupsyadmin.core.enums import Gender, LrstDiagnosis, LrstTesterType
 from edupsyadmin.core.logger import logger
 from edupsyadmin.db import Base
-from edupsyadmin.db.column_types import EncryptedDate, EncryptedInteger, EncryptedString
+from edupsyadmin.db.column_types import (
+    SEALED,
+    EncryptedBinaryDate,
+    EncryptedBinaryInteger,
+    EncryptedBinaryString,
+    EncryptedType,
+    seal_fields,
+    unseal_fields,
+)
 from edupsyadmin.db.converters import to_bool_or_none, to_date_or_none, to_int_or_none
 from edupsyadmin.utils.academic_year import (
     get_date_destroy_records,
@@ -26,6 +51,50 @@ LRST_DIAG: frozenset[LrstDiagnosis] = frozenset(LrstDiagnosis)
 LRST_TEST_BY: frozenset[LrstTesterType] = frozenset(LrstTesterType)
 
 
+# Attributes that the groups of derived fields of Client depend on. The
+# derived fields themselves are included, so they cannot be changed on their own.
+DATE_INPUTS: frozenset[str] = frozenset(
+    {
+        "class_name_encr",
+        "class_int_override",
+        "class_int_encr",
+        "school",
+        "estimated_graduation_date_encr",
+        "document_shredding_date_encr",
+    },
+)
+NOS_RS_AUSN_INPUTS: frozenset[str] = frozenset(
+    {"nos_rs_ausn_faecher_encr", "nos_rs_ausn"},
+)
+NOTENSCHUTZ_INPUTS: frozenset[str] = frozenset(
+    {"nos_rs", "nos_les", "nos_other_details_encr", "nos_other", "notenschutz"},
+)
+NACHTEILSAUSGLEICH_INPUTS: frozenset[str] = frozenset(
+    {
+        "nta_zeitv_vieltext",
+        "nta_zeitv_wenigtext",
+        "nta_zeitv",
+        "nta_other_details_encr",
+        "nta_other",
+        "nta_font",
+        "nta_aufg",
+        "nta_struktur",
+        "nta_arbeitsm",
+        "nta_ersgew",
+        "nta_vorlesen",
+        "nachteilsausgleich",
+    },
+)
+NTA_NOS_END_INPUTS: frozenset[str] = frozenset({"nta_nos_end_grade", "nta_nos_end"})
+DERIVED_FIELD_INPUTS: frozenset[str] = (
+    DATE_INPUTS
+    | NOS_RS_AUSN_INPUTS
+    | NOTENSCHUTZ_INPUTS
+    | NACHTEILSAUSGLEICH_INPUTS
+    | NTA_NOS_END_INPUTS
+)
+
+
 class SystemMetadata(Base):
     """Stores unencrypted system-wide settings like the encryption salt."""
 
@@ -41,51 +110,51 @@ class Client(Base):
     # These variables cannot be optional (i.e. cannot be None) because if
     # they were, the encryption functions would raise an exception.
     first_name_encr: Mapped[str] = mapped_column(
-        EncryptedString,
+        EncryptedBinaryString,
         doc="Verschlüsselter Vorname des Klienten",
     )
     last_name_encr: Mapped[str] = mapped_column(
-        EncryptedString,
+        EncryptedBinaryString,
         doc="Verschlüsselter Nachname des Klienten",
     )
     gender_encr: Mapped[str] = mapped_column(
-        EncryptedString,
+        EncryptedBinaryString,
         doc="Verschlüsseltes Geschlecht des Klienten (m/f/x)",
     )
     birthday_encr: Mapped[date] = mapped_column(
-        EncryptedDate,
+        EncryptedBinaryDate,
         doc="Verschlüsseltes Geburtsdatum des Klienten (JJJJ-MM-TT)",
     )
     street_encr: Mapped[str] = mapped_column(
-        EncryptedString,
+        EncryptedBinaryString,
         doc="Verschlüsselte Straßenadresse und Hausnummer des Klienten",
     )
     city_encr: Mapped[str] = mapped_column(
-        EncryptedString,
+        EncryptedBinaryString,
         doc="Verschlüsselter Postleitzahl und Stadt des Klienten",
     )
     parent_encr: Mapped[str] = mapped_column(
-        EncryptedString,
+        EncryptedBinaryString,
         doc="Verschlüsselter Name des Elternteils/Erziehungsberechtigten des Klienten",
     )
     telephone1_encr: Mapped[str] = mapped_column(
-        EncryptedString,
+        EncryptedBinaryString,
         doc="Verschlüsselte primäre Telefonnummer des Klienten",
     )
     telephone2_encr: Mapped[str] = mapped_column(
-        EncryptedString,
+        EncryptedBinaryString,
         doc="Verschlüsselte sekundäre Telefonnummer des Klienten",
     )
     email_encr: Mapped[str] = mapped_column(
-        EncryptedString,
+        EncryptedBinaryString,
         doc="Verschlüsselte E-Mail-Adresse des Klienten",
     )
     notes_encr: Mapped[str] = mapped_column(
-        EncryptedString,
+        EncryptedBinaryString,
         doc="Verschlüsselte Notizen zum Klienten",
     )
     class_name_encr: Mapped[str] = mapped_column(
-        EncryptedString,
+        EncryptedBinaryString,
         nullable=False,
         doc=(
             "Verschlüsselter Klassenname des Klienten (einschließlich Buchstaben). "
@@ -94,7 +163,7 @@ class Client(Base):
         ),
     )
     class_int_encr: Mapped[int | None] = mapped_column(
-        EncryptedInteger,
+        EncryptedBinaryInteger,
         nullable=False,
         doc=(
             "Verschlüsselte numerische Darstellung der Klasse des Klienten. "
@@ -108,24 +177,24 @@ class Client(Base):
         doc="Gibt an, ob class_int_encr manuell gesetzt wurde",
     )
     keyword_taet_encr: Mapped[str] = mapped_column(
-        EncryptedString,
+        EncryptedBinaryString,
         doc="Schlüsselwort für die Kategorie des Klienten im Tätigkeitsbericht",
     )
     # I need lrst_diagnosis as a variable separate from keyword_taet_encr,
     # because LRSt can be present even if it is not the most important topic
     lrst_diagnosis_encr: Mapped[str] = mapped_column(
-        EncryptedString,
+        EncryptedBinaryString,
         doc=(
             f"Diagnose im Zusammenhang mit LRSt. Zulässig sind die Werte: "
             f"{', '.join(LRST_DIAG)}"
         ),
     )
     lrst_last_test_date_encr: Mapped[date | None] = mapped_column(
-        EncryptedDate,
+        EncryptedBinaryDate,
         doc=("Datum der letzten Testung im Zusammenhang einer Überprüfung von LRSt"),
     )
     lrst_last_test_by_encr: Mapped[str] = mapped_column(
-        EncryptedString,
+        EncryptedBinaryString,
         doc=(
             "Fachperson, von der die letzte Überprüfung von LRSt "
             "durchgeführt wurde; kann nur einer der folgenden Werte sein: "
@@ -141,18 +210,19 @@ class Client(Base):
     )
     school: Mapped[str] = mapped_column(
         String,
+        index=True,
         doc=(
             "Schule, die der Klient besucht "
             "(Kurzname wie in der Konfiguration festgelegt)"
         ),
     )
     entry_date_encr: Mapped[date | None] = mapped_column(
-        EncryptedDate,
+        EncryptedBinaryDate,
         nullable=False,
         doc="Verschlüsseltes Eintrittsdatum des Klienten in das System",
     )
     estimated_graduation_date_encr: Mapped[date | None] = mapped_column(
-        EncryptedDate,
+        EncryptedBinaryDate,
         nullable=False,
         doc=(
             "Voraussichtliches Abschlussdatum des Klienten. "
@@ -161,7 +231,7 @@ class Client(Base):
         ),
     )
     document_shredding_date_encr: Mapped[date | None] = mapped_column(
-        EncryptedDate,
+        EncryptedBinaryDate,
         nullable=False,
         doc=(
             "Datum für die Dokumentenvernichtung im Zusammenhang mit dem Klienten."
@@ -182,6 +252,7 @@ class Client(Base):
     notenschutz: Mapped[bool] = mapped_column(
         Boolean,
         default=False,
+        index=True,
         doc=(
             "Gibt an, ob der Klient Notenschutz hat. "
             "Diese Variable wird abgeleitet aus "
@@ -202,7 +273,7 @@ class Client(Base):
         ),
     )
     nos_rs_ausn_faecher_encr: Mapped[str] = mapped_column(
-        EncryptedString,
+        EncryptedBinaryString,
         nullable=False,
         doc=(
             "Verschlüsselte Fächer, die vom Notenschutz (Rechtschreibung) "
@@ -223,7 +294,7 @@ class Client(Base):
         ),
     )
     nos_other_details_encr: Mapped[str] = mapped_column(
-        EncryptedString,
+        EncryptedBinaryString,
         nullable=False,
         doc=(
             "Verschlüsselte Details zu anderen Formen des Notenschutzes "
@@ -235,6 +306,7 @@ class Client(Base):
     nachteilsausgleich: Mapped[bool] = mapped_column(
         Boolean,
         default=False,
+        index=True,
         doc=(
             "Gibt an, ob der Klient Nachteilsausgleich (NTA) hat. "
             "Diese Variable wird abgeleitet aus den Variablen zur spezifischen "
@@ -309,12 +381,12 @@ class Client(Base):
         ),
     )
     nta_other_details_encr: Mapped[str] = mapped_column(
-        EncryptedString,
+        EncryptedBinaryString,
         nullable=False,
         doc="Verschlüsselte Details zu anderen Formen des NTAs für den Klienten",
     )
     nta_nos_notes_encr: Mapped[str] = mapped_column(
-        EncryptedString,
+        EncryptedBinaryString,
         nullable=False,
         doc="Verschlüsselte Notizen zu Notenschutz and Nachteilsausgleich",
     )
@@ -350,8 +422,45 @@ class Client(Base):
     case_active: Mapped[bool] = mapped_column(
         Boolean,
         default=True,
+        index=True,
         doc="Zeigt, ob ein Fall aktiv oder abgeschlossen ist",
     )
+    sealed_encr: Mapped[bytes | None] = mapped_column(
+        LargeBinary,
+        nullable=True,
+        doc=(
+            "Alle verschlüsselten Felder des Klienten als ein einziger "
+            "verschlüsselter Block (nur wenn `envelope_encryption` in der "
+            "Konfiguration aktiviert ist)"
+        ),
+    )
+    first_name_bidx: Mapped[bytes | None] = mapped_column(
+        LargeBinary,
+        nullable=True,
+        index=True,
+        doc="Schlüsselabhängiger Hash des Vornamens für die Suche (Blind Index)",
+    )
+    last_name_bidx: Mapped[bytes | None] = mapped_column(
+        LargeBinary,
+        nullable=True,
+        index=True,
+        doc="Schlüsselabhängiger Hash des Nachnamens für die Suche (Blind Index)",
+    )
+    birthday_bidx: Mapped[bytes | None] = mapped_column(
+        LargeBinary,
+        nullable=True,
+        index=True,
+        doc=("Schlüsselabhängiger Hash des Geburtsdatums für die Suche (Blind Index)"),
+    )
+    document_shredding_month_bidx: Mapped[bytes | None] = mapped_column(
+        LargeBinary,
+        nullable=True,
+        index=True,
+        doc=(
+            "Schlüsselabhängiger Hash von Jahr und Monat des Datums für die "
+            "Dokumentenvernichtung (Blind Index)"
+        ),
+    )
 
     def __init__(
         self,
@@ -473,15 +582,44 @@ class Client(Base):
         except TypeError, ValueError:
             return None
 
-    def _recalculate_derived_fields(self) -> None:
+    def _recalculate_derived_fields(
+        self, changed: Collection[str] | None = None
+    ) -> None:
         """
-        Calculates and updates all derived fields based on current attribute values.
+        Calculates and updates the derived fields based on current attribute values.
         This method should be called after initial assignment or any attribute change.
+
+        :param changed: the attributes that were modified; only the derived fields
+            that depend on one of them are recalculated. ``None`` recalculates all.
         """
-        if not self.class_int_override:
-            self.class_int_encr = self._class_int_or_none()
 
-        # Calculate estimated_graduation_date_encr and document_shredding_date_encr
+        def affected(inputs: frozenset[str]) -> bool:
+            return changed is None or not inputs.isdisjoint(changed)
+
+        if affected(DATE_INPUTS):
+            if not self.class_int_override:
+                self.class_int_encr = self._class_int_or_none()
+            self._recalculate_dates()
+
+        # Notenschutz flags
+        if affected(NOS_RS_AUSN_INPUTS):
+            self.nos_rs_ausn = bool(
+                self.nos_rs_ausn_faecher_encr and self.nos_rs_ausn_faecher_encr.strip(),
+            )
+        if affected(NOTENSCHUTZ_INPUTS):
+            self.nos_other = bool(
+                self.nos_other_details_encr and self.nos_other_details_encr.strip(),
+            )
+            self.notenschutz = self.nos_rs or self.nos_les or self.nos_other
+
+        # Nachteilsausgleich flags
+        if affected(NACHTEILSAUSGLEICH_INPUTS):
+            self._recalculate_nachteilsausgleich()
+        if affected(NTA_NOS_END_INPUTS):
+            self.nta_nos_end = bool(self.nta_nos_end_grade is not None)
+
+    def _recalculate_dates(self) -> None:
+        """Calculate estimated_graduation_date_encr and document_shredding_date_encr."""
         self.estimated_graduation_date_encr = None
         self.document_shredding_date_encr = None
         if self.class_int_encr is not None and self.school in config.school:
@@ -502,16 +640,7 @@ class Client(Base):
                     f"document_shredding_date_encr for client {self.client_id}: {e}",
                 )
 
-        # Notenschutz flags
-        self.nos_rs_ausn = bool(
-            self.nos_rs_ausn_faecher_encr and self.nos_rs_ausn_faecher_encr.strip(),
-        )
-        self.nos_other = bool(
-            self.nos_other_details_encr and self.nos_other_details_encr.strip(),
-        )
-        self.notenschutz = self.nos_rs or self.nos_les or self.nos_other
-
-        # Nachteilsausgleich flags
+    def _recalculate_nachteilsausgleich(self) -> None:
         self.nta_zeitv = bool(
             (self.nta_zeitv_vieltext is not None and self.nta_zeitv_vieltext > 0)
             or (self.nta_zeitv_wenigtext is not None and self.nta_zeitv_wenigtext > 0),
@@ -529,7 +658,6 @@ class Client(Base):
             or self.nta_zeitv
             or self.nta_other
         )
-        self.nta_nos_end = bool(self.nta_nos_end_grade is not None)
 
     @validates("gender_encr")
     def validate_gender(self, _key, value: str) -> Gender:
@@ -650,16 +778,262 @@ class Client(Base):
         return f"<Client(id='{self.client_id}', sc='{self.school}')>"
 
 
+# Encrypted columns; with envelope encryption, their values are stored together
+# in Client.sealed_encr and the columns themselves only hold empty tokens
+SEALED_COLUMNS: dict[str, EncryptedType] = {
+    col.key: col.type
+    for col in Client.__table__.columns
+    if isinstance(col.type, EncryptedType)
+}
+
+
+# Blind index column -> encrypted column it is computed from
+BLIND_INDEX_COLUMNS: dict[str, str] = {
+    "first_name_bidx": "first_name_encr",
+    "last_name_bidx": "last_name_encr",
+    "birthday_bidx": "birthday_encr",
+}
+
+
+# Attributes that the blind indexes are computed from (and the indexes)
+BLIND_INDEX_INPUTS: frozenset[str] = frozenset(
+    {
+        *BLIND_INDEX_COLUMNS,
+        *BLIND_INDEX_COLUMNS.values(),
+        "document_shredding_month_bidx",
+        "document_shredding_date_encr",
+    },
+)
+
+
+# Plaintext columns that only feed the plaintext flags of
+# _recalculate_derived_fields; rows can be updated with these columns without
+# loading (and decrypting) them, see derived_flag_values
+SET_BASED_UPDATE_COLUMNS: frozenset[str] = frozenset(
+    {
+        "nos_rs",
+        "nos_les",
+        "nta_zeitv_vieltext",
+        "nta_zeitv_wenigtext",
+        "nta_font",
+        "nta_aufg",
+        "nta_struktur",
+        "nta_arbeitsm",
+        "nta_ersgew",
+        "nta_vorlesen",
+        "nta_nos_end_grade",
+        "min_sessions",
+        "n_sessions",
+        "case_active",
+    },
+)
+
+
+def validate_values(values: Mapping[str, Any]) -> dict[str, Any]:
+    """Convert and validate values like setting them on a Client would."""
+    probe = Client.__mapper__.class_manager.new_instance()
+    for key, value in values.items():
+        setattr(probe, key, value)
+    return {key: getattr(probe, key) for key in values}
+
+
+def derived_flag_values(values: Mapping[str, Any]) -> dict[str, ColumnElement[bool]]:
+    """
+    SQL expressions for the plaintext flags of ``_recalculate_derived_fields``
+    in an UPDATE that sets ``values``.
+
+    All expressions of an UPDATE see the old row, so the new values are used
+    as literals.
+    """
+    columns = Client.__table__.c
+
+    def value(key: str) -> ColumnElement[Any]:
+        if key in values:
+            return literal(values[key], columns[key].type)
+        return columns[key]
+
+    nta_zeitv = or_(
+        func.coalesce(value("nta_zeitv_vieltext"), 0) > 0,
+        func.coalesce(value("nta_zeitv_wenigtext"), 0) > 0,
+    )
+    return {
+        "notenschutz": or_(value("nos_rs"), value("nos_les"), value("nos_other")),
+        "nta_zeitv": nta_zeitv,
+        "nachteilsausgleich": or_(
+            value("nta_font"),
+            value("nta_aufg"),
+            value("nta_struktur"),
+            value("nta_arbeitsm"),
+            value("nta_ersgew"),
+            value("nta_vorlesen"),
+            nta_zeitv,
+            value("nta_other"),
+        ),
+        "nta_nos_end": value("nta_nos_end_grade").is_not(None),
+    }
+
+
+# Blind index of the month of the shredding date; clients that are due can be
+# narrowed down in SQL by the months up to a given date
+SHREDDING_MONTH_COLUMN = "document_shredding_month_bidx"
+
+
+def shredding_month(value: date | None) -> str:
+    """The bucket of a shredding date that gets a blind index (``YYYY-MM``)."""
+    return value.strftime("%Y-%m") if value else ""
+
+
+def _update_blind_indexes(
+    target: Client, changed: Collection[str] | None = None
+) -> None:
+    """
+    Hash the searchable fields of target with the current primary key.
+
+    With ``changed``, only the missing indexes and those of the fields in it
+    are recomputed (an index counts as a field of its own, so setting it forces
+    a recomputation).
+    """
+
+    def outdated(index_key: str, key: str) -> bool:
+        return (
+            changed is None
+            or index_key in changed
+            or key in changed
+            or getattr(target, index_key) is None
+        )
+
+    for index_key, key in BLIND_INDEX_COLUMNS.items():
+        if outdated(index_key, key):
+            plaintext = SEALED_COLUMNS[key].to_plaintext(getattr(target, key))
+            setattr(target, index_key, encr.blind_index(plaintext))
+    if outdated(SHREDDING_MONTH_COLUMN, "document_shredding_date_encr"):
+        target.document_shredding_month_bidx = encr.blind_index(
+            shredding_month(target.document_shredding_date_encr),
+        )
+
+
+def _changed_keys(target: Client, keys: Collection[str]) -> set[str]:
+    """The attributes among keys that were modified since target was loaded."""
+    attrs = inspect(target).attrs
+    return {key for key in keys if attrs[key].history.has_changes()}
+
+
+def _seal(target: Client, *, write_columns: bool = True) -> None:
+    """
+    Store all encrypted fields of target in sealed_encr for the next flush.
+
+    :param write_columns: write the empty tokens into the columns; not needed
+        if the stored row is sealed already
+    """
+    values = {key: getattr(target, key) for key in SEALED_COLUMNS}
+    target.sealed_encr = seal_fields(
+        {key: SEALED_COLUMNS[key].to_plaintext(value) for key, value in values.items()},
+    )
+    # the columns get empty tokens; receive_after_flush restores the values
+    inspect(target).info["unsealed_values"] = values
+    for key in SEALED_COLUMNS:
+        if write_columns:
+            target.__dict__[key] = SEALED
+            flag_modified(target, key)
+        else:
+            set_committed_value(target, key, SEALED)
+
+
+def _sealed_fields_changed(target: Client) -> bool:
+    attrs = inspect(target).attrs
+    return any(attrs[key].history.has_changes() for key in SEALED_COLUMNS)
+
+
+def _unseal(target: Client, keys: Collection[str] | None = None) -> None:
+    """Load the encrypted fields of target from sealed_encr, if it is set."""
+    token = target.__dict__.get("sealed_encr")
+    if token is None or (keys is not None and not keys):
+        return
+    plaintexts = unseal_fields([token])[0]
+    for key, col_type in SEALED_COLUMNS.items():
+        if keys is None or key in keys:
+            set_committed_value(
+                target,
+                key,
+                col_type.from_plaintext(plaintexts.get(key, "")),
+            )
+
+
+def load_clients_deferred(
+    session: Session,
+    *criteria: ColumnElement[bool],
+) -> list[Client]:
+    """
+    Load the clients matching ``criteria`` with deferred decryption.
+
+    The encrypted columns are deferred: an encrypted attribute is selected and
+    decrypted when it is first read, and the value then stays on the
+    instance. The fields of a row stored with envelope encryption are all
+    unsealed at the first access to one of them (see :func:`receive_refresh`).
+    Clients that are already in the session keep the values they have.
+    """
+    stmt = (
+        select(Client)
+        .options(*(defer(getattr(Client, key)) for key in SEALED_COLUMNS))
+        .where(*criteria)
+    )
+    return list(session.scalars(stmt))
+
+
 @event.listens_for(Client, "before_insert")
 def receive_before_insert(_mapper, _connection, target: Client) -> None:
     """Set timestamps and calculate derived fields on insert."""
     target.datetime_created = datetime.now()
     target.datetime_lastmodified = datetime.now()
     target._recalculate_derived_fields()
+    _update_blind_indexes(target)
+    if config.core.envelope_encryption:
+        _seal(target)
 
 
 @event.listens_for(Client, "before_update")
 def receive_before_update(_mapper, _connection, target: Client) -> None:
-    """Update timestamp and recalculate derived fields on update."""
+    """Update timestamp and recalculate the derived fields of changed attributes."""
     target.datetime_lastmodified = datetime.now()
-    target._recalculate_derived_fields()
+    target._recalculate_derived_fields(_changed_keys(target, DERIVED_FIELD_INPUTS))
+    _update_blind_indexes(target, _changed_keys(target, BLIND_INDEX_INPUTS))
+    if config.core.envelope_encryption:
+        if target.sealed_encr is None:
+            _seal(target)
+        elif _sealed_fields_changed(target):
+            _seal(target, write_columns=False)
+    elif target.sealed_encr is not None:
+        # switch the row back to one token per column; with deferred
+        # decryption, the fields have to be unsealed before
+        for key in SEALED_COLUMNS:
+            getattr(target, key)
+        target.sealed_encr = None
+        for key in SEALED_COLUMNS:
+            flag_modified(target, key)
+
+
+@event.listens_for(Client, "after_insert")
+@event.listens_for(Client, "after_update")
+def receive_after_flush(_mapper, _connection, target: Client) -> None:
+    """Restore the field values that were replaced for sealing."""
+    values = inspect(target).info.pop("unsealed_values", None)
+    if values is not None:
+        for key, value in values.items():
+            set_committed_value(target, key, value)
+
+
+@event.listens_for(Client, "load")
+def receive_load(target: Client, _context) -> None:
+    """Unseal the encrypted fields of rows stored with envelope encryption."""
+    # deferred fields are unsealed when one of them is loaded
+    _unseal(target, SEALED_COLUMNS.keys() & target.__dict__.keys())
+
+
+@event.listens_for(Client, "refresh")
+def receive_refresh(target: Client, _context, attrs) -> None:
+    """Unseal the refreshed encrypted fields and the deferred ones."""
+    if attrs is not None:
+        # the token is decrypted anyway, so the other deferred fields are
+        # set as well instead of being selected and unsealed one by one
+        attrs = {*attrs, *(key for key in SEALED_COLUMNS if key not in target.__dict__)}
+    _unseal(target, attrs)
@@ -0,0 +1,134 @@
+"""Creation of the SQLAlchemy engines for the edupsyadmin database."""
+
+import atexit
+import threading
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import Engine, create_engine, event, make_url
+
+from edupsyadmin.core.config import SqliteConfig, config
+from edupsyadmin.core.logger import logger
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Shared engines by database URL and SQLite PRAGMAs (see get_engine)
+_engines: dict[tuple[str, tuple[str, ...]], Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def _configured_sqlite() -> SqliteConfig:
+    try:
+        return config.core.sqlite
+    except RuntimeError:
+        # the configuration is not loaded, e.g. when alembic runs on its own
+        return SqliteConfig()
+
+
+def sqlite_pragmas(settings: SqliteConfig) -> list[str]:
+    """The PRAGMA statements that apply ``settings`` to a SQLite connection."""
+    return [
+        # first, so that switching the journal mode waits for other connections
+        f"PRAGMA busy_timeout = {int(settings.busy_timeout)}",
+        f"PRAGMA journal_mode = {settings.journal_mode}",
+        f"PRAGMA synchronous = {settings.synchronous}",
+        f"PRAGMA mmap_size = {int(settings.mmap_size)}",
+        f"PRAGMA cache_size = {int(settings.cache_size)}",
+        f"PRAGMA temp_store = {settings.temp_store}",
+    ]
+
+
+def create_db_engine(
+    database_url: str,
+    sqlite: SqliteConfig | None = None,
+    **kwargs: Any,
+) -> Engine:
+    """
+    Create an engine for the database at ``database_url``.
+
+    For SQLite databases, every new connection is set up with the PRAGMAs of
+    ``sqlite`` (default: ``config.core.sqlite``). Other keyword arguments are
+    passed on to :func:`sqlalchemy.create_engine`. Most callers should use
+    the shared engine of :func:`get_engine` instead.
+    """
+    engine = create_engine(database_url, **kwargs)
+    if engine.dialect.name != "sqlite":
+        return engine
+
+    _listen_sqlite_pragmas(engine, sqlite)
+    return engine
+
+
+def create_async_db_engine(
+    database_url: str,
+    sqlite: SqliteConfig | None = None,
+    **kwargs: Any,
+) -> AsyncEngine:
+    """
+    Create an asyncio engine for the database at ``database_url``.
+
+    SQLite URLs are switched to the ``aiosqlite`` driver, so ``database_url``
+    can be the same URL as for :func:`create_db_engine`; the PRAGMAs are set
+    up in the same way. An asyncio engine is bound to the event loop that
+    uses it first, so it is not shared like the engines of
+    :func:`get_engine`; dispose it when the loop ends.
+    """
+    # imported here, so that the synchronous commands do not load asyncio
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    engine = create_async_engine(url, **kwargs)
+    if engine.dialect.name == "sqlite":
+        _listen_sqlite_pragmas(engine.sync_engine, sqlite)
+    return engine
+
+
+def _listen_sqlite_pragmas(engine: Engine, sqlite: SqliteConfig | None) -> None:
+    pragmas = sqlite_pragmas(sqlite if sqlite is not None else _configured_sqlite())
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, _connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def get_engine(database_url: str) -> Engine:
+    """
+    Return the engine for ``database_url`` that is shared within the process.
+
+    The engine is created with :func:`create_db_engine` on first use. The
+    clients manager, the migrations and the metadata lookups all use it, so a
+    command opens the database file once and reuses the pooled connections.
+    If the SQLite settings in the configuration change, a new engine is
+    created for them.
+    """
+    key = (database_url, tuple(sqlite_pragmas(_configured_sqlite())))
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            logger.debug(f"creating engine for {database_url}")
+            engine = _engines[key] = create_db_engine(database_url)
+    return engine
+
+
+def dispose_engines(database_url: str | None = None) -> None:
+    """
+    Dispose the shared engines for ``database_url`` (default: all of them).
+
+    This closes their pooled connections, e.g. before the database file is
+    deleted; :func:`get_engine` creates a new engine when it is needed again.
+    """
+    with _engines_lock:
+        keys = [key for key in _engines if database_url in (None, key[0])]
+        engines = [_engines.pop(key) for key in keys]
+    for engine in engines:
+        engine.dispose()
+
+
+atexit.register(dispose_engines)
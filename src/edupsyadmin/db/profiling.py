@@ -0,0 +1,193 @@
+"""Opt-in profiling of the SQL statements and of the decryption.
+
+While :data:`db_profile` is enabled, the cursor events of all engines
+(including the migrations and the asyncio engine of the TUI) record the
+number, duration and rows of the statements, and the encrypted column types
+record the time they spend decrypting. ``edupsyadmin --profile-db`` prints
+the result when the command ends.
+"""
+
+import functools
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from sqlalchemy import Engine, event
+
+
+@dataclass
+class StatementStats:
+    """Counters of one kind of statement (SELECT, INSERT, ...)."""
+
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+
+    def add(self, seconds: float, rows: int) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.rows += rows
+
+
+@dataclass
+class DecryptionStats:
+    """Calls of and time spent in the decryption of encrypted columns."""
+
+    calls: int = 0
+    total_seconds: float = 0.0
+
+
+@dataclass
+class DbProfile:
+    """Statement and decryption counters, collected while enabled.
+
+    ``rows`` are the rows fetched by queries and the rows changed by writes
+    (as far as the driver reports them).
+    """
+
+    enabled: bool = False
+    statements: dict[str, StatementStats] = field(default_factory=dict)
+    decryption: DecryptionStats = field(default_factory=DecryptionStats)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def enable(self) -> None:
+        """Reset the counters and start recording."""
+        self.reset()
+        if not event.contains(Engine, "before_cursor_execute", _before_execute):
+            event.listen(Engine, "before_cursor_execute", _before_execute)
+            event.listen(Engine, "after_cursor_execute", _after_execute)
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop recording; the counters are kept."""
+        self.enabled = False
+        if event.contains(Engine, "before_cursor_execute", _before_execute):
+            event.remove(Engine, "before_cursor_execute", _before_execute)
+            event.remove(Engine, "after_cursor_execute", _after_execute)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.statements = {}
+            self.decryption = DecryptionStats()
+
+    def record_statement(self, statement: str, seconds: float, rows: int) -> None:
+        kind = statement.lstrip().split(None, 1)[0].upper() if statement else "OTHER"
+        with self._lock:
+            self.statements.setdefault(kind, StatementStats()).add(seconds, rows)
+
+    def record_rows(self, statement: str, rows: int) -> None:
+        """Add rows fetched after the statement was recorded."""
+        kind = statement.lstrip().split(None, 1)[0].upper() if statement else "OTHER"
+        with self._lock:
+            self.statements.setdefault(kind, StatementStats()).rows += rows
+
+    def record_decryption(self, seconds: float) -> None:
+        with self._lock:
+            self.decryption.calls += 1
+            self.decryption.total_seconds += seconds
+
+    @property
+    def total(self) -> StatementStats:
+        """The counters of all statements together."""
+        with self._lock:
+            stats = list(self.statements.values())
+        return StatementStats(
+            count=sum(s.count for s in stats),
+            total_seconds=sum(s.total_seconds for s in stats),
+            max_seconds=max((s.max_seconds for s in stats), default=0.0),
+            rows=sum(s.rows for s in stats),
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """The counters as JSON-compatible data."""
+        with self._lock:
+            statements = {kind: asdict(s) for kind, s in self.statements.items()}
+            decryption = asdict(self.decryption)
+        return {
+            "statements": statements,
+            "total": asdict(self.total),
+            "decryption": decryption,
+        }
+
+
+# global profile, enabled by ``edupsyadmin --profile-db``
+db_profile = DbProfile()
+
+
+def timed_decryption[**P, R](func: Callable[P, R]) -> Callable[P, R]:
+    """Record the time spent in ``func`` while :data:`db_profile` is enabled."""
+
+    @functools.wraps(func)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        if not db_profile.enabled:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            db_profile.record_decryption(time.perf_counter() - start)
+
+    return wrapper
+
+
+class _RowCountingCursor:
+    """DBAPI cursor proxy that counts the rows fetched from a query."""
+
+    def __init__(self, cursor: Any, statement: str) -> None:
+        self._cursor = cursor
+        self._statement = statement
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def __iter__(self) -> Any:
+        for row in self._cursor:
+            db_profile.record_rows(self._statement, 1)
+            yield row
+
+    def fetchone(self) -> Any:
+        row = self._cursor.fetchone()
+        if row is not None:
+            db_profile.record_rows(self._statement, 1)
+        return row
+
+    def fetchmany(self, *args: Any) -> list[Any]:
+        rows = self._cursor.fetchmany(*args)
+        db_profile.record_rows(self._statement, len(rows))
+        return rows
+
+    def fetchall(self) -> list[Any]:
+        rows = self._cursor.fetchall()
+        db_profile.record_rows(self._statement, len(rows))
+        return rows
+
+
+def _before_execute(
+    conn,
+    _cursor,
+    _statement,
+    _parameters,
+    _context,
+    _executemany,
+) -> None:
+    if db_profile.enabled:
+        conn.info.setdefault("profile_start", []).append(time.perf_counter())
+
+
+def _after_execute(conn, cursor, statement, _parameters, context, _executemany) -> None:
+    starts = conn.info.get("profile_start")
+    if not starts:
+        return
+    seconds = time.perf_counter() - starts.pop()
+    if cursor.description is None:
+        # writes report the changed rows, if the driver knows them
+        db_profile.record_statement(statement, seconds, max(cursor.rowcount, 0))
+        return
+    db_profile.record_statement(statement, seconds, 0)
+    if context is not None:
+        # the rows of a query are counted when the result fetches them
+        context.cursor = _RowCountingCursor(cursor, statement)
@@ -0,0 +1,88 @@
+"""The state of the database migrations, checked without alembic."""
+
+import ast
+import re
+from functools import cache
+from importlib import resources
+from typing import Final
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from edupsyadmin.db.engine import get_engine
+
+# system_metadata key that the migrations set if they could not compute the
+# blind indexes of the existing rows because the encryption keys were not
+# loaded (see edupsyadmin.api.migration.backfill_blind_indexes)
+INDEX_BACKFILL_KEY: Final[str] = "index_backfill_pending"
+
+# The module-level ``revision = ...`` and ``down_revision = ...`` assignments
+# of a migration script
+_REVISION_ASSIGNMENT = re.compile(
+    r"^(?P<name>revision|down_revision)\b[^=\n]*=\s*(?P<value>.+)$",
+    re.MULTILINE,
+)
+
+
+@cache
+def head_revision() -> str | None:
+    """
+    Return the head revision of the packaged migrations.
+
+    The revisions are read from the scripts in ``edupsyadmin/alembic/versions``
+    without loading alembic, which takes longer than the rest of the startup.
+    Returns None if the scripts do not have exactly one head.
+    """
+    revisions: set[str] = set()
+    parents: set[str] = set()
+    versions = resources.files("edupsyadmin").joinpath("alembic", "versions")
+    for script in versions.iterdir():
+        if not script.name.endswith(".py"):
+            continue
+        for match in _REVISION_ASSIGNMENT.finditer(script.read_text("utf-8")):
+            value = ast.literal_eval(match["value"])
+            if match["name"] == "revision":
+                revisions.add(value)
+            elif isinstance(value, str):
+                parents.add(value)
+            elif value is not None:  # a merge of several revisions
+                parents.update(value)
+    heads = revisions - parents
+    return heads.pop() if len(heads) == 1 else None
+
+
+def is_up_to_date(database_url: str) -> bool:
+    """
+    Check with a single query whether the database is at :func:`head_revision`.
+
+    This does not load alembic. New and legacy databases have no (or an
+    empty) ``alembic_version`` table, so they are not up to date.
+    """
+    head = head_revision()
+    if head is None:
+        return False
+    try:
+        with get_engine(database_url).connect() as connection:
+            revisions = connection.scalars(
+                text("SELECT version_num FROM alembic_version"),
+            ).all()
+    except DBAPIError:
+        return False
+    return revisions == [head]
+
+
+def index_backfill_pending(database_url: str) -> bool:
+    """
+    Check with a single query whether a migration left blind indexes empty.
+
+    See :data:`INDEX_BACKFILL_KEY`.
+    """
+    try:
+        with get_engine(database_url).connect() as connection:
+            marker = connection.scalar(
+                text("SELECT 1 FROM system_metadata WHERE key = :key"),
+                {"key": INDEX_BACKFILL_KEY},
+            )
+    except DBAPIError:
+        return False
+    return marker is not None
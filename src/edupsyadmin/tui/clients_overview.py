@@ -7,9 +7,12 @@ from textual.binding import Binding, BindingType
 from textual.message import Message
 from textual.widgets import DataTable, Static
 
-from edupsyadmin.api.managers import ClientsManager
+from edupsyadmin.api.async_managers import AsyncClientsManager
 from edupsyadmin.tui.dialogs import YesNoDialog
 
+# Fields shown in the confirmation before a client is deleted
+NAME_COLUMNS: frozenset[str] = frozenset({"first_name_encr", "last_name_encr"})
+
 
 def _format_cell(value: str | bool | float | int) -> Text | str | bool | float | int:
     """Format a cell value with colors:
@@ -80,10 +83,17 @@ class ClientsOverview(Static):
             super().__init__()
 
     class _DataLoaded(Message):
-        """Internal message to signal data is loaded."""
-
-        def __init__(self, data: list[dict[str, Any]]) -> None:
+        """Internal message to signal a page of data is loaded."""
+
+        def __init__(
+            self,
+            data: list[dict[str, Any]],
+            first: bool = True,
+            last: bool = True,
+        ) -> None:
             self.data = data
+            self.first = first
+            self.last = last
             super().__init__()
 
     class _ClientDeleted(Message):
@@ -95,7 +105,7 @@ class ClientsOverview(Static):
 
     def __init__(
         self,
-        manager: ClientsManager,
+        manager: AsyncClientsManager,
         nta_nos: bool = False,
         schools: list[str] | None = None,
         columns: list[str] | None = None,
@@ -128,21 +138,34 @@ class ClientsOverview(Static):
         self._reverse_states[sort_key] = not self._reverse_states.get(sort_key, False)
         return self._reverse_states[sort_key]
 
-    @work(exclusive=True, thread=True)
-    def get_clients_data(self) -> None:
-        """Get clients overview data."""
-        data = self.manager.get_clients_overview(
-            nta_nos=self.nta_nos,
-            schools=self.schools,
-            columns=self.columns,
-        )
-        self.post_message(self._DataLoaded(data))
+    @work(exclusive=True)
+    async def get_clients_data(self) -> None:
+        """Get clients overview data page by page.
 
-    @work(exclusive=True, thread=True)
-    def delete_client(self, client_id: int) -> None:
+        A reload starts a new worker, which cancels this one while it waits
+        for the database or for the decryption of a page.
+        """
+        pages = aiter(
+            self.manager.iter_clients_overview_pages(
+                nta_nos=self.nta_nos,
+                schools=self.schools,
+                columns=self.columns,
+            ),
+        )
+        # look ahead one page to know which one is the last
+        page = await anext(pages, [])
+        first = True
+        async for next_page in pages:
+            self.post_message(self._DataLoaded(page, first=first, last=False))
+            page = next_page
+            first = False
+        self.post_message(self._DataLoaded(page, first=first))
+
+    @work(exclusive=True)
+    async def delete_client(self, client_id: int) -> None:
         """Delete client from database."""
         try:
-            self.manager.delete_client(client_id)
+            await self.manager.delete_client(client_id)
             self.post_message(self._ClientDeleted())
         except Exception as e:
             self.post_message(self._ClientDeleted(error=e))
@@ -187,17 +210,14 @@ class ClientsOverview(Static):
 
     def on_clients_overview__data_loaded(self, message: _DataLoaded) -> None:
         table = self.query_one(DataTable)
-        table.clear()
+        if message.first:
+            table.clear()
 
-        data = message.data
-        if not data:
-            table.loading = False
-            self.notify("Tabelle neu geladen.")
+        self._add_rows_to_table(table, message.data)
+        if not message.last:
             return
 
-        self._add_rows_to_table(table, data)
-
-        if self._last_applied_sort[0]:
+        if table.row_count and self._last_applied_sort[0]:
             table.sort(
                 *self._last_applied_sort[0],
                 reverse=self._last_applied_sort[1],
@@ -227,10 +247,14 @@ class ClientsOverview(Static):
             self.notify("No client selected to delete.", severity="warning")
             return
 
-        row_data = table.get_row_at(table.cursor_row)
-        client_id_val = row_data[0]
-        last_name = row_data[2]
-        first_name = row_data[3]
+        row = dict(
+            zip(
+                (column.key.value for column in table.ordered_columns),
+                table.get_row_at(table.cursor_row),
+                strict=True,
+            ),
+        )
+        client_id_val = row.get("client_id")
 
         try:
             client_id = int(client_id_val)
@@ -238,6 +262,36 @@ class ClientsOverview(Static):
             self.notify(f"Invalid client_id: {client_id_val}", severity="error")
             return
 
+        if row.keys() >= NAME_COLUMNS:
+            self._confirm_delete_client(
+                client_id,
+                row["first_name_encr"],
+                row["last_name_encr"],
+            )
+        else:
+            self.get_name_and_confirm_delete(client_id)
+
+    @work(exclusive=True)
+    async def get_name_and_confirm_delete(self, client_id: int) -> None:
+        """Fetch the name of a client that the table does not show."""
+        try:
+            # only the two name fields are decrypted
+            name = await self.manager.get_client_fields(client_id, list(NAME_COLUMNS))
+        except Exception as e:
+            self.notify(f"Fehler beim Laden des Namens: {e}", severity="error")
+            return
+        self._confirm_delete_client(
+            client_id,
+            name["first_name_encr"],
+            name["last_name_encr"],
+        )
+
+    def _confirm_delete_client(
+        self,
+        client_id: int,
+        first_name: object,
+        last_name: object,
+    ) -> None:
         def check_delete(delete: bool | None) -> None:
             """Called with the result of the dialog."""
             if delete:
@@ -4,7 +4,7 @@ from textual.app import App, ComposeResult
 from textual.binding import Binding, BindingType
 from textual.widgets import Footer, Header
 
-from edupsyadmin.api.managers import ClientsManager
+from edupsyadmin.api.async_managers import AsyncClientsManager
 from edupsyadmin.tui.clients_overview import ClientsOverview
 
 
@@ -17,7 +17,7 @@ class ClientsOverviewApp(App):
 
     def __init__(
         self,
-        clients_manager: ClientsManager,
+        clients_manager: AsyncClientsManager,
         nta_nos: bool = False,
         schools: list[str] | None = None,
         columns: list[str] | None = None,
@@ -38,3 +38,7 @@ class ClientsOverviewApp(App):
             columns=self.columns,
         )
         yield Footer()
+
+    async def on_unmount(self) -> None:
+        # the connections of the asyncio engine belong to this event loop
+        await self.clients_manager.dispose()
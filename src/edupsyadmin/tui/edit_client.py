@@ -35,6 +35,11 @@ REQUIRED_FIELDS = [
 
 # fields which depend on other fields and should not be set by the user
 HIDDEN_FIELDS = {
+    "sealed_encr",
+    "first_name_bidx",
+    "last_name_bidx",
+    "birthday_bidx",
+    "document_shredding_month_bidx",
     "estimated_graduation_date_encr",
     "document_shredding_date_encr",
     "datetime_created",
@@ -14,11 +14,14 @@ from textual.worker import get_current_worker
 
 from edupsyadmin.core.config import config
 from edupsyadmin.core.encrypt import (
-    DEFAULT_KDF_ITERATIONS,
+    calibrate_kdf_iterations,
     check_key_validity,
     derive_key_from_password,
     get_keys_from_keyring,
     get_salt_from_db,
+    key_id,
+    rederive_stored_key,
+    set_kdf_iterations_in_db,
     set_keys_in_keyring,
 )
 from edupsyadmin.tui.dialogs import YesNoDialog
@@ -396,19 +399,32 @@ class ConfigEditorApp(App[None]):
 
         try:
             salt = get_salt_from_db(database_url)
-            iterations = (
-                int(kdf_iterations_value)
-                if kdf_iterations_value
-                else DEFAULT_KDF_ITERATIONS
+            # A password that was used before (e.g. after the keyring was
+            # lost) gives the same key again, with its stored iterations
+            new_key = rederive_stored_key(
+                password,
+                salt,
+                database_url,
+                skip=[key_id(key) for key in existing_keys],
             )
 
-            if worker.is_cancelled:
-                self.post_message(
-                    KeyDerivationResult(False, "Key generation cancelled."),
+            if new_key is None:
+                iterations = (
+                    int(kdf_iterations_value)
+                    if kdf_iterations_value
+                    else calibrate_kdf_iterations()
                 )
-                return
 
-            new_key = derive_key_from_password(password, salt, iterations)
+                if worker.is_cancelled:
+                    self.post_message(
+                        KeyDerivationResult(False, "Key generation cancelled."),
+                    )
+                    return
+
+                new_key = derive_key_from_password(password, salt, iterations)
+                # Store the parameters first, so the key can always be
+                # re-derived
+                set_kdf_iterations_in_db(database_url, key_id(new_key), iterations)
 
             if worker.is_cancelled:
                 self.post_message(
@@ -8,14 +8,14 @@ from textual.containers import Horizontal
 from textual.message import Message
 from textual.widgets import Footer, Header, LoadingIndicator
 
-from edupsyadmin.api.fill_form import batch_fill_forms
+from edupsyadmin.api.fill_form import async_batch_fill_forms
 from edupsyadmin.api.types import ClientRecord, FillFormResult
 from edupsyadmin.tui.clients_overview import ClientsOverview
 from edupsyadmin.tui.edit_client import EditClient
 from edupsyadmin.tui.fill_form_widget import FillForm, FillFormScreen
 
 if TYPE_CHECKING:
-    from edupsyadmin.api.managers import ClientsManager
+    from edupsyadmin.api.async_managers import AsyncClientsManager
 
 BUSY_MSG = "Beschäftigt. Bitte warten, bis der vorherige Vorgang abgeschlossen ist."
 
@@ -52,7 +52,7 @@ class EdupsyadminTui(App[None]):
 
     def __init__(
         self,
-        manager: ClientsManager,
+        manager: AsyncClientsManager,
         nta_nos: bool = False,
         schools: list[str] | None = None,
         columns: list[str] | None = None,
@@ -80,27 +80,37 @@ class EdupsyadminTui(App[None]):
     def on_mount(self) -> None:
         self.query_one("#main-loading-indicator", LoadingIndicator).display = False
 
-    @work(exclusive=True, thread=True)
-    def get_client_data(self, client_id: int) -> None:
+    async def on_unmount(self) -> None:
+        # the connections of the asyncio engine belong to this event loop
+        await self.manager.dispose()
+
+    @work(exclusive=True)
+    async def get_client_data(self, client_id: int) -> None:
         """Get decrypted client data and post a message with the result."""
         try:
-            data = self.manager.get_decrypted_client(client_id)
+            data = await self.manager.get_decrypted_client(client_id)
             self.post_message(self._ClientDataResult(client_id, data))
         except Exception as e:
             self.post_message(self._ClientDataResult(client_id, None, error=e))
 
-    @work(exclusive=True, thread=True)
-    def save_client_data(self, client_id: int | None, data: dict[str, Any]) -> None:
+    @work(exclusive=True)
+    async def save_client_data(
+        self,
+        client_id: int | None,
+        data: dict[str, Any],
+    ) -> None:
         """Save client data and post a message with the result."""
         try:
             saved_client_id = client_id
             if client_id is not None:
-                self.manager.edit_client(client_ids=[client_id], new_data=data)
+                await self.manager.edit_client(client_ids=[client_id], new_data=data)
             else:
-                saved_client_id = self.manager.add_client(**data)
+                saved_client_id = await self.manager.add_client(**data)
 
             if saved_client_id is not None:
-                full_client_data = self.manager.get_decrypted_client(saved_client_id)
+                full_client_data = await self.manager.get_decrypted_client(
+                    saved_client_id,
+                )
                 self.post_message(
                     self._ClientDataSaveResult(
                         client_id=saved_client_id,
@@ -113,8 +123,8 @@ class EdupsyadminTui(App[None]):
         except Exception as e:
             self.post_message(self._ClientDataSaveResult(error=e))
 
-    @work(exclusive=True, thread=True)
-    def fill_forms_worker(
+    @work(exclusive=True)
+    async def fill_forms_worker(
         self,
         client_ids: list[int],
         form_paths: list[str],
@@ -122,7 +132,7 @@ class EdupsyadminTui(App[None]):
     ) -> None:
         """Worker to fill forms."""
         try:
-            results = batch_fill_forms(
+            results = await async_batch_fill_forms(
                 self.manager,
                 client_ids,
                 form_paths,
@@ -25,7 +25,7 @@ from edupsyadmin.core.config import config
 from edupsyadmin.utils.path_utils import normalize_path
 
 if TYPE_CHECKING:
-    from edupsyadmin.api.managers import ClientsManager
+    from edupsyadmin.api.async_managers import AsyncClientsManager
 
 
 class MultiSelectDirectoryTree(DirectoryTree):
@@ -286,7 +286,7 @@ class FillFormScreen(Screen):
 
     def __init__(
         self,
-        clients_manager: ClientsManager,
+        clients_manager: AsyncClientsManager,
         client_ids: list[int],
         name: str | None = None,
         id: str | None = None,
@@ -301,12 +301,11 @@ class FillFormScreen(Screen):
         yield FillForm()
         yield Footer()
 
-    def on_mount(self) -> None:
+    async def on_mount(self) -> None:
         """Load the client data and update the FillForm widget."""
         clients_data: dict[int, ClientRecord] = {}
         for client_id in self.client_ids:
-            clients_data[client_id] = self.clients_manager.get_client_view(
-                client_id,
-            ).model_dump()
+            view = await self.clients_manager.get_client_view(client_id)
+            clients_data[client_id] = view.model_dump()
 
         self.query_one(FillForm).display_client_info(clients_data)
@@ -1,7 +1,16 @@
 import datetime
 from typing import Any
 
-from sqlalchemy import VARCHAR, Boolean, Date, DateTime, Float, Integer, String
+from sqlalchemy import (
+    VARCHAR,
+    Boolean,
+    Date,
+    DateTime,
+    Float,
+    Integer,
+    LargeBinary,
+    String,
+)
 from sqlalchemy.types import TypeDecorator, TypeEngine
 
 
@@ -30,4 +39,6 @@ def get_python_type(sqlalchemy_type: TypeEngine[Any]) -> type:
         return datetime.datetime
     if isinstance(sqlalchemy_type, Boolean):
         return bool
+    if isinstance(sqlalchemy_type, LargeBinary):
+        return bytes
     raise ValueError(f"could not match {sqlalchemy_type} to a builtin type")
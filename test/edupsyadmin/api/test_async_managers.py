@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from edupsyadmin.api import async_managers
+from edupsyadmin.api.async_managers import AsyncClientsManager
+from edupsyadmin.api.managers import INTERNAL_COLUMNS, ClientNotFoundError
+from edupsyadmin.core.config import config
+
+
+@pytest_asyncio.fixture
+async def async_clients_manager(clients_manager):
+    manager = AsyncClientsManager(clients_manager.database_url)
+    yield manager
+    await manager.dispose()
+
+
+def _add_clients(clients_manager, n: int) -> list[int]:
+    return [
+        clients_manager.add_client(
+            school="FirstSchool",
+            gender_encr="f",
+            first_name_encr=f"Name{i}",
+            last_name_encr="Async",
+            birthday_encr="2010-01-01",
+            class_name_encr="5a",
+            entry_date_encr="2020-09-01",
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_reads_match_sync_manager(
+    clients_manager, async_clients_manager, client_dict_set_by_user
+):
+    client_id = clients_manager.add_client(**client_dict_set_by_user)
+
+    # the storage details are not fetched
+    record = await async_clients_manager.get_decrypted_client(client_id)
+    assert record.model_dump(
+        exclude=INTERNAL_COLUMNS
+    ) == clients_manager.get_decrypted_client(client_id).model_dump(
+        exclude=INTERNAL_COLUMNS
+    )
+    view = await async_clients_manager.get_client_view(client_id)
+    assert view.model_dump(exclude=INTERNAL_COLUMNS) == clients_manager.get_client_view(
+        client_id
+    ).model_dump(exclude=INTERNAL_COLUMNS)
+    assert await async_clients_manager.get_client_fields(
+        client_id, ["first_name_encr", "school"]
+    ) == clients_manager.get_client_fields(client_id, ["first_name_encr", "school"])
+
+    with pytest.raises(ClientNotFoundError):
+        await async_clients_manager.get_decrypted_client(client_id + 1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("overview_cache", [False, True])
+async def test_iter_clients_overview_pages(
+    clients_manager, async_clients_manager, monkeypatch, overview_cache
+):
+    monkeypatch.setattr(async_managers, "DECRYPT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(config.core, "overview_cache", overview_cache)
+    client_ids = _add_clients(clients_manager, 7)
+    expected = clients_manager.get_clients_overview(columns="all")
+
+    pages = [
+        page
+        async for page in async_clients_manager.iter_clients_overview_pages(
+            columns="all", page_size=3
+        )
+    ]
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [row for page in pages for row in page] == expected
+
+    # a second load reads the cache, if it is enabled
+    after = [
+        row
+        async for page in async_clients_manager.iter_clients_overview_pages(
+            columns="all", after=client_ids[4]
+        )
+        for row in page
+    ]
+    assert after == expected[5:]
+
+    with pytest.raises(ValueError, match="page_size"):
+        await anext(async_clients_manager.iter_clients_overview_pages(page_size=0))
+
+
+@pytest.mark.asyncio
+async def test_cancel_load(clients_manager, async_clients_manager, monkeypatch):
+    _add_clients(clients_manager, 5)
+    monkeypatch.setattr(async_managers, "DECRYPT_CHUNK_SIZE", 1)
+    decrypt_rows = clients_manager._decrypt_rows
+    chunks = []
+
+    def slow_decrypt_rows(rows, columns):
+        chunks.append(len(rows))
+        return decrypt_rows(rows, columns)
+
+    monkeypatch.setattr(
+        async_clients_manager.sync_manager, "_decrypt_rows", slow_decrypt_rows
+    )
+
+    async def load():
+        return [
+            page async for page in async_clients_manager.iter_clients_overview_pages()
+        ]
+
+    task = asyncio.create_task(load())
+    while not chunks:
+        await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert len(chunks) < 5
+
+
+@pytest.mark.asyncio
+async def test_writes(clients_manager, async_clients_manager, client_dict_set_by_user):
+    client_id = await async_clients_manager.add_client(**client_dict_set_by_user)
+    client = clients_manager.get_decrypted_client(client_id)
+    assert client.first_name_encr == client_dict_set_by_user["first_name_encr"]
+
+    await async_clients_manager.edit_client(
+        [client_id], {"first_name_encr": "Changed", "class_name_encr": "7b"}
+    )
+    await async_clients_manager.edit_client([client_id], {"min_sessions": 30})
+    client = clients_manager.get_decrypted_client(client_id)
+    assert client.first_name_encr == "Changed"
+    assert client.class_int_encr == 7
+    assert client.min_sessions == 30
+
+    with pytest.raises(ValueError, match="Invalid keys"):
+        await async_clients_manager.edit_client([client_id], {"invalid": 1})
+
+    await async_clients_manager.delete_client(client_id)
+    with pytest.raises(ClientNotFoundError):
+        clients_manager.get_decrypted_client(client_id)
+    with pytest.raises(ClientNotFoundError):
+        await async_clients_manager.delete_client(client_id)
@@ -35,6 +35,8 @@ def test_get_all_clients_returns_decrypted_data(
         assert actual_raw_ciphertext != expected_name, (
             "The raw database value should be encrypted ciphertext"
         )
-        assert isinstance(actual_raw_ciphertext, str)
-        # Fernet tokens usually start with 'gAAAAA'
-        assert actual_raw_ciphertext.startswith("gAAAA")
+        assert isinstance(actual_raw_ciphertext, bytes)
+        # Binary tokens start with a version byte and the key id, followed by
+        # the raw Fernet token (which starts with the Fernet version 0x80)
+        assert actual_raw_ciphertext[:1] == b"\x01"
+        assert actual_raw_ciphertext[5:6] == b"\x80"
@@ -1,10 +1,15 @@
 from pathlib import Path
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pypdf
+import pytest
 
 from edupsyadmin.api.client_view import ClientView
-from edupsyadmin.api.fill_form import batch_fill_forms, fill_form
+from edupsyadmin.api.fill_form import (
+    async_batch_fill_forms,
+    batch_fill_forms,
+    fill_form,
+)
 from edupsyadmin.api.types import ClientRecord
 
 
@@ -101,3 +106,33 @@ def test_batch_fill_forms(
     for client_id in client_ids:
         output_pdf_path = tmp_path / f"{client_id}_merged.pdf"
         assert output_pdf_path.exists()
+
+
+@pytest.mark.asyncio
+async def test_async_batch_fill_forms(
+    mock_config,
+    pdf_forms: list,
+    tmp_path: Path,
+    client_dict_internal: ClientRecord,
+) -> None:
+    """A missing client fails only its own forms."""
+    clients_manager = MagicMock()
+
+    async def get_view(cid):
+        if cid == 3:
+            raise LookupError(cid)
+        data = client_dict_internal.model_copy(update={"client_id": cid})
+        return ClientView.model_validate(data)
+
+    clients_manager.get_client_view = AsyncMock(side_effect=get_view)
+
+    results = await async_batch_fill_forms(
+        clients_manager,
+        [1, 3],
+        pdf_forms,
+        out_dir=tmp_path,
+    )
+    assert [res["success"] for res in results] == [True, False]
+    assert isinstance(results[1]["error"], LookupError)
+    assert (tmp_path / "1_merged.pdf").exists()
+    assert not (tmp_path / "3_merged.pdf").exists()
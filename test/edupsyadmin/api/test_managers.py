@@ -1,11 +1,18 @@
-from datetime import date
+from datetime import date, timedelta
 from typing import Any
 
 import pytest
+from cryptography.fernet import Fernet
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import event, text
 
+from edupsyadmin.api import managers
 from edupsyadmin.api.managers import (
     ClientNotFoundError,
+    ClientsManager,
 )
+from edupsyadmin.core.config import config
+from edupsyadmin.core.encrypt import encr
 
 EXPECTED_KEYS = {
     "first_name_encr",
@@ -96,6 +103,84 @@ class TestManagers:
         client_id = clients_manager.add_client(**client_dict_with_id)
         assert client_id == 98
 
+    def test_add_clients(self, clients_manager, client_dict_set_by_user):
+        client_data = {
+            k: v for k, v in client_dict_set_by_user.items() if k != "client_id"
+        }
+        existing_id = clients_manager.add_client(**client_data)
+        rows = [
+            {**client_data, "first_name_encr": "Erika"},
+            {**client_data, "birthday_encr": ""},  # birthday is required
+            {**client_data, "client_id": existing_id},
+            {**client_data, "client_id": 500, "first_name_encr": "Max"},
+            {**client_data, "client_id": 500},  # the same id twice
+            {**client_data, "unknown_field": "x"},
+        ]
+
+        results = clients_manager.add_clients(iter(rows))
+
+        assert len(results) == len(rows)
+        added = [r["client_id"] for r in results if r["error"] is None]
+        assert added[1] == 500
+        assert [r["client_id"] is None for r in results] == [
+            False,
+            True,
+            True,
+            False,
+            True,
+            True,
+        ]
+        assert isinstance(results[1]["error"], ValueError)
+        assert "already exists" in str(results[2]["error"])
+        assert "already exists" in str(results[4]["error"])
+        assert isinstance(results[5]["error"], TypeError)
+        assert clients_manager.get_total_count() == 3
+        assert clients_manager.get_decrypted_client(added[0]).first_name_encr == (
+            "Erika"
+        )
+        assert clients_manager.get_decrypted_client(500).first_name_encr == "Max"
+        # derived fields and the blind indexes are set as with add_client
+        assert clients_manager.find_clients("Max")[0]["client_id"] == 500
+
+    def test_add_clients_strict(self, clients_manager, client_dict_set_by_user):
+        client_data = {
+            k: v for k, v in client_dict_set_by_user.items() if k != "client_id"
+        }
+        existing_id = clients_manager.add_client(**client_data)
+
+        with pytest.raises(ValueError, match="already exists"):
+            clients_manager.add_clients(
+                [client_data, {**client_data, "client_id": existing_id}],
+                strict=True,
+            )
+        with pytest.raises(ValueError, match="Geburtsdatum"):
+            clients_manager.add_clients(
+                [client_data, {**client_data, "birthday_encr": None}],
+                strict=True,
+            )
+        assert clients_manager.get_total_count() == 1
+
+    def test_add_clients_one_batch(self, clients_manager, client_dict_set_by_user):
+        client_data = {
+            k: v for k, v in client_dict_set_by_user.items() if k != "client_id"
+        }
+        statements = []
+
+        def count_statement(_conn, _cursor, statement, *_args) -> None:
+            statements.append(statement.split()[0])
+
+        event.listen(clients_manager.engine, "before_cursor_execute", count_statement)
+        try:
+            results = clients_manager.add_clients([client_data] * 30)
+        finally:
+            event.remove(
+                clients_manager.engine,
+                "before_cursor_execute",
+                count_statement,
+            )
+        assert len({r["client_id"] for r in results}) == 30
+        assert statements.count("INSERT") == 1
+
     def test_edit_client(self, clients_manager, client_dict_set_by_user):
         client_id = clients_manager.add_client(**client_dict_set_by_user)
         client = clients_manager.get_decrypted_client(client_id=client_id)
@@ -178,6 +263,73 @@ class TestManagers:
             clients_manager.get_decrypted_client(client_id)
         assert excinfo.value.client_id == client_id
 
+    def test_delete_client_does_not_decrypt(
+        self, clients_manager, client_dict_set_by_user, monkeypatch
+    ):
+        from edupsyadmin.core.encrypt import encr
+
+        client_id = clients_manager.add_client(**client_dict_set_by_user)
+
+        def fail(*args: Any) -> None:
+            raise AssertionError("delete_client should not decrypt anything")
+
+        monkeypatch.setattr(encr, "decrypt", fail)
+        monkeypatch.setattr(encr, "decrypt_many", fail)
+        clients_manager.delete_client(client_id)
+        monkeypatch.undo()
+        assert clients_manager.get_total_count() == 0
+
+    def test_edit_client_decrypts_only_read_fields(
+        self, clients_manager, client_dict_set_by_user, monkeypatch
+    ):
+        from edupsyadmin.core.encrypt import encr
+
+        client_id = clients_manager.add_client(**client_dict_set_by_user)
+        decrypted = []
+        decrypt, decrypt_many = encr.decrypt, encr.decrypt_many
+
+        def record(token):
+            decrypted.append(token)
+            return decrypt(token)
+
+        def record_many(tokens):
+            decrypted.extend(tokens)
+            return decrypt_many(tokens)
+
+        monkeypatch.setattr(encr, "decrypt", record)
+        monkeypatch.setattr(encr, "decrypt_many", record_many)
+        clients_manager.edit_client([client_id], {"notes_encr": "neue Notiz"})
+        assert decrypted == []
+        # notenschutz depends on nos_other_details_encr, which is not set
+        clients_manager.edit_client(
+            [client_id], {"notes_encr": "andere Notiz", "nos_les": True}
+        )
+        assert len(decrypted) == 1
+        monkeypatch.undo()
+
+        client = clients_manager.get_decrypted_client(client_id)
+        assert client.notes_encr == "andere Notiz"
+        assert client.notenschutz is True
+        assert client.first_name_encr == client_dict_set_by_user["first_name_encr"]
+
+    def test_get_client_fields(self, clients_manager, client_dict_set_by_user):
+        client_id = clients_manager.add_client(**client_dict_set_by_user)
+        fields = clients_manager.get_client_fields(
+            client_id, ["last_name_encr", "class_int_encr", "nta_font"]
+        )
+        assert fields == {
+            "last_name_encr": client_dict_set_by_user["last_name_encr"],
+            "class_int_encr": clients_manager.get_decrypted_client(
+                client_id
+            ).class_int_encr,
+            "nta_font": client_dict_set_by_user.get("nta_font", False),
+        }
+
+        with pytest.raises(ValueError, match="Invalid column names"):
+            clients_manager.get_client_fields(client_id, ["non_existent_column"])
+        with pytest.raises(ClientNotFoundError):
+            clients_manager.get_client_fields(999, ["last_name_encr"])
+
     def test_edit_client_with_invalid_key(
         self, clients_manager, client_dict_set_by_user
     ):
@@ -195,6 +347,93 @@ class TestManagers:
         updated_client = clients_manager.get_decrypted_client(client_id)
         assert updated_client.first_name_encr != "new_name"
 
+    def test_edit_client_set_based(
+        self, clients_manager, client_dict_set_by_user, monkeypatch
+    ):
+        client_data = client_dict_set_by_user | {"client_id": None}
+        client_ids = [clients_manager.add_client(**client_data) for _ in range(3)]
+        before = clients_manager.get_decrypted_client(client_ids[0])
+        untouched = clients_manager.get_decrypted_client(client_ids[2])
+        new_data = {
+            "nos_rs": "1",
+            "nta_font": True,
+            "nta_zeitv_wenigtext": "10",
+            "nta_nos_end_grade": 9,
+            "min_sessions": "90",
+        }
+
+        statements = []
+
+        def record(_conn, _cursor, statement, *_args) -> None:
+            statements.append(statement)
+
+        def fail(*args: Any) -> None:
+            raise AssertionError("plaintext updates should not decrypt anything")
+
+        engine = clients_manager.engine
+        event.listen(engine, "before_cursor_execute", record)
+        monkeypatch.setattr(encr, "decrypt", fail)
+        monkeypatch.setattr(encr, "decrypt_many", fail)
+        try:
+            clients_manager.edit_client([*client_ids[:2], 999], new_data)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+            monkeypatch.undo()
+
+        assert sum(s.startswith("UPDATE") for s in statements) == 1
+        for client_id in client_ids[:2]:
+            upd_cl = clients_manager.get_decrypted_client(client_id)
+            assert upd_cl.nos_rs is True
+            assert upd_cl.notenschutz is True
+            assert upd_cl.nta_font is True
+            assert upd_cl.nta_zeitv_wenigtext == 10
+            assert upd_cl.nta_zeitv is True
+            assert upd_cl.nachteilsausgleich is True
+            assert upd_cl.nta_nos_end is True
+            assert upd_cl.min_sessions == 90
+            assert upd_cl.datetime_lastmodified > before.datetime_lastmodified
+        assert clients_manager.get_decrypted_client(client_ids[2]) == untouched
+
+        # resetting the values resets the derived flags, as on the ORM path
+        clients_manager.edit_client(
+            client_ids[:1],
+            {
+                "nos_rs": False,
+                "nta_font": False,
+                "nta_zeitv_wenigtext": "",
+                "nta_nos_end_grade": None,
+            },
+        )
+        upd_cl = clients_manager.get_decrypted_client(client_ids[0])
+        assert upd_cl.notenschutz is (upd_cl.nos_les or upd_cl.nos_other)
+        assert upd_cl.nta_zeitv is ((upd_cl.nta_zeitv_vieltext or 0) > 0)
+        assert upd_cl.nachteilsausgleich is any(
+            getattr(upd_cl, key)
+            for key in (
+                "nta_aufg",
+                "nta_struktur",
+                "nta_arbeitsm",
+                "nta_ersgew",
+                "nta_vorlesen",
+                "nta_zeitv",
+                "nta_other",
+            )
+        )
+        assert upd_cl.nta_nos_end is False
+
+    def test_edit_client_set_based_invalid_value(
+        self, clients_manager, client_dict_set_by_user
+    ):
+        client_id = clients_manager.add_client(**client_dict_set_by_user)
+        before = clients_manager.get_decrypted_client(client_id)
+
+        with pytest.raises(ValueError, match="min_sessions"):
+            clients_manager.edit_client(
+                [client_id], {"nta_font": True, "min_sessions": None}
+            )
+
+        assert clients_manager.get_decrypted_client(client_id) == before
+
     def test_get_total_count(self, clients_manager, client_dict_set_by_user):
         initial_count = clients_manager.get_total_count()
         clients_manager.add_client(**client_dict_set_by_user)
@@ -277,6 +516,142 @@ class TestManagers:
         assert "birthday_encr" in data_single[0]
         assert "first_name_encr" in data_single[0]
 
+    def test_get_clients_overview_sql_window(self, clients_manager, monkeypatch):
+        client_ids = [
+            clients_manager.add_client(
+                school=school,
+                gender_encr="f",
+                first_name_encr=f"Name{i}",
+                last_name_encr="Window",
+                birthday_encr="2010-01-01",
+                class_name_encr="5a",
+                case_active=i != 2,
+            )
+            for i, school in enumerate(
+                ["SecondSchool", "FirstSchool", "SecondSchool", "FirstSchool"]
+            )
+        ]
+
+        active = clients_manager.get_clients_overview(active_only=True)
+        assert [row["client_id"] for row in active] == [
+            client_ids[0],
+            client_ids[1],
+            client_ids[3],
+        ]
+
+        decrypted_rows = []
+        decrypt_rows = clients_manager._decrypt_rows
+
+        def spy(rows, columns):
+            decrypted_rows.extend(rows)
+            return decrypt_rows(rows, columns)
+
+        monkeypatch.setattr(clients_manager, "_decrypt_rows", spy)
+        data = clients_manager.get_clients_overview(
+            order_by=["school"], limit=2, offset=1
+        )
+        # FirstSchool (ids 2, 4), then SecondSchool (ids 1, 3)
+        assert [row["client_id"] for row in data] == [client_ids[3], client_ids[0]]
+        assert data[0]["first_name_encr"] == "Name3"
+        assert len(decrypted_rows) == 2
+
+        data = clients_manager.get_clients_overview(
+            order_by="school", descending=True, limit=1
+        )
+        assert [row["client_id"] for row in data] == [client_ids[2]]
+
+        with pytest.raises(ValueError, match="encrypted"):
+            clients_manager.get_clients_overview(order_by=["last_name_encr"])
+        with pytest.raises(ValueError, match="Invalid column names"):
+            clients_manager.get_clients_overview(order_by=["no_such_column"])
+        with pytest.raises(ValueError, match="offset"):
+            clients_manager.get_clients_overview(offset=-1)
+
+    def test_overview_filters_use_indexes(self, clients_manager):
+        with clients_manager.engine.connect() as conn:
+            plan = conn.execute(
+                text(
+                    "EXPLAIN QUERY PLAN SELECT client_id FROM clients "
+                    "WHERE school IN ('FirstSchool') ORDER BY school"
+                )
+            ).all()
+        assert "ix_clients_school" in " ".join(row[-1] for row in plan)
+
+    def test_iter_clients_overview_pages(self, clients_manager):
+        client_ids = [
+            clients_manager.add_client(
+                school="FirstSchool",
+                gender_encr="f",
+                first_name_encr=f"Name{i}",
+                last_name_encr="Paged",
+                birthday_encr="2010-01-01",
+                class_name_encr="5a",
+                nta_font=i % 2 == 0,
+            )
+            for i in range(5)
+        ]
+        clients_manager.delete_client(client_ids[1])
+        remaining = [client_ids[0], *client_ids[2:]]
+
+        pages = list(clients_manager.iter_clients_overview_pages(page_size=2))
+        assert [len(page) for page in pages] == [2, 2]
+        rows = [row for page in pages for row in page]
+        assert [row["client_id"] for row in rows] == remaining
+        assert rows == clients_manager.get_clients_overview()
+        assert "_cursor" not in rows[0]
+
+        # resume after the last row of the first page
+        resumed = clients_manager.iter_clients_overview_pages(
+            page_size=2, after=pages[0][-1]["client_id"]
+        )
+        assert next(resumed) == pages[1]
+        assert next(resumed, None) is None
+
+        # filters and columns work as in get_clients_overview
+        nta_pages = list(
+            clients_manager.iter_clients_overview_pages(
+                nta_nos=True, columns=["birthday_encr"], page_size=1
+            )
+        )
+        assert [page[0]["client_id"] for page in nta_pages] == client_ids[::2]
+        assert nta_pages[0][0]["birthday_encr"] == date(2010, 1, 1)
+
+        with pytest.raises(ValueError, match="page_size"):
+            clients_manager.iter_clients_overview_pages(page_size=0)
+
+    def test_get_clients_overview_reload_uses_cache(self, clients_manager):
+        from edupsyadmin.db.column_types import decryption_cache
+
+        ids = [
+            clients_manager.add_client(
+                school="FirstSchool",
+                gender_encr="f",
+                first_name_encr=f"Name{i}",
+                last_name_encr="Cached",
+                birthday_encr="2010-01-01",
+                class_name_encr="5a",
+            )
+            for i in range(3)
+        ]
+        decryption_cache.configure(max_entries=1000, max_bytes=1024 * 1024)
+        try:
+            columns = ["first_name_encr", "last_name_encr", "class_name_encr"]
+            clients_manager.get_clients_overview(columns=columns)
+
+            clients_manager.edit_client([ids[0]], {"first_name_encr": "Changed"})
+            misses_before_reload = decryption_cache.misses
+            data = clients_manager.get_clients_overview(columns=columns)
+
+            # Only the edited value has to be decrypted again
+            assert decryption_cache.misses == misses_before_reload + 1
+            assert {row["first_name_encr"] for row in data} == {
+                "Changed",
+                "Name1",
+                "Name2",
+            }
+        finally:
+            decryption_cache.configure(max_entries=0, max_bytes=0)
+
     def test_edit_client_partial_not_found(
         self, clients_manager, client_dict_set_by_user
     ):
@@ -723,6 +1098,448 @@ class TestClientValidation:
         assert client2.document_shredding_date_encr is None
 
 
+def _raw_storage(clients_manager, client_id: int) -> tuple[bytes | None, bytes]:
+    with clients_manager.engine.connect() as conn:
+        row = conn.execute(
+            text(
+                "SELECT sealed_encr, first_name_encr FROM clients "
+                "WHERE client_id = :client_id"
+            ),
+            {"client_id": client_id},
+        ).one()
+    return row[0], row[1]
+
+
+def _add_named_clients(clients_manager) -> list[int]:
+    return [
+        clients_manager.add_client(
+            school="FirstSchool",
+            gender_encr="f",
+            class_name_encr="7a",
+            first_name_encr=first_name,
+            last_name_encr=last_name,
+            birthday_encr=birthday,
+        )
+        for first_name, last_name, birthday in [
+            ("Erika", "Mustermann", "2012-03-04"),
+            ("Max", "Mustermann", "2013-05-06"),
+            ("Jürgen", "Müller", "2012-03-04"),
+            ("Anna", "Jürgen", "2011-01-01"),
+        ]
+    ]
+
+
+class TestFindClients:
+    def test_find_by_name(self, clients_manager):
+        erika, max_, juergen, anna = _add_named_clients(clients_manager)
+
+        def found_ids(*args, **kwargs) -> list[int]:
+            rows = clients_manager.find_clients(*args, **kwargs)
+            return sorted(row["client_id"] for row in rows)
+
+        assert found_ids("mustermann") == [erika, max_]
+        # the name matches first and last names
+        assert found_ids(" JÜRGEN ") == [juergen, anna]
+        assert found_ids(first_name="jürgen") == [juergen]
+        assert found_ids(last_name="Mustermann", first_name="Max") == [max_]
+        assert found_ids(birthday="2012-03-04") == [erika, juergen]
+        assert found_ids("Mustermann", birthday=date(2012, 3, 4)) == [erika]
+        assert found_ids("Mustermann", schools=["OtherSchool"]) == []
+        assert found_ids("Nobody") == []
+
+        with pytest.raises(ValueError, match="search criterion"):
+            clients_manager.find_clients()
+
+    def test_find_decrypts_only_matches(self, clients_manager, monkeypatch):
+        _add_named_clients(clients_manager)
+        decrypted_rows = []
+        original = clients_manager._decrypt_rows
+
+        def spy(rows, columns):
+            decrypted_rows.extend(rows)
+            return original(rows, columns)
+
+        monkeypatch.setattr(clients_manager, "_decrypt_rows", spy)
+        rows = clients_manager.find_clients("Müller", columns=["birthday_encr"])
+        assert len(decrypted_rows) == 1
+        assert rows[0]["first_name_encr"] == "Jürgen"
+        assert rows[0]["birthday_encr"] == date(2012, 3, 4)
+        assert "last_name_bidx" not in rows[0]
+
+    def test_find_clients_without_blind_indexes(self, clients_manager):
+        """Rows that a migration could not index are matched after decryption."""
+        erika, max_, juergen, anna = _add_named_clients(clients_manager)
+        with clients_manager.engine.begin() as conn:
+            conn.execute(
+                text(
+                    "UPDATE clients SET first_name_bidx = NULL, "
+                    "last_name_bidx = NULL, birthday_bidx = NULL "
+                    "WHERE client_id IN (:juergen, :anna)",
+                ),
+                {"juergen": juergen, "anna": anna},
+            )
+
+        def found_ids(*args, **kwargs) -> list[int]:
+            rows = clients_manager.find_clients(*args, **kwargs)
+            return [row["client_id"] for row in rows]
+
+        assert found_ids(" JÜRGEN ") == [juergen, anna]
+        assert found_ids(birthday="2012-03-04") == [erika, juergen]
+        assert found_ids("Mustermann") == [erika, max_]
+        assert found_ids("Jürgen", first_name="Anna") == [anna]
+        assert found_ids("Jürgen", schools=["OtherSchool"]) == []
+        rows = clients_manager.find_clients("Müller", columns=["birthday_encr"])
+        assert set(rows[0]) == {
+            *clients_manager._overview_columns(["birthday_encr"]),
+        }
+
+    def test_find_after_key_rotation(self, clients_manager):
+        erika, max_, *_ = _add_named_clients(clients_manager)
+        old_key = encr._keys[0]
+        encr.set_keys([Fernet.generate_key(), old_key])
+        clients_manager.edit_client([max_], {"notes_encr": "re-indexed"})
+
+        rows = clients_manager.find_clients("Mustermann")
+        assert sorted(row["client_id"] for row in rows) == [erika, max_]
+
+
+class TestClientsDueForShredding:
+    def _add_clients(self, clients_manager) -> dict[int, date | None]:
+        client_ids = [
+            clients_manager.add_client(
+                school="FirstSchool",
+                gender_encr="f",
+                class_name_encr=class_name,
+                first_name_encr="Erika",
+                last_name_encr=f"Mustermann {class_name}",
+                birthday_encr="2012-03-04",
+            )
+            for class_name in ["5a", "7a", "9b", "Förderklasse"]
+        ]
+        return {
+            client_id: clients_manager.get_decrypted_client(
+                client_id,
+            ).document_shredding_date_encr
+            for client_id in client_ids
+        }
+
+    def test_due_for_shredding(self, clients_manager):
+        shredding_dates = self._add_clients(clients_manager)
+        # the class without a grade has no shredding date
+        assert list(shredding_dates.values())[-1] is None
+        dates = sorted(d for d in shredding_dates.values() if d is not None)
+        assert len(set(dates)) == 3
+
+        def due_ids(as_of: date) -> list[int]:
+            rows = clients_manager.clients_due_for_shredding(as_of)
+            assert all(row["document_shredding_date_encr"] <= as_of for row in rows)
+            return sorted(row["client_id"] for row in rows)
+
+        def ids_until(as_of: date) -> list[int]:
+            return sorted(
+                client_id
+                for client_id, d in shredding_dates.items()
+                if d is not None and d <= as_of
+            )
+
+        assert due_ids(date.today()) == []
+        for shredding_date in dates:
+            assert due_ids(shredding_date) == ids_until(shredding_date)
+            # same month, but one day too early
+            day_before = shredding_date - timedelta(days=1)
+            assert due_ids(day_before) == ids_until(day_before)
+        assert clients_manager.clients_due_for_shredding() == []
+
+    def test_due_within_lookback_years(self, clients_manager):
+        shredding_dates = self._add_clients(clients_manager)
+        first_date = min(d for d in shredding_dates.values() if d is not None)
+        as_of = first_date + relativedelta(years=3)
+
+        def due_ids(lookback_years: int) -> list[int]:
+            rows = clients_manager.clients_due_for_shredding(
+                as_of,
+                lookback_years=lookback_years,
+            )
+            return [row["client_id"] for row in rows]
+
+        # dates before the window are not found
+        assert first_date not in (
+            shredding_dates[client_id] for client_id in due_ids(2)
+        )
+        assert len(due_ids(4)) == len(due_ids(50)) > len(due_ids(2))
+        with pytest.raises(ValueError, match="lookback_years"):
+            clients_manager.clients_due_for_shredding(as_of, lookback_years=-1)
+
+    def test_due_without_month_index(self, clients_manager):
+        """Clients that a migration could not index are still found."""
+        shredding_dates = self._add_clients(clients_manager)
+        with clients_manager.engine.begin() as conn:
+            conn.execute(
+                text("UPDATE clients SET document_shredding_month_bidx = NULL")
+            )
+
+        as_of = max(d for d in shredding_dates.values() if d is not None)
+        rows = clients_manager.clients_due_for_shredding(as_of)
+        assert [row["client_id"] for row in rows] == sorted(
+            client_id for client_id, d in shredding_dates.items() if d is not None
+        )
+        assert clients_manager.clients_due_for_shredding() == []
+
+    def test_due_decrypts_only_candidates(self, clients_manager, monkeypatch):
+        shredding_dates = self._add_clients(clients_manager)
+        first_date = min(d for d in shredding_dates.values() if d is not None)
+        decrypted_rows = []
+        original = clients_manager._decrypt_rows
+
+        def spy(rows, columns):
+            decrypted_rows.extend(rows)
+            return original(rows, columns)
+
+        monkeypatch.setattr(clients_manager, "_decrypt_rows", spy)
+        rows = clients_manager.clients_due_for_shredding(first_date, columns="all")
+        assert len(decrypted_rows) == len(rows) == 1
+        assert "document_shredding_month_bidx" not in rows[0]
+
+    def test_due_with_many_keys(self, clients_manager, monkeypatch):
+        shredding_dates = self._add_clients(clients_manager)
+        last_date = max(d for d in shredding_dates.values() if d is not None)
+        # 5 keys give about 3000 month indexes, more than one IN (...) may hold
+        encr.set_keys([*(Fernet.generate_key() for _ in range(4)), *encr._keys])
+        monkeypatch.setattr(managers, "SHREDDING_INDEX_CHUNK_SIZE", 100)
+
+        rows = clients_manager.clients_due_for_shredding(last_date)
+        assert [row["client_id"] for row in rows] == sorted(
+            client_id for client_id, d in shredding_dates.items() if d is not None
+        )
+
+    def test_delete_clients(self, clients_manager):
+        client_ids = list(self._add_clients(clients_manager))
+
+        assert clients_manager.delete_clients(client_ids[:2]) == 2
+        assert clients_manager.get_total_count() == 2
+        # missing ids are skipped
+        assert clients_manager.delete_clients([client_ids[0], client_ids[2]]) == 1
+        with pytest.raises(ClientNotFoundError):
+            clients_manager.get_decrypted_client(client_ids[2])
+
+
+class TestEnvelopeEncryption:
+    @pytest.fixture(autouse=True)
+    def enable_envelope_encryption(self, mock_config):
+        config.core.envelope_encryption = True
+        yield
+        config.core.envelope_encryption = False
+
+    def test_roundtrip(self, clients_manager, client_dict_set_by_user):
+        client_id = clients_manager.add_client(**client_dict_set_by_user)
+
+        sealed, first_name_token = _raw_storage(clients_manager, client_id)
+        assert sealed
+        assert first_name_token == b""
+
+        client = clients_manager.get_decrypted_client(client_id)
+        assert client.first_name_encr == client_dict_set_by_user["first_name_encr"]
+        assert client.birthday_encr is not None
+        assert clients_manager.get_client_fields(
+            client_id, ["last_name_encr", "school"]
+        ) == {
+            "last_name_encr": client_dict_set_by_user["last_name_encr"],
+            "school": client_dict_set_by_user["school"],
+        }
+        overview = clients_manager.get_clients_overview(columns="all")
+        assert overview[0]["first_name_encr"] == client.first_name_encr
+        assert overview[0]["birthday_encr"] == client.birthday_encr
+        assert "sealed_encr" not in overview[0]
+
+    def test_edit_client(self, clients_manager, client_dict_set_by_user):
+        client_id = clients_manager.add_client(**client_dict_set_by_user)
+        clients_manager.edit_client(
+            [client_id], {"first_name_encr": "Changed", "class_name_encr": "7b"}
+        )
+
+        client = clients_manager.get_decrypted_client(client_id)
+        assert client.first_name_encr == "Changed"
+        assert client.class_int_encr == 7
+        assert _raw_storage(clients_manager, client_id)[1] == b""
+
+    def test_find_clients(self, clients_manager):
+        _add_named_clients(clients_manager)
+        rows = clients_manager.find_clients("müller")
+        assert [row["first_name_encr"] for row in rows] == ["Jürgen"]
+
+    def test_edit_writes_only_sealed_column(
+        self, clients_manager, client_dict_set_by_user
+    ):
+        client_id = clients_manager.add_client(**client_dict_set_by_user)
+        statements = []
+
+        def record(_conn, _cursor, statement, *_args) -> None:
+            statements.append(statement)
+
+        event.listen(clients_manager.engine, "before_cursor_execute", record)
+        clients_manager.edit_client([client_id], {"notes_encr": "neue Notiz"})
+        event.remove(clients_manager.engine, "before_cursor_execute", record)
+
+        (update,) = [s for s in statements if s.startswith("UPDATE")]
+        assert "sealed_encr" in update
+        assert "first_name_encr" not in update
+        sealed, first_name_token = _raw_storage(clients_manager, client_id)
+        assert sealed
+        assert first_name_token == b""
+        client = clients_manager.get_decrypted_client(client_id)
+        assert client.notes_encr == "neue Notiz"
+        assert client.first_name_encr == client_dict_set_by_user["first_name_encr"]
+
+    def test_switch_storage_mode(self, clients_manager, client_dict_set_by_user):
+        client_id = clients_manager.add_client(**client_dict_set_by_user)
+        expected = clients_manager.get_decrypted_client(client_id).model_dump(
+            exclude={"datetime_lastmodified"}
+        )
+
+        # writing a sealed row without envelope encryption unseals it
+        config.core.envelope_encryption = False
+        clients_manager.edit_client([client_id], {"n_sessions": 3})
+        sealed, first_name_token = _raw_storage(clients_manager, client_id)
+        assert sealed is None
+        assert first_name_token
+        record = clients_manager.get_decrypted_client(client_id)
+        assert record.model_dump(exclude={"datetime_lastmodified", "n_sessions"}) == {
+            k: v for k, v in expected.items() if k != "n_sessions"
+        }
+
+        # ... and the other way round
+        config.core.envelope_encryption = True
+        clients_manager.edit_client([client_id], {"n_sessions": 4})
+        sealed, first_name_token = _raw_storage(clients_manager, client_id)
+        assert sealed
+        assert first_name_token == b""
+        assert (
+            clients_manager.get_decrypted_client(client_id).first_name_encr
+            == (expected["first_name_encr"])
+        )
+
+
+@pytest.mark.parametrize(
+    ("suite", "version"),
+    [("aes-gcm", b"\x02"), ("chacha20-poly1305", b"\x03")],
+)
+def test_cipher_suite_setting(clients_manager, client_dict_set_by_user, suite, version):
+    old_id = clients_manager.add_client(**client_dict_set_by_user)
+
+    config.core.cipher_suite = suite
+    try:
+        manager = ClientsManager(database_url=clients_manager.database_url)
+        new_id = manager.add_client(
+            **{k: v for k, v in client_dict_set_by_user.items() if k != "client_id"}
+        )
+    finally:
+        config.core.cipher_suite = "fernet"
+        encr.set_cipher_suite("fernet")
+
+    assert _raw_storage(manager, old_id)[1][:1] == b"\x01"
+    assert _raw_storage(manager, new_id)[1][:1] == version
+    # Tokens of both suites are decrypted transparently
+    for client_id in (old_id, new_id):
+        client = manager.get_decrypted_client(client_id)
+        assert client.first_name_encr == client_dict_set_by_user["first_name_encr"]
+
+
 # Make the script executable.
 if __name__ == "__main__":
     raise SystemExit(pytest.main([__file__]))
+
+
+def _add_cached_clients(clients_manager, n: int = 3) -> list[int]:
+    return [
+        clients_manager.add_client(
+            school="FirstSchool",
+            gender_encr="f",
+            first_name_encr=f"Name{i}",
+            last_name_encr="Cached",
+            birthday_encr="2010-01-01",
+            class_name_encr="5a",
+            entry_date_encr="2020-09-01",
+        )
+        for i in range(n)
+    ]
+
+
+class TestOverviewCache:
+    @pytest.fixture(autouse=True)
+    def enable_overview_cache(self, mock_config):
+        config.core.overview_cache = True
+        yield
+        config.core.overview_cache = False
+
+    def test_hit_decrypts_once(self, clients_manager, monkeypatch):
+        _add_cached_clients(clients_manager)
+        config.core.overview_cache = False
+        expected = clients_manager.get_clients_overview(columns="all")
+        config.core.overview_cache = True
+
+        assert clients_manager.get_clients_overview(columns="all") == expected
+
+        decrypt = encr.decrypt
+        calls = []
+
+        def count_decrypt(token):
+            calls.append(token)
+            return decrypt(token)
+
+        def fail(*args: Any) -> None:
+            raise AssertionError("a cache hit should not decrypt the columns")
+
+        monkeypatch.setattr(encr, "decrypt", count_decrypt)
+        monkeypatch.setattr(encr, "decrypt_many", fail)
+        assert clients_manager.get_clients_overview(columns="all") == expected
+        pages = clients_manager.iter_clients_overview_pages(columns="all", page_size=2)
+        assert [row for page in pages for row in page] == expected
+        assert len(calls) == 2
+
+    def test_invalidation(self, clients_manager):
+        client_ids = _add_cached_clients(clients_manager)
+        clients_manager.get_clients_overview()
+
+        clients_manager.edit_client([client_ids[0]], {"first_name_encr": "Changed"})
+        data = clients_manager.get_clients_overview()
+        assert data[0]["first_name_encr"] == "Changed"
+
+        clients_manager.edit_client([client_ids[1]], {"nta_font": True})
+        data = clients_manager.get_clients_overview(columns=["nta_font"])
+        assert data[1]["nta_font"] is True
+
+        (new_id,) = _add_cached_clients(clients_manager, 1)
+        data = clients_manager.get_clients_overview(columns=["nta_font"])
+        assert [row["client_id"] for row in data] == [*client_ids, new_id]
+
+        # other arguments are cached separately
+        assert len(clients_manager.get_clients_overview(nta_nos=True)) == 1
+
+    def test_delete_clears_cache(self, clients_manager):
+        client_ids = _add_cached_clients(clients_manager)
+        clients_manager.get_clients_overview()
+
+        clients_manager.delete_client(client_ids[0])
+        with clients_manager.engine.connect() as conn:
+            keys = conn.execute(text("SELECT key FROM system_metadata")).scalars()
+            assert "overview_cache" not in set(keys)
+        assert len(clients_manager.get_clients_overview()) == 2
+
+        clients_manager.delete_clients(client_ids[1:])
+        assert clients_manager.get_clients_overview() == []
+
+    def test_unknown_key(self, clients_manager):
+        _add_cached_clients(clients_manager)
+        expected = clients_manager.get_clients_overview()
+
+        # e.g. written before the key was rotated
+        foreign_token = Fernet(Fernet.generate_key()).encrypt(b"[]").decode()
+        with clients_manager.engine.begin() as conn:
+            conn.execute(
+                text(
+                    "UPDATE system_metadata SET value = :value "
+                    "WHERE key = 'overview_cache'"
+                ),
+                {"value": foreign_token},
+            )
+        assert clients_manager.get_clients_overview() == expected
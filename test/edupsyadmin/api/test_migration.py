@@ -1,18 +1,32 @@
 import sqlite3
+from importlib import resources
 from pathlib import Path
 from unittest.mock import patch
 
 import pytest
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
 from cryptography.fernet import Fernet
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import create_engine, inspect, text
 
+from edupsyadmin.api import migration
 from edupsyadmin.api.migration import (
     MigrationError,
+    backfill_blind_indexes,
+    count_clients_off_primary_key,
     re_encrypt_all_data,
+    rotation_checkpoint,
     upgrade_db,
 )
+from edupsyadmin.core.config import config
 from edupsyadmin.core.encrypt import encr
 from edupsyadmin.db.clients import Client
+from edupsyadmin.db.revision import (
+    head_revision,
+    index_backfill_pending,
+    is_up_to_date,
+)
 
 
 def test_upgrade_db_new_database(tmp_path: Path):
@@ -39,6 +53,18 @@ def test_upgrade_db_new_database(tmp_path: Path):
     assert "datetime_created" in columns
 
 
+def test_upgrade_db_creates_model_indexes(tmp_path: Path):
+    """The migrations create the indexes that the model declares."""
+    db_url = f"sqlite:///{tmp_path / 'new_app.db'}"
+    upgrade_db(db_url)
+
+    engine = create_engine(db_url)
+    indexes = {ix["name"] for ix in inspect(engine).get_indexes("clients")}
+    engine.dispose()
+    assert {ix.name for ix in Client.__table__.indexes} <= indexes
+    assert {"ix_clients_school", "ix_clients_case_active"} <= indexes
+
+
 def test_upgrade_db_legacy_database(tmp_path: Path):
     """
     Test that upgrade_db correctly stamps a legacy database that already has
@@ -151,6 +177,227 @@ def test_upgrade_db_idempotency(tmp_path: Path):
     assert "alembic_version" in inspector.get_table_names()
 
 
+def test_head_revision_matches_migrations():
+    """The head read without alembic is the one that alembic computes."""
+    script = ScriptDirectory.from_config(_alembic_config("sqlite://"))
+    assert head_revision() == script.get_current_head()
+
+
+def test_is_up_to_date(tmp_path: Path):
+    db_url = f"sqlite:///{tmp_path / 'app.db'}"
+    assert not is_up_to_date(db_url)
+
+    upgrade_db(db_url)
+    assert is_up_to_date(db_url)
+
+    command.downgrade(_alembic_config(db_url), "-1")
+    assert not is_up_to_date(db_url)
+
+    upgrade_db(db_url)
+    assert is_up_to_date(db_url)
+
+
+def _alembic_config(database_url: str) -> Config:
+    pkg_path = resources.files("edupsyadmin")
+    alembic_cfg = Config(str(pkg_path.joinpath("alembic.ini")))
+    alembic_cfg.set_main_option("script_location", str(pkg_path.joinpath("alembic")))
+    alembic_cfg.set_main_option("sqlalchemy.url", database_url)
+    return alembic_cfg
+
+
+def test_binary_storage_migration_roundtrip(clients_manager, client_dict_set_by_user):
+    """Tokens survive the downgrade to text columns and the upgrade back."""
+    client_id = clients_manager.add_client(**client_dict_set_by_user)
+    expected = clients_manager.get_decrypted_client(client_id)
+    clients_manager.engine.dispose()
+
+    alembic_cfg = _alembic_config(clients_manager.database_url)
+    raw_stmt = text("SELECT first_name_encr FROM clients WHERE client_id = :id")
+
+    command.downgrade(alembic_cfg, "0f1497df963e")
+    with clients_manager.engine.connect() as conn:
+        raw_token = conn.execute(raw_stmt, {"id": client_id}).scalar_one()
+    assert isinstance(raw_token, str)
+    assert raw_token.startswith("f1.")
+    assert encr.decrypt(raw_token) == expected.first_name_encr
+
+    command.upgrade(alembic_cfg, "head")
+    with clients_manager.engine.connect() as conn:
+        raw_token = conn.execute(raw_stmt, {"id": client_id}).scalar_one()
+    assert isinstance(raw_token, bytes)
+    # the blind indexes are dropped with their columns
+    client = clients_manager.get_decrypted_client(client_id)
+    assert client.model_dump() == expected.model_dump()
+
+
+def test_sealed_rows_survive_downgrade(clients_manager, client_dict_set_by_user):
+    """Dropping sealed_encr writes one token per column for sealed rows."""
+    config.core.envelope_encryption = True
+    client_id = clients_manager.add_client(**client_dict_set_by_user)
+    expected = clients_manager.get_decrypted_client(client_id)
+    config.core.envelope_encryption = False
+    clients_manager.engine.dispose()
+
+    alembic_cfg = _alembic_config(clients_manager.database_url)
+    command.downgrade(alembic_cfg, "a4c2e9b71d35")
+    with clients_manager.engine.connect() as conn:
+        raw_token = conn.execute(
+            text("SELECT first_name_encr FROM clients WHERE client_id = :id"),
+            {"id": client_id},
+        ).scalar_one()
+    assert encr.decrypt(raw_token) == expected.first_name_encr
+
+    command.upgrade(alembic_cfg, "head")
+    client = clients_manager.get_decrypted_client(client_id)
+    assert client.sealed_encr is None
+    assert client.model_dump() == expected.model_dump()
+
+
+@pytest.mark.parametrize("envelope_encryption", [False, True])
+def test_blind_index_migration_indexes_old_rows(
+    clients_manager, client_dict_set_by_user, monkeypatch, envelope_encryption
+):
+    """The migration that adds the blind indexes computes them for old rows."""
+    monkeypatch.setattr(config.core, "envelope_encryption", envelope_encryption)
+    client_id = clients_manager.add_client(**client_dict_set_by_user)
+    clients_manager.engine.dispose()
+
+    alembic_cfg = _alembic_config(clients_manager.database_url)
+    command.downgrade(alembic_cfg, "c81f5d2e6a97")
+    command.upgrade(alembic_cfg, "head")
+
+    with clients_manager.engine.connect() as conn:
+        missing = conn.execute(
+            text(
+                "SELECT count(*) FROM clients WHERE first_name_bidx IS NULL "
+                "OR last_name_bidx IS NULL OR birthday_bidx IS NULL "
+                "OR document_shredding_month_bidx IS NULL"
+            ),
+        ).scalar_one()
+    assert missing == 0
+    rows = clients_manager.find_clients(
+        first_name=client_dict_set_by_user["first_name_encr"],
+        birthday=client_dict_set_by_user["birthday_encr"],
+    )
+    assert [row["client_id"] for row in rows] == [client_id]
+    shredding_date = clients_manager.get_decrypted_client(
+        client_id,
+    ).document_shredding_date_encr
+    due = clients_manager.clients_due_for_shredding(shredding_date)
+    assert [row["client_id"] for row in due] == [client_id]
+
+
+@pytest.mark.parametrize("complete_with", ["backfill", "rotate-key"])
+def test_blind_index_migration_without_keys(
+    clients_manager, client_dict_set_by_user, complete_with
+):
+    """Without the keys, the old rows are marked to be indexed later."""
+    client_id = clients_manager.add_client(**client_dict_set_by_user)
+    clients_manager.engine.dispose()
+
+    alembic_cfg = _alembic_config(clients_manager.database_url)
+    command.downgrade(alembic_cfg, "c81f5d2e6a97")
+    keys = encr._keys
+    encr._fernet = None
+    try:
+        command.upgrade(alembic_cfg, "head")
+    finally:
+        encr.set_keys(keys)
+
+    with clients_manager.engine.connect() as conn:
+        indexed = conn.execute(
+            text("SELECT count(*) FROM clients WHERE last_name_bidx IS NOT NULL"),
+        ).scalar_one()
+    assert indexed == 0
+    assert index_backfill_pending(clients_manager.database_url)
+    # the rows are still found by decrypting them
+    rows = clients_manager.find_clients(
+        last_name=client_dict_set_by_user["last_name_encr"],
+    )
+    assert [row["client_id"] for row in rows] == [client_id]
+
+    if complete_with == "backfill":
+        assert backfill_blind_indexes(clients_manager.database_url) == 1
+    else:
+        with clients_manager.Session() as session:
+            re_encrypt_all_data(session)
+    assert not index_backfill_pending(clients_manager.database_url)
+    with clients_manager.engine.connect() as conn:
+        indexed = conn.execute(
+            text("SELECT count(*) FROM clients WHERE last_name_bidx IS NOT NULL"),
+        ).scalar_one()
+    assert indexed == 1
+    rows = clients_manager.find_clients(
+        last_name=client_dict_set_by_user["last_name_encr"],
+    )
+    assert len(rows) == 1
+
+
+def test_shredding_month_migration_without_keys(
+    clients_manager, client_dict_set_by_user
+):
+    """Without the keys, the shredding month indexes are marked to be added."""
+    client_id = clients_manager.add_client(**client_dict_set_by_user)
+    shredding_date = clients_manager.get_decrypted_client(
+        client_id,
+    ).document_shredding_date_encr
+    clients_manager.engine.dispose()
+
+    alembic_cfg = _alembic_config(clients_manager.database_url)
+    command.downgrade(alembic_cfg, "5d3b8e1f7a20")
+    keys = encr._keys
+    encr._fernet = None
+    try:
+        command.upgrade(alembic_cfg, "head")
+    finally:
+        encr.set_keys(keys)
+
+    assert index_backfill_pending(clients_manager.database_url)
+    assert backfill_blind_indexes(clients_manager.database_url) == 1
+    with clients_manager.engine.connect() as conn:
+        missing = conn.execute(
+            text(
+                "SELECT count(*) FROM clients "
+                "WHERE document_shredding_month_bidx IS NULL",
+            ),
+        ).scalar_one()
+    assert missing == 0
+    due = clients_manager.clients_due_for_shredding(shredding_date)
+    assert [row["client_id"] for row in due] == [client_id]
+
+
+def test_backfill_blind_indexes_requires_keys(clients_manager):
+    keys = encr._keys
+    encr._fernet = None
+    try:
+        with pytest.raises(MigrationError, match="not initialized"):
+            backfill_blind_indexes(clients_manager.database_url)
+    finally:
+        encr.set_keys(keys)
+
+
+def test_backup_includes_write_ahead_log(clients_manager):
+    """The backup before a migration has the changes that are still in the WAL."""
+    command.downgrade(_alembic_config(clients_manager.database_url), "-1")
+    # the pooled connection keeps the write-ahead log from being checkpointed
+    with clients_manager.engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO system_metadata (key, value) VALUES ('wal', 'test')"),
+        )
+
+    upgrade_db(clients_manager.database_url)
+
+    db_path = Path(clients_manager.database_url.removeprefix("sqlite:///"))
+    backup = sqlite3.connect(db_path.with_suffix(".db.bak"))
+    try:
+        row = backup.execute(
+            "SELECT value FROM system_metadata WHERE key = 'wal'",
+        ).fetchone()
+    finally:
+        backup.close()
+    assert row == ("test",)
+
+
 class TestMigrationEncryption:
     @pytest.fixture(autouse=True)
     def setup_encr(self):
@@ -195,6 +442,140 @@ class TestMigrationEncryption:
             client = session.get(Client, client_id)
             assert client.first_name_encr == "Alice"
 
+    def test_re_encrypt_all_data_switches_storage_mode(self, clients_manager):
+        """Rotation rewrites every row with the configured storage mode."""
+        encr.set_keys([Fernet.generate_key()])
+        client_id = clients_manager.add_client(
+            school="FirstSchool",
+            gender_encr="f",
+            class_name_encr="2b",
+            first_name_encr="Alice",
+            last_name_encr="Wonderland",
+            birthday_encr="1995-05-05",
+        )
+        raw_stmt = text("SELECT sealed_encr FROM clients WHERE client_id = :id")
+
+        for envelope_encryption in (True, False):
+            config.core.envelope_encryption = envelope_encryption
+            with clients_manager.Session() as session:
+                re_encrypt_all_data(session)
+            with clients_manager.engine.connect() as conn:
+                sealed = conn.execute(raw_stmt, {"id": client_id}).scalar_one()
+            assert (sealed is not None) is envelope_encryption
+            client = clients_manager.get_decrypted_client(client_id)
+            assert client.first_name_encr == "Alice"
+
+    @pytest.mark.parametrize("envelope_encryption", [False, True])
+    def test_re_encrypt_all_data_in_batches(
+        self, clients_manager, monkeypatch, envelope_encryption
+    ):
+        """All batches are rotated, and the blind indexes use the new key."""
+        old_key = Fernet.generate_key()
+        new_key = Fernet.generate_key()
+        monkeypatch.setattr(config.core, "envelope_encryption", envelope_encryption)
+        encr.set_keys([old_key])
+        client_ids = [
+            clients_manager.add_client(
+                school="FirstSchool",
+                gender_encr="f",
+                class_name_encr="2b",
+                first_name_encr=f"Alice{i}",
+                last_name_encr="Wonderland",
+                birthday_encr="1995-05-05",
+                notes_encr="" if i % 2 else "Notiz",
+            )
+            for i in range(5)
+        ]
+
+        encr.set_keys([new_key, old_key])
+        with clients_manager.Session() as session:
+            stats = re_encrypt_all_data(session, batch_size=2)
+        assert stats.rows == 5
+        assert stats.rows_per_second > 0
+
+        encr.set_keys([new_key])
+        for i, client_id in enumerate(client_ids):
+            client = clients_manager.get_decrypted_client(client_id)
+            assert client.first_name_encr == f"Alice{i}"
+            assert client.notes_encr == ("" if i % 2 else "Notiz")
+            assert client.class_int_encr == 2
+        found = clients_manager.find_clients(last_name="Wonderland")
+        assert sorted(row["client_id"] for row in found) == client_ids
+
+    @pytest.mark.parametrize("checkpoint", [False, True])
+    def test_re_encrypt_all_data_resume(self, clients_manager, monkeypatch, checkpoint):
+        """A failed run keeps the committed batches only with checkpoints."""
+        old_key = Fernet.generate_key()
+        new_key = Fernet.generate_key()
+        encr.set_keys([old_key])
+        client_ids = [
+            clients_manager.add_client(
+                school="FirstSchool",
+                gender_encr="f",
+                class_name_encr="2b",
+                first_name_encr=f"Alice{i}",
+                last_name_encr="Wonderland",
+                birthday_encr="1995-05-05",
+            )
+            for i in range(5)
+        ]
+        encr.set_keys([new_key, old_key])
+
+        rotate_batch = migration._rotate_batch
+        batches = []
+
+        def failing_rotate_batch(batch, seal):
+            batches.append(batch)
+            if len(batches) == 2:
+                raise RuntimeError("interrupted")
+            return rotate_batch(batch, seal)
+
+        monkeypatch.setattr(migration, "_rotate_batch", failing_rotate_batch)
+        with (
+            clients_manager.Session() as session,
+            pytest.raises(MigrationError, match="interrupted"),
+        ):
+            re_encrypt_all_data(session, batch_size=2, checkpoint=checkpoint)
+        monkeypatch.setattr(migration, "_rotate_batch", rotate_batch)
+
+        with clients_manager.Session() as session:
+            saved = rotation_checkpoint(session)
+            off_primary = count_clients_off_primary_key(session)
+        if not checkpoint:
+            assert saved is None
+            assert off_primary == 5
+            return
+        assert saved == {"last_client_id": client_ids[1], "key_id": encr.primary_key_id}
+        assert off_primary == 3
+
+        with clients_manager.Session() as session:
+            stats = re_encrypt_all_data(session, batch_size=2, resume=True)
+            assert stats.rows == 3
+            assert rotation_checkpoint(session) is None
+            assert count_clients_off_primary_key(session) == 0
+
+        encr.set_keys([new_key])
+        for i, client_id in enumerate(client_ids):
+            client = clients_manager.get_decrypted_client(client_id)
+            assert client.first_name_encr == f"Alice{i}"
+
+    def test_re_encrypt_all_data_resume_errors(self, clients_manager):
+        """Resuming needs a checkpoint of a run with the same primary key."""
+        encr.set_keys([Fernet.generate_key()])
+        with clients_manager.Session() as session:
+            with pytest.raises(MigrationError, match="no interrupted key rotation"):
+                re_encrypt_all_data(session, resume=True)
+
+            migration._store_checkpoint(session, 1)
+            session.commit()
+            encr.set_keys([Fernet.generate_key(), *encr._keys])
+            with pytest.raises(MigrationError, match="different primary key"):
+                re_encrypt_all_data(session, resume=True)
+
+            # a complete run replaces the checkpoint
+            re_encrypt_all_data(session)
+            assert rotation_checkpoint(session) is None
+
     def test_re_encrypt_all_data_not_initialized(self, clients_manager):
         """Test that re_encrypt_all_data raises error if encr is not initialized."""
         encr._fernet = None
@@ -28,15 +28,20 @@ def test_cli_get_clients_execution(benchmark, mock_config, tmp_path, num_clients
     clients_manager = ClientsManager(
         database_url=database_url,
     )
-    for i in range(num_clients):  # Add clients for the benchmark
-        clients_manager.add_client(
-            school="FirstSchool",
-            gender_encr="f",
-            class_name_encr="11TKKG",
-            first_name_encr=f"Erika_{i}",
-            last_name_encr="Mustermann",
-            birthday_encr="2000-12-24",
-        )
+    clients_manager.add_clients(  # Add clients for the benchmark
+        [
+            {
+                "school": "FirstSchool",
+                "gender_encr": "f",
+                "class_name_encr": "11TKKG",
+                "first_name_encr": f"Erika_{i}",
+                "last_name_encr": "Mustermann",
+                "birthday_encr": "2000-12-24",
+            }
+            for i in range(num_clients)
+        ],
+        strict=True,
+    )
 
     def run_command():
         # Act: Run the command that is being benchmarked
@@ -48,9 +53,11 @@ def test_cli_get_clients_execution(benchmark, mock_config, tmp_path, num_clients
             nta_nos=False,
             school=None,
             client_id=None,
+            name=None,
             out=None,
             tui=False,
             columns=None,
+            active_only=False,
         )
         get_clients_command.execute(args)
 
@@ -1,9 +1,23 @@
+import asyncio
+import time
+import tracemalloc
+from datetime import date
+
 import pytest
 from cryptography.fernet import Fernet
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, insert, text
 
+from edupsyadmin.api.async_managers import AsyncClientsManager
 from edupsyadmin.api.managers import ClientsManager
 from edupsyadmin.api.migration import upgrade_db
+from edupsyadmin.core.config import config
 from edupsyadmin.core.encrypt import encr
+from edupsyadmin.db.column_types import (
+    EncryptedBinaryString,
+    EncryptedString,
+    EncryptedType,
+)
 
 
 @pytest.fixture
@@ -19,23 +33,28 @@ def benchmark_db(tmp_path, mock_config):
     manager = ClientsManager(database_url=database_url)
 
     # Add 80 clients
-    for i in range(80):
-        manager.add_client(
-            school="FirstSchool",
-            gender_encr="f",
-            class_name_encr="1A",
-            first_name_encr=f"Firstname_{i}",
-            last_name_encr=f"Lastname_{i}",
-            birthday_encr="2010-01-01",
-            street_encr="Teststreet 1",
-            city_encr="12345 Testcity",
-            parent_encr="Parent Name",
-            telephone1_encr="0123456789",
-            email_encr="test@example.com",
-            entry_date_encr="2020-09-01",
-            keyword_taet_encr="slbb.slb.sonstige",
-            notes_encr="Some encrypted notes for benchmarking decryption speed.",
-        )
+    manager.add_clients(
+        [
+            {
+                "school": "FirstSchool",
+                "gender_encr": "f",
+                "class_name_encr": "1A",
+                "first_name_encr": f"Firstname_{i}",
+                "last_name_encr": f"Lastname_{i}",
+                "birthday_encr": "2010-01-01",
+                "street_encr": "Teststreet 1",
+                "city_encr": "12345 Testcity",
+                "parent_encr": "Parent Name",
+                "telephone1_encr": "0123456789",
+                "email_encr": "test@example.com",
+                "entry_date_encr": "2020-09-01",
+                "keyword_taet_encr": "slbb.slb.sonstige",
+                "notes_encr": "Some encrypted notes for benchmarking decryption speed.",
+            }
+            for i in range(80)
+        ],
+        strict=True,
+    )
     return manager
 
 
@@ -65,15 +84,20 @@ def test_db_get_clients_overview_execution(
     manager = ClientsManager(
         database_url=database_url,
     )
-    for i in range(num_clients):  # Add clients for the benchmark
-        manager.add_client(
-            school="FirstSchool",
-            gender_encr="f",
-            class_name_encr="11TKKG",
-            first_name_encr=f"Erika_{i}",
-            last_name_encr="Mustermann",
-            birthday_encr="2000-12-24",
-        )
+    manager.add_clients(  # Add clients for the benchmark
+        [
+            {
+                "school": "FirstSchool",
+                "gender_encr": "f",
+                "class_name_encr": "11TKKG",
+                "first_name_encr": f"Erika_{i}",
+                "last_name_encr": "Mustermann",
+                "birthday_encr": "2000-12-24",
+            }
+            for i in range(num_clients)
+        ],
+        strict=True,
+    )
 
     def run_get_overview():
         # get_clients_overview triggers decryption of all fields for all
@@ -82,3 +106,376 @@ def test_db_get_clients_overview_execution(
 
     # Assert: benchmark the execution
     benchmark(run_get_overview)
+
+
+def _raw_tokens(manager: ClientsManager, column: str) -> list[bytes]:
+    with manager.engine.connect() as conn:
+        return list(conn.scalars(text(f"SELECT {column} FROM clients")))
+
+
+def test_db_decrypt_column_per_value(benchmark, benchmark_db):
+    """Benchmark decrypting a column with one call per value (ORM path)."""
+    tokens = _raw_tokens(benchmark_db, "notes_encr")
+    col_type = EncryptedBinaryString()
+
+    def decrypt_per_value():
+        return [col_type.process_result_value(token, None) for token in tokens]
+
+    benchmark(decrypt_per_value)
+
+
+def test_db_decrypt_column_batch(benchmark, benchmark_db):
+    """Benchmark decrypting a column with a single decrypt_many call."""
+    tokens = _raw_tokens(benchmark_db, "notes_encr")
+    benchmark(EncryptedBinaryString().decrypt_many, tokens)
+
+
+@pytest.mark.parametrize(
+    "col_type",
+    [EncryptedString(), EncryptedBinaryString()],
+    ids=["text", "binary"],
+)
+def test_db_full_scan_storage(benchmark, tmp_path, col_type: EncryptedType):
+    """Benchmark scanning and decrypting 5000 rows of text vs. binary tokens.
+
+    The size of the database file is reported as ``db_bytes``.
+    """
+    encr.set_keys([Fernet.generate_key()])
+    database_path = tmp_path / "storage.sqlite"
+    engine = create_engine(f"sqlite:///{database_path}")
+    notes = Table(
+        "notes",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("value", col_type),
+    )
+    notes.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(notes),
+            [{"value": f"Some notes about client {i}"} for i in range(5000)],
+        )
+    benchmark.extra_info["db_bytes"] = database_path.stat().st_size
+
+    def scan():
+        with engine.connect() as conn:
+            tokens = list(conn.scalars(text("SELECT value FROM notes")))
+        return col_type.decrypt_many(tokens)
+
+    benchmark(scan)
+    engine.dispose()
+
+
+@pytest.mark.parametrize(
+    "envelope_encryption", [False, True], ids=["field", "envelope"]
+)
+def test_db_client_storage_mode(benchmark, tmp_path, mock_config, envelope_encryption):
+    """Benchmark writing and reading one client per field vs. sealed.
+
+    The size of the database file with 1000 clients is reported as
+    ``db_bytes``.
+    """
+    encr.set_keys([Fernet.generate_key()])
+    config.core.envelope_encryption = envelope_encryption
+
+    database_path = tmp_path / "benchmark.sqlite"
+    upgrade_db(f"sqlite:///{database_path}")
+    manager = ClientsManager(database_url=f"sqlite:///{database_path}")
+
+    def add_and_read():
+        client_id = manager.add_client(
+            school="FirstSchool",
+            gender_encr="f",
+            class_name_encr="11TKKG",
+            first_name_encr="Erika",
+            last_name_encr="Mustermann",
+            birthday_encr="2000-12-24",
+            notes_encr="Some encrypted notes for benchmarking decryption speed.",
+        )
+        return manager.get_decrypted_client(client_id)
+
+    benchmark.pedantic(add_and_read, rounds=1000, iterations=1)
+    manager.engine.dispose()
+    benchmark.extra_info["db_bytes"] = database_path.stat().st_size
+
+
+@pytest.mark.parametrize("use_processes", [False, True], ids=["threads", "procs"])
+@pytest.mark.parametrize("workers", [1, 2, 4, 8])
+def test_db_get_clients_overview_parallel(
+    benchmark, tmp_path, mock_config, workers, use_processes
+):
+    """Benchmark the overview of 1000 clients with N decryption workers."""
+    encr.set_keys([Fernet.generate_key()])
+
+    database_url = f"sqlite:///{tmp_path / 'benchmark.sqlite'}"
+    upgrade_db(database_url)
+    manager = ClientsManager(database_url=database_url)
+    manager.add_clients(
+        [
+            {
+                "school": "FirstSchool",
+                "gender_encr": "f",
+                "class_name_encr": "11TKKG",
+                "first_name_encr": f"Erika_{i}",
+                "last_name_encr": "Mustermann",
+                "birthday_encr": "2000-12-24",
+            }
+            for i in range(1000)
+        ],
+        strict=True,
+    )
+
+    encr.set_parallelism(workers=workers, use_processes=use_processes)
+    try:
+        benchmark(manager.get_clients_overview, columns=["all"])
+    finally:
+        encr.set_parallelism(workers=1)
+
+
+@pytest.mark.parametrize("lookup", ["overview_filter", "find_clients"])
+def test_db_find_client_by_name(benchmark, tmp_path, mock_config, lookup):
+    """Benchmark finding one client by last name among 1000 clients."""
+    encr.set_keys([Fernet.generate_key()])
+
+    database_url = f"sqlite:///{tmp_path / 'benchmark.sqlite'}"
+    upgrade_db(database_url)
+    manager = ClientsManager(database_url=database_url)
+    manager.add_clients(
+        [
+            {
+                "school": "FirstSchool",
+                "gender_encr": "f",
+                "class_name_encr": "11TKKG",
+                "first_name_encr": "Erika",
+                "last_name_encr": f"Mustermann_{i}",
+                "birthday_encr": "2000-12-24",
+            }
+            for i in range(1000)
+        ],
+        strict=True,
+    )
+
+    def find():
+        if lookup == "find_clients":
+            return manager.find_clients(last_name="mustermann_500")
+        return [
+            row
+            for row in manager.get_clients_overview()
+            if row["last_name_encr"].casefold() == "mustermann_500"
+        ]
+
+    assert len(benchmark(find)) == 1
+
+
+@pytest.mark.parametrize("lookup", ["overview_filter", "shredding_index"])
+def test_db_clients_due_for_shredding(benchmark, tmp_path, mock_config, lookup):
+    """Benchmark finding the clients due for shredding among 1000 clients."""
+    encr.set_keys([Fernet.generate_key()])
+
+    database_url = f"sqlite:///{tmp_path / 'benchmark.sqlite'}"
+    upgrade_db(database_url)
+    manager = ClientsManager(database_url=database_url)
+    manager.add_clients(
+        [
+            {
+                "school": "FirstSchool",
+                "gender_encr": "f",
+                "class_name_encr": f"{i % 10 + 1}a",
+                "first_name_encr": "Erika",
+                "last_name_encr": f"Mustermann_{i}",
+                "birthday_encr": "2000-12-24",
+            }
+            for i in range(1000)
+        ],
+        strict=True,
+    )
+    # the clients of the two highest grades are due
+    as_of = date.today() + relativedelta(years=6)
+
+    def find():
+        if lookup == "shredding_index":
+            return manager.clients_due_for_shredding(as_of)
+        return [
+            row
+            for row in manager.get_clients_overview(
+                columns=["document_shredding_date_encr"],
+            )
+            if row["document_shredding_date_encr"] is not None
+            and row["document_shredding_date_encr"] <= as_of
+        ]
+
+    assert len(benchmark(find)) == 200
+
+
+@pytest.mark.parametrize("mode", ["list", "pages"])
+def test_db_overview_streaming(benchmark, tmp_path, mock_config, mode):
+    """Benchmark counting the rows of an overview of 3000 clients.
+
+    The peak memory of one pass is in extra_info.
+    """
+    encr.set_keys([Fernet.generate_key()])
+
+    database_url = f"sqlite:///{tmp_path / 'benchmark.sqlite'}"
+    upgrade_db(database_url)
+    manager = ClientsManager(database_url=database_url)
+    manager.add_clients(
+        [
+            {
+                "school": "FirstSchool",
+                "gender_encr": "f",
+                "class_name_encr": "11TKKG",
+                "first_name_encr": f"Erika_{i}",
+                "last_name_encr": "Mustermann",
+                "birthday_encr": "2000-12-24",
+                "notes_encr": "Notizen " * 20,
+            }
+            for i in range(3000)
+        ],
+        strict=True,
+    )
+
+    def count_rows() -> int:
+        if mode == "list":
+            return len(manager.get_clients_overview(columns=["all"]))
+        return sum(
+            len(page) for page in manager.iter_clients_overview_pages(columns=["all"])
+        )
+
+    tracemalloc.start()
+    try:
+        assert count_rows() == 3000
+        benchmark.extra_info["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    benchmark(count_rows)
+
+
+@pytest.mark.parametrize("mode", ["python", "sql"])
+def test_db_overview_first_page(benchmark, tmp_path, mock_config, mode):
+    """Benchmark the first 50 active clients of 2000, sorted by school."""
+    encr.set_keys([Fernet.generate_key()])
+
+    database_url = f"sqlite:///{tmp_path / 'benchmark.sqlite'}"
+    upgrade_db(database_url)
+    manager = ClientsManager(database_url=database_url)
+    manager.add_clients(
+        [
+            {
+                "school": ("FirstSchool", "SecondSchool")[i % 2],
+                "gender_encr": "f",
+                "class_name_encr": "11TKKG",
+                "first_name_encr": f"Erika_{i}",
+                "last_name_encr": "Mustermann",
+                "birthday_encr": "2000-12-24",
+                "case_active": i % 3 != 0,
+            }
+            for i in range(2000)
+        ],
+        strict=True,
+    )
+
+    def first_page() -> list[dict]:
+        if mode == "python":
+            rows = [row for row in manager.get_clients_overview() if row["case_active"]]
+            rows.sort(key=lambda row: (row["school"], row["client_id"]))
+            return rows[:50]
+        return manager.get_clients_overview(
+            active_only=True, order_by=["school"], limit=50
+        )
+
+    result = benchmark(first_page)
+    assert len(result) == 50
+
+
+@pytest.mark.parametrize("overview_cache", [False, True], ids=["decrypt", "cached"])
+def test_db_overview_cache(benchmark, tmp_path, mock_config, overview_cache):
+    """Benchmark loading an unchanged overview of 2000 clients."""
+    encr.set_keys([Fernet.generate_key()])
+
+    database_url = f"sqlite:///{tmp_path / 'benchmark.sqlite'}"
+    upgrade_db(database_url)
+    manager = ClientsManager(database_url=database_url)
+    manager.add_clients(
+        [
+            {
+                "school": "FirstSchool",
+                "gender_encr": "f",
+                "class_name_encr": "11TKKG",
+                "first_name_encr": f"Erika_{i}",
+                "last_name_encr": "Mustermann",
+                "birthday_encr": "2000-12-24",
+            }
+            for i in range(2000)
+        ],
+        strict=True,
+    )
+    config.core.overview_cache = overview_cache
+    manager.get_clients_overview(columns="all")
+
+    result = benchmark(manager.get_clients_overview, columns="all")
+    assert len(result) == 2000
+
+
+@pytest.mark.parametrize("manager_type", ["thread", "async"])
+def test_db_overview_event_loop(benchmark, tmp_path, mock_config, manager_type):
+    """Benchmark loading an overview of 2000 clients from an event loop.
+
+    "thread" runs the synchronous manager in a worker thread, as the TUI did
+    before the asyncio manager. The longest time the event loop could not
+    run, during one load, is in extra_info.
+    """
+    encr.set_keys([Fernet.generate_key()])
+
+    database_url = f"sqlite:///{tmp_path / 'benchmark.sqlite'}"
+    upgrade_db(database_url)
+    manager = ClientsManager(database_url=database_url)
+    manager.add_clients(
+        [
+            {
+                "school": "FirstSchool",
+                "gender_encr": "f",
+                "class_name_encr": "11TKKG",
+                "first_name_encr": f"Erika_{i}",
+                "last_name_encr": "Mustermann",
+                "birthday_encr": "2000-12-24",
+                "notes_encr": "Notizen " * 20,
+            }
+            for i in range(2000)
+        ],
+        strict=True,
+    )
+
+    async def load() -> tuple[int, float]:
+        stalls = [0.0]
+        done = asyncio.Event()
+
+        async def tick() -> None:
+            while not done.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(0)
+                stalls.append(time.perf_counter() - start)
+
+        ticker = asyncio.create_task(tick())
+        if manager_type == "thread":
+            rows = await asyncio.to_thread(
+                manager.get_clients_overview,
+                columns="all",
+            )
+        else:
+            async_manager = AsyncClientsManager(database_url)
+            rows = [
+                row
+                async for page in async_manager.iter_clients_overview_pages(
+                    columns="all"
+                )
+                for row in page
+            ]
+            await async_manager.dispose()
+        done.set()
+        await ticker
+        return len(rows), max(stalls)
+
+    n_rows, max_stall = asyncio.run(load())
+    assert n_rows == 2000
+    benchmark.extra_info["max_stall_seconds"] = max_stall
+    benchmark(lambda: asyncio.run(load()))
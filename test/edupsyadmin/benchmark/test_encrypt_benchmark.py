@@ -6,6 +6,7 @@ from cryptography.fernet import Fernet
 from edupsyadmin.core.encrypt import Encryption
 
 SECRET_MESSAGE = "This is a secret message"
+N_VALUES = 1000
 
 
 @pytest.fixture
@@ -27,3 +28,81 @@ def test_core_decrypt_string(benchmark, encryption_service):
     """Benchmark the decrypt function."""
     token = encryption_service.encrypt(SECRET_MESSAGE)
     benchmark(encryption_service.decrypt, token)
+
+
+def test_core_encrypt_string_loop(benchmark, encryption_service):
+    """Benchmark encrypting N strings with one encrypt call each."""
+    values = [SECRET_MESSAGE] * N_VALUES
+
+    def run():
+        return [encryption_service.encrypt(value) for value in values]
+
+    benchmark(run)
+
+
+def test_core_encrypt_many(benchmark, encryption_service):
+    """Benchmark encrypting N strings with one encrypt_many call."""
+    values = [SECRET_MESSAGE] * N_VALUES
+    benchmark(encryption_service.encrypt_many, values)
+
+
+def test_core_decrypt_string_loop(benchmark, encryption_service):
+    """Benchmark decrypting N tokens with one decrypt call each."""
+    tokens = encryption_service.encrypt_many([SECRET_MESSAGE] * N_VALUES)
+
+    def run():
+        return [encryption_service.decrypt(token) for token in tokens]
+
+    benchmark(run)
+
+
+def test_core_decrypt_many(benchmark, encryption_service):
+    """Benchmark decrypting N tokens with one decrypt_many call."""
+    tokens = encryption_service.encrypt_many([SECRET_MESSAGE] * N_VALUES)
+    benchmark(encryption_service.decrypt_many, tokens)
+
+
+@pytest.mark.parametrize("n_keys", [1, 2, 3, 4, 5])
+def test_core_decrypt_oldest_key_untagged(benchmark, n_keys):
+    """Benchmark decrypting a legacy (untagged) token from the oldest key."""
+    keys = [Fernet.generate_key() for _ in range(n_keys)]
+    encr = Encryption()
+    encr.set_keys(keys)
+    token = Fernet(keys[-1]).encrypt(SECRET_MESSAGE.encode()).decode()
+    benchmark(encr.decrypt, token)
+
+
+@pytest.mark.parametrize("n_keys", [1, 2, 3, 4, 5])
+def test_core_decrypt_oldest_key_tagged(benchmark, n_keys):
+    """Benchmark decrypting a key-id tagged token from the oldest key."""
+    keys = [Fernet.generate_key() for _ in range(n_keys)]
+    encr = Encryption()
+    encr.set_keys([keys[-1]])
+    token = encr.encrypt(SECRET_MESSAGE)
+    encr.set_keys(keys)
+    benchmark(encr.decrypt, token)
+
+
+@pytest.mark.parametrize("payload_size", [16, 256, 4096, 65536])
+@pytest.mark.parametrize("suite", ["fernet", "aes-gcm", "chacha20-poly1305"])
+@pytest.mark.parametrize("operation", ["encrypt", "decrypt"])
+def test_core_cipher_suites(benchmark, operation, suite, payload_size):
+    """Benchmark N binary tokens per cipher suite and payload size in bytes."""
+    encr = Encryption()
+    encr.set_keys([Fernet.generate_key()])
+    encr.set_cipher_suite(suite)
+    values = ["x" * payload_size] * N_VALUES
+    benchmark.extra_info["token_bytes"] = len(encr.encrypt_binary(values[0]))
+
+    if operation == "encrypt":
+
+        def run():
+            return [encr.encrypt_binary(value) for value in values]
+
+    else:
+        tokens = [encr.encrypt_binary(value) for value in values]
+
+        def run():
+            return encr.decrypt_many(tokens)
+
+    benchmark(run)
@@ -0,0 +1,43 @@
+"""Benchmark the database work a command does at startup."""
+
+import pytest
+from sqlalchemy import Engine, event
+
+from edupsyadmin.api import managers, migration
+from edupsyadmin.api.managers import ClientsManager
+from edupsyadmin.api.migration import upgrade_db
+from edupsyadmin.core.encrypt import get_salt_from_db
+from edupsyadmin.db import engine as engine_module
+from edupsyadmin.db.engine import create_db_engine, dispose_engines
+
+
+@pytest.mark.parametrize("engines", ["separate", "shared"])
+def test_db_startup(benchmark, tmp_path, mock_config, monkeypatch, engines):
+    """Benchmark the migration check, salt lookup and first manager query of
+    a command; the number of new connections is reported as ``connects``."""
+    database_url = f"sqlite:///{tmp_path / 'benchmark.sqlite'}"
+    upgrade_db(database_url)
+    if engines == "separate":
+        # every caller creates its own engine, as before the shared engines
+        for module in (managers, migration, engine_module):
+            monkeypatch.setattr(module, "get_engine", create_db_engine)
+
+    connects = []
+
+    def count_connect(_dbapi_connection, _connection_record) -> None:
+        connects.append(1)
+
+    def startup() -> None:
+        dispose_engines()
+        upgrade_db(database_url)
+        get_salt_from_db(database_url)
+        ClientsManager(database_url).get_total_count()
+
+    event.listen(Engine, "connect", count_connect)
+    try:
+        benchmark(startup)
+    finally:
+        event.remove(Engine, "connect", count_connect)
+    # without stats (--benchmark-disable), startup ran once
+    rounds = benchmark.stats.stats.rounds if benchmark.enabled else 1
+    benchmark.extra_info["connects"] = len(connects) / rounds
@@ -2,7 +2,10 @@
 
 import pytest
 
-from edupsyadmin.core.encrypt import derive_key_from_password
+from edupsyadmin.core.encrypt import (
+    calibrate_kdf_iterations,
+    derive_key_from_password,
+)
 
 
 @pytest.mark.parametrize("iterations", [480_000, 800_000, 1_200_000])
@@ -19,3 +22,14 @@ def test_core_pbkdf2_key_derivation(benchmark, iterations):
         )
 
     benchmark(run_derivation)
+
+
+@pytest.mark.parametrize("target_seconds", [0.25, 0.5, 1.0])
+def test_core_kdf_calibration(benchmark, target_seconds):
+    """Benchmark the calibration; the chosen iterations are in extra_info."""
+    iterations = benchmark.pedantic(
+        calibrate_kdf_iterations,
+        kwargs={"target_seconds": target_seconds, "min_iterations": 1},
+        rounds=3,
+    )
+    benchmark.extra_info["iterations"] = iterations
@@ -0,0 +1,55 @@
+"""Benchmark loading the encryption keys from a slow keyring backend."""
+
+import time
+
+import keyring
+import pytest
+from cryptography.fernet import Fernet
+
+from edupsyadmin.core.encrypt import (
+    _get_indexed_keys,
+    clear_key_cache,
+    get_keys_from_keyring,
+    set_keys_in_keyring,
+)
+
+UID = "benchmark_uid"
+USERNAME = "benchmark_user"
+KEYRING_LATENCY = 0.02  # seconds per call, e.g. a password manager backend
+
+
+@pytest.mark.parametrize("storage", ["indexed", "single", "cached"])
+def test_core_get_keys_from_keyring(benchmark, monkeypatch, storage):
+    """Benchmark loading 3 keys at startup; the number of keyring calls is
+    reported as ``keyring_calls``."""
+    keys = [Fernet.generate_key() for _ in range(3)]
+    if storage == "indexed":
+        # The format used before all keys were stored in a single entry
+        keyring.set_password(f"{UID}_key_count", USERNAME, str(len(keys)))
+        for idx, key in enumerate(keys):
+            keyring.set_password(f"{UID}_key_{idx}", USERNAME, key.decode())
+    else:
+        set_keys_in_keyring(UID, USERNAME, keys)
+
+    calls = []
+    get_password = keyring.get_password
+
+    def slow_get_password(service, username):
+        calls.append(service)
+        time.sleep(KEYRING_LATENCY)
+        return get_password(service, username)
+
+    monkeypatch.setattr(keyring, "get_password", slow_get_password)
+
+    def load_keys():
+        if storage == "indexed":
+            return _get_indexed_keys(UID, USERNAME)
+        if storage == "single":
+            clear_key_cache()
+        return get_keys_from_keyring(UID, USERNAME)
+
+    assert load_keys() == keys
+    calls.clear()
+    load_keys()
+    benchmark.extra_info["keyring_calls"] = len(calls)
+    benchmark.pedantic(load_keys, rounds=10)
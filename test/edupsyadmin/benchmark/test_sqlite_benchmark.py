@@ -0,0 +1,149 @@
+"""Benchmark write and read throughput with different SQLite engine profiles."""
+
+import pytest
+from cryptography.fernet import Fernet
+
+from edupsyadmin.api.managers import ClientsManager
+from edupsyadmin.api.migration import re_encrypt_all_data, upgrade_db
+from edupsyadmin.core.config import SqliteConfig, config
+from edupsyadmin.core.encrypt import encr
+from edupsyadmin.db import clients as clients_db
+
+# "default": SQLite's own defaults, as used before the engine profile existed
+PROFILES = {
+    "default": SqliteConfig(
+        journal_mode="delete",
+        synchronous="full",
+        mmap_size=0,
+        cache_size=-2000,
+        temp_store="default",
+        busy_timeout=5000,
+    ),
+    "tuned": SqliteConfig(),
+}
+
+
+def _manager(tmp_path, profile: str) -> ClientsManager:
+    encr.set_keys([Fernet.generate_key()])
+    config.core.sqlite = PROFILES[profile]
+    database_url = f"sqlite:///{tmp_path / 'benchmark.sqlite'}"
+    upgrade_db(database_url)
+    return ClientsManager(database_url=database_url)
+
+
+def _add_clients(manager: ClientsManager, n: int) -> None:
+    for i in range(n):
+        manager.add_client(
+            school="FirstSchool",
+            gender_encr="f",
+            class_name_encr="11TKKG",
+            first_name_encr="Erika",
+            last_name_encr=f"Mustermann_{i}",
+            birthday_encr="2000-12-24",
+        )
+
+
+@pytest.mark.parametrize("profile", list(PROFILES))
+def test_db_sqlite_write(benchmark, tmp_path, mock_config, profile):
+    """Benchmark adding 50 clients, one commit each."""
+    manager = _manager(tmp_path, profile)
+    benchmark(_add_clients, manager, 50)
+
+
+@pytest.mark.parametrize("profile", list(PROFILES))
+def test_db_sqlite_read(benchmark, tmp_path, mock_config, profile):
+    """Benchmark reading an overview of 1000 clients."""
+    manager = _manager(tmp_path, profile)
+    _add_clients(manager, 1000)
+
+    result = benchmark(manager.get_clients_overview)
+    assert len(result) == 1000
+
+
+@pytest.mark.parametrize("method", ["add_client", "add_clients"])
+def test_db_add_class(benchmark, tmp_path, mock_config, method):
+    """Benchmark adding a class of 30 clients, one by one or in one batch."""
+    manager = _manager(tmp_path, "tuned")
+    rows = [
+        {
+            "school": "FirstSchool",
+            "gender_encr": "f",
+            "class_name_encr": "11TKKG",
+            "first_name_encr": "Erika",
+            "last_name_encr": f"Mustermann_{i}",
+            "birthday_encr": "2000-12-24",
+        }
+        for i in range(30)
+    ]
+
+    def add_class() -> None:
+        if method == "add_clients":
+            manager.add_clients(rows, strict=True)
+        else:
+            for row in rows:
+                manager.add_client(**row)
+
+    benchmark(add_class)
+
+
+@pytest.mark.parametrize("path", ["orm", "set_based"])
+def test_db_edit_class(benchmark, tmp_path, mock_config, monkeypatch, path):
+    """Benchmark switching on a Nachteilsausgleich for 200 clients."""
+    manager = _manager(tmp_path, "tuned")
+    manager.add_clients(
+        {
+            "school": "FirstSchool",
+            "gender_encr": "f",
+            "class_name_encr": "11TKKG",
+            "first_name_encr": "Erika",
+            "last_name_encr": f"Mustermann_{i}",
+            "birthday_encr": "2000-12-24",
+        }
+        for i in range(200)
+    )
+    client_ids = list(range(1, 201))
+    if path == "orm":
+        monkeypatch.setattr(clients_db, "SET_BASED_UPDATE_COLUMNS", frozenset())
+
+    values = iter([True, False] * 1000)
+    benchmark(lambda: manager.edit_client(client_ids, {"nta_font": next(values)}))
+
+
+@pytest.mark.parametrize("envelope_encryption", [False, True])
+def test_db_edit_notes(benchmark, tmp_path, mock_config, envelope_encryption):
+    """Benchmark changing an encrypted field of 200 clients."""
+    config.core.envelope_encryption = envelope_encryption
+    manager = _manager(tmp_path, "tuned")
+    manager.add_clients(
+        {
+            "school": "FirstSchool",
+            "gender_encr": "f",
+            "class_name_encr": "11TKKG",
+            "first_name_encr": "Erika",
+            "last_name_encr": f"Mustermann_{i}",
+            "birthday_encr": "2000-12-24",
+        }
+        for i in range(200)
+    )
+    client_ids = list(range(1, 201))
+
+    notes = (f"Notiz {i}" for i in range(10_000))
+    benchmark(lambda: manager.edit_client(client_ids, {"notes_encr": next(notes)}))
+
+
+@pytest.mark.parametrize("envelope_encryption", [False, True])
+def test_db_rotate_key(
+    benchmark, tmp_path, mock_config, monkeypatch, envelope_encryption
+):
+    """Benchmark re-encrypting 1000 clients with a new primary key."""
+    monkeypatch.setattr(config.core, "envelope_encryption", envelope_encryption)
+    manager = _manager(tmp_path, "tuned")
+    _add_clients(manager, 1000)
+    encr.set_keys([Fernet.generate_key(), *encr._keys])
+
+    def rotate():
+        with manager.Session() as session:
+            return re_encrypt_all_data(session)
+
+    stats = benchmark(rotate)
+    assert stats.rows == 1000
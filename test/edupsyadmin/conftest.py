@@ -24,9 +24,10 @@ from edupsyadmin.api.managers import ClientsManager
 from edupsyadmin.api.migration import upgrade_db
 from edupsyadmin.api.types import ClientRecord
 from edupsyadmin.core.config import config
-from edupsyadmin.core.encrypt import encr
+from edupsyadmin.core.encrypt import clear_key_cache, encr
 from edupsyadmin.core.logger import Logger, logger
 from edupsyadmin.db import Base
+from edupsyadmin.db.engine import dispose_engines
 
 TEST_USERNAME = "test_user_do_not_use"
 TEST_UID = "example.com"
@@ -40,6 +41,8 @@ def _reset_globals():
     yield
     config._instance = None
     encr._fernet = None
+    clear_key_cache()
+    dispose_engines()
 
 
 @pytest.fixture(autouse=True)
@@ -1,11 +1,13 @@
 """Test suite for the core.config module."""
 
 from pathlib import Path
+from typing import get_args
 
 import pytest
 from pydantic import ValidationError
 
-from edupsyadmin.core.config import AppConfig, config
+from edupsyadmin.core.ciphers import CIPHER_SUITES
+from edupsyadmin.core.config import AppConfig, CipherSuiteName, config
 
 # A minimal, valid config
 valid_config_content = """
@@ -118,3 +120,37 @@ def test_load_invalid_config_wrong_type(tmp_path):
     # Check that the error message points to the right field
     assert "school.TestSchool.nstudents" in str(excinfo.value)
     assert "Input should be a valid integer" in str(excinfo.value)
+
+
+def test_sqlite_config(tmp_path: Path):
+    """The sqlite subsection has defaults and rejects unknown PRAGMA values."""
+    config_path = tmp_path / "config.yml"
+    config_path.write_text(valid_config_content, encoding="utf-8")
+    config.load(config_path)
+    assert config.core.sqlite.journal_mode == "wal"
+
+    config_path.write_text(
+        valid_config_content.replace(
+            "core:\n",
+            "core:\n  sqlite:\n    journal_mode: 'off; DROP TABLE clients'\n",
+        ),
+        encoding="utf-8",
+    )
+    with pytest.raises(ValidationError):
+        config.load(config_path)
+
+
+def test_cipher_suite_config(tmp_path: Path):
+    """The cipher suite must be one of the suites of core.ciphers."""
+    assert get_args(CipherSuiteName) == tuple(CIPHER_SUITES)
+
+    config_path = tmp_path / "config.yml"
+    config_path.write_text(
+        valid_config_content.replace(
+            "core:\n",
+            "core:\n  cipher_suite: aes-gsm\n",
+        ),
+        encoding="utf-8",
+    )
+    with pytest.raises(ValidationError, match=r"core\.cipher_suite"):
+        config.load(config_path)
@@ -1,23 +1,33 @@
 """Test suite for the core.encrypt module."""
 
 import contextlib
+import json
 import os
+import time
 from pathlib import Path
 
 import keyring
 import keyring.errors
 import pytest
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken
 
 # Import the class, the global instance, and helper functions
 from edupsyadmin.core.encrypt import (
+    KDF_CALIBRATION_ITERATIONS,
+    KDF_MIN_ITERATIONS,
+    KEY_CACHE_SECONDS,
     Encryption,
+    calibrate_kdf_iterations,
     check_key_validity,
+    clear_key_cache,
     derive_key_from_password,
     encr,  # The global instance
     get_keys_from_keyring,
+    key_id,
     load_or_create_salt,
     set_keys_in_keyring,
+    token_from_binary,
+    token_to_binary,
 )
 
 # Constants for testing
@@ -98,6 +108,225 @@ class TestEncryptionUnit:
         with pytest.raises(ValueError, match="Key list cannot be empty"):
             local_encr.set_keys([])
 
+    def test_encrypt_many_decrypt_many_roundtrip(self, generated_key_list):
+        local_encr = Encryption()
+        local_encr.set_keys(generated_key_list)
+        values = ["", "Äöü", "hello", "a" * 500]
+
+        tokens = local_encr.encrypt_many(values)
+        assert len(tokens) == len(values)
+        assert [local_encr.decrypt(token) for token in tokens] == values
+        assert local_encr.decrypt_many(tokens) == values
+
+    def test_decrypt_many_with_old_keys(self, generated_key_list):
+        local_encr = Encryption()
+        key_new, _, key_old = generated_key_list
+        local_encr.set_keys(generated_key_list)
+
+        tokens = [
+            Fernet(key_old).encrypt(b"old").decode(),
+            local_encr.encrypt("new"),
+            Fernet(key_new).encrypt(b"newest").decode(),
+        ]
+        assert local_encr.decrypt_many(tokens) == ["old", "new", "newest"]
+
+    def test_tokens_are_tagged_with_primary_key_id(self, generated_key_list):
+        local_encr = Encryption()
+        local_encr.set_keys(generated_key_list)
+
+        token = local_encr.encrypt("hello")
+        prefix, kid, fernet_token = token.split(".")
+        assert prefix == "f1"
+        assert kid == key_id(generated_key_list[0])
+        # The payload is a regular Fernet token
+        assert Fernet(generated_key_list[0]).decrypt(fernet_token.encode()) == (
+            b"hello"
+        )
+
+    def test_tagged_token_uses_only_its_key(self, generated_key_list, monkeypatch):
+        local_encr = Encryption()
+        key_old = generated_key_list[-1]
+        local_encr.set_keys([key_old])
+        old_token = local_encr.encrypt("old data")
+
+        local_encr.set_keys(generated_key_list)
+        # MultiFernet is only the fallback for untagged tokens
+        monkeypatch.setattr(
+            local_encr._fernet,
+            "decrypt",
+            lambda _: pytest.fail("MultiFernet fallback was used"),
+        )
+        assert local_encr.decrypt(old_token) == "old data"
+        assert local_encr.decrypt_many([old_token]) == ["old data"]
+
+    def test_tagged_token_with_unknown_key_fails(self, generated_key_list):
+        local_encr = Encryption()
+        key_new, _, key_old = generated_key_list
+        local_encr.set_keys([key_old])
+        old_token = local_encr.encrypt("old data")
+
+        local_encr.set_keys([key_new])
+        with pytest.raises(InvalidToken):
+            local_encr.decrypt(old_token)
+
+    def test_binary_tokens(self, generated_key_list):
+        local_encr = Encryption()
+        local_encr.set_keys([generated_key_list[-1]])
+        old_token = local_encr.encrypt_binary("old data")
+        local_encr.set_keys(generated_key_list)
+        new_token = local_encr.encrypt_binary("Äöü")
+
+        assert new_token[:1] == b"\x01"
+        assert new_token[1:5].hex() == key_id(generated_key_list[0])
+        assert local_encr.decrypt(new_token) == "Äöü"
+        assert local_encr.decrypt_many([old_token, new_token]) == ["old data", "Äöü"]
+
+    def test_is_primary_token(self, generated_key_list):
+        local_encr = Encryption()
+        local_encr.set_keys([generated_key_list[-1]])
+        old_tokens = [local_encr.encrypt("old"), local_encr.encrypt_binary("old")]
+        local_encr.set_keys(generated_key_list)
+        local_encr.set_cipher_suite("aes-gcm")
+        new_tokens = [local_encr.encrypt("new"), local_encr.encrypt_binary("new")]
+        untagged = Fernet(generated_key_list[0]).encrypt(b"legacy").decode()
+
+        assert local_encr.primary_key_id == key_id(generated_key_list[0])
+        assert all(local_encr.is_primary_token(token) for token in new_tokens)
+        assert not any(local_encr.is_primary_token(token) for token in old_tokens)
+        assert not local_encr.is_primary_token(untagged)
+        assert not local_encr.is_primary_token(token_to_binary(untagged))
+
+    def test_token_binary_conversion(self, generated_key_list):
+        local_encr = Encryption()
+        local_encr.set_keys(generated_key_list)
+        tagged = local_encr.encrypt("tagged")
+        untagged = Fernet(generated_key_list[1]).encrypt(b"untagged").decode()
+
+        for token, plaintext in [(tagged, "tagged"), (untagged, "untagged")]:
+            binary = token_to_binary(token)
+            assert len(binary) < len(token)
+            assert local_encr.decrypt(binary) == plaintext
+            assert token_from_binary(binary) == token
+        assert token_to_binary("") == b""
+        assert token_from_binary(b"") == ""
+
+    @pytest.mark.parametrize(
+        ("suite", "prefix", "version"),
+        [
+            ("fernet", "f1.", b"\x01"),
+            ("aes-gcm", "g1.", b"\x02"),
+            ("chacha20-poly1305", "c1.", b"\x03"),
+        ],
+    )
+    def test_cipher_suites(self, generated_key_list, suite, prefix, version):
+        local_encr = Encryption()
+        local_encr.set_keys([generated_key_list[-1]])
+        local_encr.set_cipher_suite(suite)
+        old_token = local_encr.encrypt("old data")
+        local_encr.set_keys(generated_key_list)
+
+        token = local_encr.encrypt("Äöü")
+        binary = local_encr.encrypt_binary("Äöü")
+        assert token.startswith(f"{prefix}{key_id(generated_key_list[0])}.")
+        assert binary[:1] == version
+        assert local_encr.decrypt(token) == "Äöü"
+        assert local_encr.decrypt(binary) == "Äöü"
+        assert local_encr.decrypt(old_token) == "old data"
+        assert token_to_binary(old_token)[:1] == version
+        assert token_from_binary(token_to_binary(old_token)) == old_token
+
+    def test_mixed_cipher_suites(self, generated_key_list):
+        local_encr = Encryption()
+        local_encr.set_keys(generated_key_list)
+        tokens = [Fernet(generated_key_list[1]).encrypt(b"untagged").decode()]
+        for suite in ("fernet", "aes-gcm", "chacha20-poly1305"):
+            local_encr.set_cipher_suite(suite)
+            tokens += [local_encr.encrypt(suite), local_encr.encrypt_binary(suite)]
+
+        local_encr.set_cipher_suite("fernet")
+        assert local_encr.decrypt_many(tokens) == [
+            "untagged",
+            *(s for s in ("fernet", "aes-gcm", "chacha20-poly1305") for _ in "tb"),
+        ]
+
+    @pytest.mark.parametrize("suite", ["aes-gcm", "chacha20-poly1305"])
+    def test_aead_token_tampering_fails(self, generated_key_list, suite):
+        local_encr = Encryption()
+        local_encr.set_keys(generated_key_list)
+        local_encr.set_cipher_suite(suite)
+        token = bytearray(local_encr.encrypt_binary("secret"))
+        token[-1] ^= 1
+        with pytest.raises(InvalidToken):
+            local_encr.decrypt(bytes(token))
+        with pytest.raises(InvalidToken):
+            local_encr.decrypt(bytes(token[:10]))
+
+        # Without the key, every key of the suite is tried and fails
+        token = local_encr.encrypt("secret")
+        local_encr.set_keys(generated_key_list[1:])
+        with pytest.raises(InvalidToken):
+            local_encr.decrypt(token)
+
+    def test_blind_index(self, generated_key_list):
+        local_encr = Encryption()
+        local_encr.set_keys(generated_key_list[1:])
+        old_index = local_encr.blind_index("Müller")
+        local_encr.set_keys(generated_key_list)
+
+        index = local_encr.blind_index("Müller")
+        assert len(index) == 16
+        # case, Unicode form and whitespace do not matter
+        assert local_encr.blind_index("  MÜLLER ") == index
+        assert local_encr.blind_index("Mu\u0308ller") == index
+        assert local_encr.blind_index("Mueller") != index
+        assert local_encr.blind_indexes("Müller")[0] == index
+        assert old_index in local_encr.blind_indexes("Müller")
+        assert old_index != index
+
+    def test_unknown_cipher_suite(self):
+        with pytest.raises(ValueError, match="Unknown cipher suite"):
+            Encryption().set_cipher_suite("rot13")
+
+    @pytest.mark.parametrize("use_processes", [False, True], ids=["threads", "procs"])
+    def test_decrypt_many_parallel(self, generated_key_list, use_processes):
+        local_encr = Encryption()
+        local_encr.set_keys([generated_key_list[-1]])
+        old_tokens = local_encr.encrypt_many([f"old {i}" for i in range(1000)])
+        local_encr.set_keys(generated_key_list)
+        new_tokens = local_encr.encrypt_many([f"new {i}" for i in range(1000)])
+
+        local_encr.set_parallelism(workers=2, use_processes=use_processes)
+        try:
+            plaintexts = local_encr.decrypt_many(old_tokens + new_tokens)
+            assert local_encr._executor is not None
+        finally:
+            local_encr.shutdown_workers()
+
+        # Chunks are reassembled in input order
+        assert plaintexts == [f"old {i}" for i in range(1000)] + [
+            f"new {i}" for i in range(1000)
+        ]
+
+    def test_set_keys_stops_workers(self, generated_key_list):
+        local_encr = Encryption()
+        local_encr.set_keys(generated_key_list)
+        local_encr.set_parallelism(workers=2, use_processes=True)
+        local_encr.decrypt_many(local_encr.encrypt_many(["x"] * 2000))
+        assert local_encr._executor is not None
+
+        # Workers received the old keys, so they must not be reused
+        local_encr.set_keys(generated_key_list[:1])
+        assert local_encr._executor is None
+
+    def test_batch_methods_uninitialized(self):
+        local_encr = Encryption()
+        with pytest.raises(RuntimeError, match="Encryption keys not set"):
+            local_encr.encrypt_many(["test"])
+        with pytest.raises(RuntimeError, match="Encryption keys not set"):
+            local_encr.encrypt_binary_many(["test"])
+        with pytest.raises(RuntimeError, match="Encryption keys not set"):
+            local_encr.decrypt_many(["test"])
+
 
 class TestGlobalEncryptionInstance:
     """Tests specifically for the global 'encr' singleton."""
@@ -152,6 +381,59 @@ class TestKeyHelpers:
         assert len(retrieved_keys) == 1
         assert retrieved_keys[0] == generated_key
 
+    def test_keyring_single_entry(self, generated_key_list, monkeypatch):
+        set_keys_in_keyring(TEST_UID, TEST_USER, generated_key_list)
+        assert keyring.get_password(f"{TEST_UID}_key_count", TEST_USER) is None
+        clear_key_cache()
+
+        calls = []
+        get_password = keyring.get_password
+        monkeypatch.setattr(
+            keyring,
+            "get_password",
+            lambda *args: calls.append(args) or get_password(*args),
+        )
+        assert get_keys_from_keyring(TEST_UID, TEST_USER) == generated_key_list
+        assert calls == [(f"{TEST_UID}_keys", TEST_USER)]
+
+    def test_keyring_migrates_indexed_format(self, generated_key_list):
+        keyring.set_password(f"{TEST_UID}_key_count", TEST_USER, "3")
+        for idx, key in enumerate(generated_key_list):
+            keyring.set_password(f"{TEST_UID}_key_{idx}", TEST_USER, key.decode())
+
+        assert get_keys_from_keyring(TEST_UID, TEST_USER) == generated_key_list
+        assert keyring.get_password(f"{TEST_UID}_keys", TEST_USER)
+        assert keyring.get_password(f"{TEST_UID}_key_count", TEST_USER) is None
+        assert keyring.get_password(f"{TEST_UID}_key_0", TEST_USER) is None
+        clear_key_cache()
+        assert get_keys_from_keyring(TEST_UID, TEST_USER) == generated_key_list
+
+    def test_keyring_cache(self, generated_key_list, monkeypatch):
+        set_keys_in_keyring(TEST_UID, TEST_USER, generated_key_list[:1])
+        keyring.delete_password(f"{TEST_UID}_keys", TEST_USER)
+        assert get_keys_from_keyring(TEST_UID, TEST_USER) == generated_key_list[:1]
+
+        # Writing updates the cache
+        set_keys_in_keyring(TEST_UID, TEST_USER, generated_key_list)
+        keyring.delete_password(f"{TEST_UID}_keys", TEST_USER)
+        assert get_keys_from_keyring(TEST_UID, TEST_USER) == generated_key_list
+
+        # Cached keys expire
+        now = time.monotonic()
+        monkeypatch.setattr(
+            "edupsyadmin.core.encrypt.time.monotonic",
+            lambda: now + KEY_CACHE_SECONDS + 1,
+        )
+        assert get_keys_from_keyring(TEST_UID, TEST_USER) == []
+
+    def test_keyring_unknown_format_version(self, generated_key):
+        keyring.set_password(
+            f"{TEST_UID}_keys",
+            TEST_USER,
+            json.dumps({"version": 99, "keys": [generated_key.decode()]}),
+        )
+        assert get_keys_from_keyring(TEST_UID, TEST_USER) == []
+
     def test_keyring_missing_key(self):
         # Clean up any potential key from other tests
         with contextlib.suppress(keyring.errors.PasswordDeleteError):
@@ -172,6 +454,29 @@ class TestKeyHelpers:
         key_diff = derive_key_from_password(TEST_PASSWORD, salt_diff, iterations)
         assert key1 != key_diff
 
+    @pytest.mark.parametrize(
+        ("elapsed", "expected"),
+        [
+            (0.1, 500000),  # 50000 iterations in 0.1 s -> 500000 in 1 s
+            (0.033, 1510000),  # rounded down to a multiple of 10000
+            (0.5, KDF_MIN_ITERATIONS),  # slow machines get the security floor
+        ],
+    )
+    def test_calibrate_kdf_iterations(self, monkeypatch, elapsed, expected):
+        derived = []
+        monkeypatch.setattr(
+            "edupsyadmin.core.encrypt.derive_key_from_password",
+            lambda _password, _salt, iterations: derived.append(iterations),
+        )
+        # Three rounds; the fastest one counts
+        clock = iter([0.0, elapsed * 2, 10.0, 10.0 + elapsed, 20.0, 21.0])
+        monkeypatch.setattr(
+            "edupsyadmin.core.encrypt.time.perf_counter", lambda: next(clock)
+        )
+
+        assert calibrate_kdf_iterations(target_seconds=1.0) == expected
+        assert derived == [KDF_CALIBRATION_ITERATIONS] * 3
+
 
 def test_full_workflow(temp_salt_file):
     """
@@ -1,11 +1,13 @@
 from datetime import date
 
 import pytest
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import Session
 
 from edupsyadmin.api.migration import upgrade_db
-from edupsyadmin.db.clients import Client
+from edupsyadmin.core.config import config
+from edupsyadmin.core.encrypt import encr
+from edupsyadmin.db.clients import Client, load_clients_deferred
 
 
 @pytest.fixture(autouse=True)
@@ -149,3 +151,136 @@ def test_to_date_or_none():
         to_date_or_none("01.01.2023")
     with pytest.raises(TypeError):
         to_date_or_none(123)  # ty: ignore[invalid-argument-type]
+
+
+def _add_client(session: Session) -> Client:
+    client = Client(
+        school="FirstSchool",
+        gender_encr="f",
+        class_name_encr="7a",
+        first_name_encr="Erika",
+        last_name_encr="Mustermann",
+        birthday_encr=date(2012, 3, 4),
+    )
+    session.add(client)
+    session.commit()
+    return client
+
+
+def test_update_recalculates_only_affected_fields(tmp_path, monkeypatch):
+    db_url = f"sqlite:///{tmp_path / 'test.sqlite'}"
+    upgrade_db(db_url)
+
+    engine = create_engine(db_url)
+    statements = []
+
+    def record(_conn, _cursor, statement, *_args) -> None:
+        statements.append(statement)
+
+    with Session(engine) as session:
+        client = _add_client(session)
+        graduation = client.estimated_graduation_date_encr
+        assert graduation is not None
+
+        def fail(*args, **kwargs):
+            raise AssertionError("the dates do not depend on nta_font")
+
+        monkeypatch.setattr(
+            "edupsyadmin.db.clients.get_estimated_end_of_academic_year", fail
+        )
+        event.listen(engine, "before_cursor_execute", record)
+        client.nta_font = True
+        session.commit()
+        event.remove(engine, "before_cursor_execute", record)
+        monkeypatch.undo()
+
+        (update,) = [s for s in statements if s.startswith("UPDATE")]
+        assert "_encr" not in update
+        assert "_bidx" not in update
+        assert client.nachteilsausgleich is True
+        assert client.estimated_graduation_date_encr == graduation
+
+        # changing an input recalculates its derived fields
+        client.class_name_encr = "9a"
+        session.commit()
+        assert client.class_int_encr == 9
+        assert client.estimated_graduation_date_encr < graduation
+
+        # derived fields cannot be set on their own
+        client.nachteilsausgleich = False
+        client.document_shredding_date_encr = None
+        session.commit()
+        assert client.nachteilsausgleich is True
+        assert client.document_shredding_date_encr is not None
+
+
+@pytest.mark.parametrize("envelope_encryption", [False, True])
+def test_load_clients_deferred(tmp_path, monkeypatch, envelope_encryption):
+    monkeypatch.setattr(config.core, "envelope_encryption", envelope_encryption)
+    db_url = f"sqlite:///{tmp_path / 'test.sqlite'}"
+    upgrade_db(db_url)
+    engine = create_engine(db_url)
+    with Session(engine) as session:
+        client_id = _add_client(session).client_id
+
+    decrypted = []
+    decrypt, decrypt_many = encr.decrypt, encr.decrypt_many
+
+    def record(token):
+        decrypted.append(token)
+        return decrypt(token)
+
+    def record_many(tokens):
+        decrypted.extend(tokens)
+        return decrypt_many(tokens)
+
+    monkeypatch.setattr(encr, "decrypt", record)
+    monkeypatch.setattr(encr, "decrypt_many", record_many)
+    with Session(engine) as session:
+        (client,) = load_clients_deferred(session, Client.client_id == client_id)
+        assert decrypted == []
+
+        # decrypted on first access, then kept on the instance
+        assert client.first_name_encr == "Erika"
+        assert client.first_name_encr == "Erika"
+        assert len(decrypted) == 1
+        # a sealed row is unsealed once for all fields
+        assert client.birthday_encr == date(2012, 3, 4)
+        assert len(decrypted) == (1 if envelope_encryption else 2)
+
+        client.notes_encr = "neue Notiz"
+        session.commit()
+
+    with Session(engine) as session:
+        client = session.get(Client, client_id)
+        assert client is not None
+        assert client.notes_encr == "neue Notiz"
+        assert client.last_name_encr == "Mustermann"
+        assert client.class_int_encr == 7
+
+
+def test_load_clients_deferred_switches_storage_mode(tmp_path, monkeypatch):
+    """A sealed row is unsealed before its fields get their own columns."""
+    db_url = f"sqlite:///{tmp_path / 'test.sqlite'}"
+    upgrade_db(db_url)
+    engine = create_engine(db_url)
+    monkeypatch.setattr(config.core, "envelope_encryption", True)
+    with Session(engine) as session:
+        client_id = _add_client(session).client_id
+
+    monkeypatch.setattr(config.core, "envelope_encryption", False)
+    with Session(engine) as session:
+        (client,) = load_clients_deferred(session, Client.client_id == client_id)
+        client.nta_font = True
+        session.commit()
+
+    with Session(engine) as session:
+        sealed, first_name = session.execute(
+            text("SELECT sealed_encr, first_name_encr FROM clients"),
+        ).one()
+        assert sealed is None
+        assert first_name
+        client = session.get(Client, client_id)
+        assert client is not None
+        assert client.first_name_encr == "Erika"
+        assert client.nachteilsausgleich is True
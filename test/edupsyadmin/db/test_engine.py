@@ -0,0 +1,106 @@
+from sqlalchemy import Engine, event, text
+
+from edupsyadmin.api.managers import ClientsManager
+from edupsyadmin.api.migration import upgrade_db
+from edupsyadmin.core.config import SqliteConfig, config
+from edupsyadmin.core.encrypt import get_salt_from_db
+from edupsyadmin.db.engine import create_db_engine, dispose_engines, get_engine
+
+
+def _pragma(engine, name: str):
+    with engine.connect() as conn:
+        return conn.execute(text(f"PRAGMA {name}")).scalar_one()
+
+
+def test_default_pragmas(mock_config, tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'test.sqlite'}")
+
+    assert _pragma(engine, "journal_mode") == "wal"
+    assert _pragma(engine, "synchronous") == 1  # NORMAL
+    assert _pragma(engine, "temp_store") == 2  # MEMORY
+    assert _pragma(engine, "busy_timeout") == 5000
+    assert _pragma(engine, "cache_size") == -64 * 1024
+    assert _pragma(engine, "mmap_size") == 256 * 1024 * 1024
+
+
+def test_custom_pragmas(tmp_path):
+    settings = SqliteConfig(
+        journal_mode="delete",
+        synchronous="full",
+        mmap_size=0,
+        cache_size=500,
+        temp_store="file",
+        busy_timeout=100,
+    )
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'test.sqlite'}", settings)
+
+    assert _pragma(engine, "journal_mode") == "delete"
+    assert _pragma(engine, "synchronous") == 2  # FULL
+    assert _pragma(engine, "temp_store") == 1  # FILE
+    assert _pragma(engine, "busy_timeout") == 100
+    assert _pragma(engine, "cache_size") == 500
+    assert _pragma(engine, "mmap_size") == 0
+
+
+def test_manager_uses_config(mock_config, tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'test.sqlite'}"
+    upgrade_db(database_url)
+    config.core.sqlite.busy_timeout = 1234
+
+    clients_manager = ClientsManager(database_url)
+    assert _pragma(clients_manager.engine, "busy_timeout") == 1234
+
+
+def test_read_during_write(mock_config, tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'test.sqlite'}"
+    upgrade_db(database_url)
+    writer = create_db_engine(database_url)
+    reader = create_db_engine(database_url)
+
+    with writer.begin() as write_conn:
+        write_conn.execute(
+            text("INSERT INTO system_metadata (key, value) VALUES ('a', 'b')"),
+        )
+        # in WAL mode, readers are not blocked by an open write transaction
+        with reader.connect() as read_conn:
+            count = read_conn.execute(
+                text("SELECT count(*) FROM system_metadata WHERE key = 'a'"),
+            ).scalar_one()
+        assert count == 0
+
+
+def test_shared_engine(mock_config, tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'test.sqlite'}"
+    engine = get_engine(database_url)
+    assert get_engine(database_url) is engine
+    assert get_engine(f"sqlite:///{tmp_path / 'other.sqlite'}") is not engine
+
+    # other SQLite settings need another engine
+    config.core.sqlite.busy_timeout = 1234
+    other_engine = get_engine(database_url)
+    assert other_engine is not engine
+    assert _pragma(other_engine, "busy_timeout") == 1234
+
+    dispose_engines(database_url)
+    assert get_engine(database_url) is not other_engine
+
+
+def test_startup_connects_once(mock_config, tmp_path):
+    """Migration check, salt lookup and manager share one connection."""
+    database_url = f"sqlite:///{tmp_path / 'test.sqlite'}"
+    upgrade_db(database_url)
+    dispose_engines()
+
+    connects = []
+
+    def count_connect(_dbapi_connection, _connection_record) -> None:
+        connects.append(1)
+
+    event.listen(Engine, "connect", count_connect)
+    try:
+        upgrade_db(database_url)
+        get_salt_from_db(database_url)
+        ClientsManager(database_url).get_total_count()
+    finally:
+        event.remove(Engine, "connect", count_connect)
+    assert len(connects) == 1
@@ -3,14 +3,28 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import Session
 
 from edupsyadmin.api.migration import upgrade_db
+from edupsyadmin.core.encrypt import (
+    DEFAULT_KDF_ITERATIONS,
+    derive_key_from_password,
+    get_kdf_iterations_from_db,
+    get_salt_from_db,
+    key_id,
+    rederive_stored_key,
+    set_kdf_iterations_in_db,
+)
 from edupsyadmin.db.clients import SystemMetadata
 
 
 @pytest.fixture
-def db_session(tmp_path):
+def db_url(tmp_path):
     db_path = tmp_path / "test_metadata.sqlite"
     db_url = f"sqlite:///{db_path}"
     upgrade_db(db_url)
+    return db_url
+
+
+@pytest.fixture
+def db_session(db_url):
 
     engine = create_engine(db_url)
     with Session(engine) as session:
@@ -44,3 +58,44 @@ def test_system_metadata_crud(db_session):
     db_session.expire_all()
     deleted = db_session.get(SystemMetadata, "test_key")
     assert deleted is None
+
+
+def test_kdf_parameters(db_url):
+    salt = get_salt_from_db(db_url)
+    old_key = derive_key_from_password("old password", salt, 1000)
+    new_key = derive_key_from_password("new password", salt, 2000)
+    set_kdf_iterations_in_db(db_url, key_id(new_key), 1)
+    set_kdf_iterations_in_db(db_url, key_id(new_key), 2000)
+
+    # Keys without stored parameters use the old fixed default
+    assert get_kdf_iterations_from_db(db_url, key_id(old_key)) == (
+        DEFAULT_KDF_ITERATIONS
+    )
+    iterations = get_kdf_iterations_from_db(db_url, key_id(new_key))
+    assert derive_key_from_password("new password", salt, iterations) == new_key
+
+
+def test_rederive_stored_key(db_url):
+    salt = get_salt_from_db(db_url)
+    old_key = derive_key_from_password("old password", salt, 1000)
+    new_key = derive_key_from_password("new password", salt, 2000)
+    set_kdf_iterations_in_db(db_url, key_id(old_key), 1000)
+    set_kdf_iterations_in_db(db_url, key_id(new_key), 2000)
+
+    assert rederive_stored_key("old password", salt, db_url) == old_key
+    assert rederive_stored_key("new password", salt, db_url) == new_key
+    assert rederive_stored_key("other password", salt, db_url) is None
+    # keys that are still in the keyring are not derived again
+    assert (
+        rederive_stored_key("old password", salt, db_url, skip=[key_id(old_key)])
+        is None
+    )
+
+
+def test_kdf_parameters_unknown_algorithm(db_session, db_url):
+    db_session.add(
+        SystemMetadata(key="kdf:0000abcd", value='{"algorithm": "scrypt"}'),
+    )
+    db_session.commit()
+    with pytest.raises(ValueError, match="Unsupported key derivation algorithm"):
+        get_kdf_iterations_from_db(db_url, "0000abcd")
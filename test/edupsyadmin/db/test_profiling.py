@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import text
+
+from edupsyadmin.db.profiling import db_profile
+
+
+@pytest.fixture
+def profile():
+    db_profile.enable()
+    yield db_profile
+    db_profile.disable()
+
+
+def _add_clients(clients_manager, n: int) -> list[int]:
+    return [
+        clients_manager.add_client(
+            school="FirstSchool",
+            gender_encr="f",
+            first_name_encr=f"Name{i}",
+            last_name_encr="Profiled",
+            birthday_encr="2010-01-01",
+            class_name_encr="5a",
+            entry_date_encr="2020-09-01",
+        )
+        for i in range(n)
+    ]
+
+
+def test_statements_and_rows(clients_manager, profile):
+    client_ids = _add_clients(clients_manager, 3)
+    assert profile.statements["INSERT"].count == 3
+    assert profile.statements["INSERT"].rows == 3
+
+    profile.reset()
+    assert len(clients_manager.get_clients_overview()) == 3
+    select = profile.statements["SELECT"]
+    assert select.count >= 1
+    assert select.rows == 3
+    assert 0 < select.max_seconds <= select.total_seconds
+    assert profile.decryption.calls > 0
+    assert profile.decryption.total_seconds > 0
+
+    profile.reset()
+    clients_manager.edit_client(client_ids[:2], {"min_sessions": 30})
+    assert profile.statements["UPDATE"].rows == 2
+    assert profile.total.count == sum(s.count for s in profile.statements.values())
+
+    as_dict = profile.as_dict()
+    assert as_dict["statements"]["UPDATE"]["rows"] == 2
+    assert as_dict["total"]["count"] == profile.total.count
+
+
+def test_disabled(clients_manager):
+    db_profile.reset()
+    _add_clients(clients_manager, 1)
+    clients_manager.get_clients_overview()
+    assert db_profile.statements == {}
+    assert db_profile.decryption.calls == 0
+
+
+def test_fetch_in_chunks(clients_manager, profile):
+    _add_clients(clients_manager, 5)
+    profile.reset()
+    with clients_manager.engine.connect() as conn:
+        result = conn.execute(text("SELECT client_id FROM clients"))
+        assert result.fetchone() is not None
+        assert len(result.fetchmany(2)) == 2
+        assert len(result.fetchall()) == 2
+    assert profile.statements["SELECT"].rows == 5
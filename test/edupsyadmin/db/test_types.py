@@ -8,7 +8,16 @@ from sqlalchemy.orm import Session, declarative_base
 
 from edupsyadmin.core.encrypt import encr
 from edupsyadmin.core.logger import logger as app_logger
-from edupsyadmin.db.clients import EncryptedDate, EncryptedInteger, EncryptedString
+from edupsyadmin.db.column_types import (
+    DecryptionCache,
+    EncryptedBinaryDate,
+    EncryptedBinaryInteger,
+    EncryptedBinaryString,
+    EncryptedDate,
+    EncryptedInteger,
+    EncryptedString,
+    decryption_cache,
+)
 
 Base = declarative_base()
 
@@ -19,6 +28,9 @@ class MockModel(Base):
     enc_int = Column(EncryptedInteger)
     enc_date = Column(EncryptedDate)
     enc_str = Column(EncryptedString)
+    bin_int = Column(EncryptedBinaryInteger)
+    bin_date = Column(EncryptedBinaryDate)
+    bin_str = Column(EncryptedBinaryString)
 
 
 @pytest.fixture
@@ -272,3 +284,146 @@ def test_encrypted_string_none(db_session):
     db_session.expire_all()
     retrieved = db_session.get(MockModel, obj.id)
     assert retrieved.enc_str == ""
+
+
+# Binary column types
+
+
+def test_encrypted_binary_roundtrip(db_session):
+    obj = MockModel(bin_int=42, bin_date=date(2024, 2, 29), bin_str="Äöü")
+    db_session.add(obj)
+    db_session.commit()
+
+    row = db_session.execute(
+        text(f"SELECT bin_int, bin_str, enc_str FROM {MockModel.__tablename__}"),
+    ).one()
+    assert isinstance(row[0], bytes)
+    assert isinstance(row[1], bytes)
+    # the same plaintext takes less space as a binary token
+    assert len(row[1]) < len(encr.encrypt("Äöü"))
+
+    db_session.expire_all()
+    retrieved = db_session.get(MockModel, obj.id)
+    assert retrieved.bin_int == 42
+    assert retrieved.bin_date == date(2024, 2, 29)
+    assert retrieved.bin_str == "Äöü"
+
+
+def test_encrypted_binary_none(db_session):
+    obj = MockModel(bin_int=None, bin_date=None, bin_str=None)
+    db_session.add(obj)
+    db_session.commit()
+
+    db_session.expire_all()
+    retrieved = db_session.get(MockModel, obj.id)
+    assert retrieved.bin_int is None
+    assert retrieved.bin_date is None
+    assert retrieved.bin_str == ""
+
+
+def test_decrypt_many_binary_tokens(db_session):
+    tokens = [encr.encrypt_binary("7"), None, encr.encrypt_binary("")]
+    assert EncryptedBinaryInteger().decrypt_many(tokens) == [7, None, None]
+
+
+# Batch decryption
+
+
+def test_decrypt_many_matches_orm_decryption(db_session):
+    """decrypt_many converts raw tokens like the ORM result processing does."""
+    objs = [
+        MockModel(enc_int=7, enc_date=date(2024, 2, 29), enc_str="Äöü"),
+        MockModel(enc_int=None, enc_date=None, enc_str=None),
+    ]
+    db_session.add_all(objs)
+    db_session.commit()
+
+    rows = db_session.execute(
+        text(f"SELECT enc_int, enc_date, enc_str FROM {MockModel.__tablename__}"),
+    ).all()
+
+    assert EncryptedInteger().decrypt_many([row[0] for row in rows]) == [7, None]
+    assert EncryptedDate().decrypt_many([row[1] for row in rows]) == [
+        date(2024, 2, 29),
+        None,
+    ]
+    assert EncryptedString().decrypt_many([row[2] for row in rows]) == ["Äöü", ""]
+
+
+def test_decrypt_many_keeps_none(db_session):
+    """NULL values stay None and keep their position."""
+    token = encr.encrypt("x")
+    assert EncryptedString().decrypt_many([None, token, None]) == [None, "x", None]
+
+
+# Decryption cache
+
+
+@pytest.fixture
+def enabled_cache():
+    decryption_cache.configure(max_entries=100, max_bytes=1024 * 1024)
+    yield decryption_cache
+    decryption_cache.configure(max_entries=0, max_bytes=0)
+
+
+def test_decryption_cache_hits_and_misses(db_session, enabled_cache, monkeypatch):
+    tokens = [encr.encrypt(f"value {i}") for i in range(3)]
+    calls = []
+    original_decrypt_many = encr.decrypt_many
+    monkeypatch.setattr(
+        encr,
+        "decrypt_many",
+        lambda ts: calls.append(list(ts)) or original_decrypt_many(ts),
+    )
+
+    col_type = EncryptedString()
+    assert col_type.decrypt_many(tokens[:2]) == ["value 0", "value 1"]
+    assert col_type.decrypt_many(tokens) == ["value 0", "value 1", "value 2"]
+
+    # The second call only decrypts the token that was not cached yet
+    assert calls == [tokens[:2], tokens[2:]]
+    assert enabled_cache.hits == 2
+    assert enabled_cache.misses == 3
+    assert col_type.process_result_value(tokens[0], None) == "value 0"
+    assert enabled_cache.hits == 3
+
+
+def test_decryption_cache_entry_limit(db_session):
+    cache = DecryptionCache(max_entries=2, max_bytes=1024 * 1024)
+    tokens = [encr.encrypt(str(i)) for i in range(3)]
+    for token in tokens:
+        cache.decrypt(token)
+    cache.decrypt(tokens[1])  # refresh the second entry
+
+    assert len(cache) == 2
+    cache.decrypt(tokens[0])
+    assert cache.misses == 4  # tokens[0] was evicted
+
+
+def test_decryption_cache_byte_limit(db_session):
+    token = encr.encrypt("x" * 100)
+    cache = DecryptionCache(max_entries=10, max_bytes=len(token) + 50)
+    assert cache.decrypt(token) == "x" * 100
+    assert len(cache) == 0  # too large to be cached
+
+    small_tokens = [encr.encrypt(str(i)) for i in range(3)]
+    for small_token in small_tokens:
+        cache.decrypt(small_token)
+    assert cache._size <= cache.max_bytes
+    assert len(cache) < len(small_tokens)
+
+
+def test_decryption_cache_cleared_when_keys_change(db_session, enabled_cache):
+    token = encr.encrypt("secret")
+    enabled_cache.decrypt(token)
+    assert len(enabled_cache) == 1
+
+    encr.set_keys([Fernet.generate_key()])
+    assert len(enabled_cache) == 0
+    assert enabled_cache.hits == enabled_cache.misses == 0
+
+
+def test_decryption_cache_disabled_by_default(db_session):
+    assert not decryption_cache.enabled
+    decryption_cache.decrypt(encr.encrypt("secret"))
+    assert len(decryption_cache) == 0
@@ -9,6 +9,7 @@ environment or setuptools develop mode to test against the development version.
 """
 
 import argparse
+import json
 import os
 from pathlib import Path
 from shlex import split
@@ -18,6 +19,7 @@ from unittest.mock import patch
 
 import pytest
 from cryptography.fernet import Fernet
+from sqlalchemy import text
 
 from edupsyadmin.api import managers
 from edupsyadmin.api.managers import ClientNotFoundError
@@ -31,6 +33,7 @@ from edupsyadmin.cli.commands import edit_config as edit_config_command
 from edupsyadmin.cli.commands import get_clients as get_clients_command
 from edupsyadmin.cli.commands import new_client as new_client_command
 from edupsyadmin.cli.commands import set_client as set_client_command
+from edupsyadmin.cli.commands import shred_clients as shred_clients_command
 from edupsyadmin.core.encrypt import encr
 from edupsyadmin.core.logger import Logger
 
@@ -69,6 +72,7 @@ def change_wd(tmp_path):
         "flatten-pdfs --help",
         "taetigkeitsbericht --help",
         "delete-client --help",
+        "shred-clients --help",
         "edit-config --help",
         "rotate-key --help",
     ),
@@ -180,8 +184,10 @@ def test_get_clients_all(capsys, mock_config, mock_webuntis, tmp_path, monkeypat
     args = argparse.Namespace(
         database_url=database_url,
         nta_nos=False,
+        active_only=False,
         school=None,
         client_id=None,
+        name=None,
         out=None,
         tui=False,
         columns=None,
@@ -222,8 +228,10 @@ def test_get_clients_single(capsys, mock_config, mock_webuntis, tmp_path):
     args = argparse.Namespace(
         database_url=database_url,
         nta_nos=False,
+        active_only=False,
         school=None,
         client_id=1,
+        name=None,
         out=None,
         tui=False,
         columns=None,
@@ -237,6 +245,81 @@ def test_get_clients_single(capsys, mock_config, mock_webuntis, tmp_path):
     assert "Max" not in stdout
 
 
+def test_get_clients_by_name(capsys, mock_config, mock_webuntis, tmp_path):
+    database_path = tmp_path / "test.sqlite"
+    database_url = f"sqlite:///{database_path}"
+
+    # Arrange
+    upgrade_db(database_url)
+    clients_manager = managers.ClientsManager(database_url)
+    for first_name, last_name in [("Erika", "Mustermann"), ("Max", "Müller")]:
+        clients_manager.add_client(
+            school="FirstSchool",
+            gender_encr="f",
+            class_name_encr="11TKKG",
+            first_name_encr=first_name,
+            last_name_encr=last_name,
+            birthday_encr="2000-12-24",
+        )
+
+    # Act
+    args = argparse.Namespace(
+        database_url=database_url,
+        nta_nos=False,
+        active_only=False,
+        school=None,
+        client_id=None,
+        name="MÜLLER",
+        out=None,
+        tui=False,
+        columns=None,
+    )
+    get_clients_command.execute(args)
+
+    # Assert
+    stdout, _ = capsys.readouterr()
+    assert "Max" in stdout
+    assert "Erika" not in stdout
+
+
+def test_get_clients_active_only(capsys, mock_config, mock_webuntis, tmp_path):
+    database_path = tmp_path / "test.sqlite"
+    database_url = f"sqlite:///{database_path}"
+
+    # Arrange
+    upgrade_db(database_url)
+    clients_manager = managers.ClientsManager(database_url)
+    for first_name, case_active in [("Erika", True), ("Max", False)]:
+        clients_manager.add_client(
+            school="FirstSchool",
+            gender_encr="f",
+            class_name_encr="11TKKG",
+            first_name_encr=first_name,
+            last_name_encr="Mustermann",
+            birthday_encr="2000-12-24",
+            case_active=case_active,
+        )
+
+    # Act
+    args = argparse.Namespace(
+        database_url=database_url,
+        nta_nos=False,
+        active_only=True,
+        school=None,
+        client_id=None,
+        name=None,
+        out=None,
+        tui=False,
+        columns=None,
+    )
+    get_clients_command.execute(args)
+
+    # Assert
+    stdout, _ = capsys.readouterr()
+    assert "Erika" in stdout
+    assert "Max" not in stdout
+
+
 def test_set_client(capsys, mock_config, mock_webuntis, tmp_path):
     database_path = tmp_path / "test.sqlite"
     database_url = f"sqlite:///{database_path}"
@@ -340,6 +423,99 @@ def test_delete_client(mock_config, tmp_path):
         clients_manager.get_decrypted_client(client_id=client_id)
 
 
+def test_shred_clients(capsys, mock_config, tmp_path):
+    database_path = tmp_path / "test.sqlite"
+    database_url = f"sqlite:///{database_path}"
+
+    # Arrange
+    upgrade_db(database_url)
+    clients_manager = managers.ClientsManager(database_url)
+    client_ids = [
+        clients_manager.add_client(
+            school="FirstSchool",
+            gender_encr="f",
+            class_name_encr=class_name,
+            first_name_encr="Erika",
+            last_name_encr="Mustermann",
+            birthday_encr="2000-12-24",
+        )
+        for class_name in ["10TKKG", "5a"]
+    ]
+    as_of = clients_manager.get_decrypted_client(
+        client_ids[0],
+    ).document_shredding_date_encr
+
+    # Act: list only
+    args = argparse.Namespace(
+        database_url=database_url,
+        as_of=as_of,
+        lookback_years=None,
+        delete=False,
+        yes=False,
+    )
+    shred_clients_command.execute(args)
+
+    # Assert
+    stdout, _ = capsys.readouterr()
+    assert "last 50 years" in stdout
+    assert as_of.isoformat() in stdout
+    assert clients_manager.get_total_count() == 2
+
+    # Act: delete, but decline the confirmation
+    args.delete = True
+    with patch("builtins.input", return_value="no"):
+        shred_clients_command.execute(args)
+
+    # Assert
+    stdout, _ = capsys.readouterr()
+    assert "No clients were deleted." in stdout
+    assert clients_manager.get_total_count() == 2
+
+    # Act: delete
+    with patch("builtins.input", return_value="yes") as mock_input:
+        shred_clients_command.execute(args)
+    assert "1 clients" in mock_input.call_args.args[0]
+
+    # Assert
+    stdout, _ = capsys.readouterr()
+    assert "Deleted 1 clients." in stdout
+    with pytest.raises(ClientNotFoundError):
+        clients_manager.get_decrypted_client(client_id=client_ids[0])
+    clients_manager.get_decrypted_client(client_id=client_ids[1])
+
+
+def test_shred_clients_yes(capsys, mock_config, tmp_path):
+    """With --yes, the clients are deleted without a confirmation."""
+    database_url = f"sqlite:///{tmp_path / 'test.sqlite'}"
+    upgrade_db(database_url)
+    clients_manager = managers.ClientsManager(database_url)
+    client_id = clients_manager.add_client(
+        school="FirstSchool",
+        gender_encr="f",
+        class_name_encr="10TKKG",
+        first_name_encr="Erika",
+        last_name_encr="Mustermann",
+        birthday_encr="2000-12-24",
+    )
+    as_of = clients_manager.get_decrypted_client(
+        client_id,
+    ).document_shredding_date_encr
+    args = argparse.Namespace(
+        database_url=database_url,
+        as_of=as_of,
+        lookback_years=None,
+        delete=True,
+        yes=True,
+    )
+
+    with patch("builtins.input") as mock_input:
+        shred_clients_command.execute(args)
+    mock_input.assert_not_called()
+    stdout, _ = capsys.readouterr()
+    assert "Deleted 1 clients." in stdout
+    assert clients_manager.get_total_count() == 0
+
+
 def test_edit_config_command(mock_config):
     """Test that the edit_config command starts the TUI."""
     with patch("edupsyadmin.cli.commands.edit_config.lazy_import") as mock_lazy_import:
@@ -368,6 +544,112 @@ def test_edit_config_command(mock_config):
         mock_app_instance.run.assert_called_once()
 
 
+def test_run_db_migrations_skips_alembic(mock_config, tmp_path):
+    """An up-to-date database is checked without loading the migrations."""
+    from edupsyadmin.cli import _run_db_migrations
+
+    database_url = f"sqlite:///{tmp_path / 'test.sqlite'}"
+    args = argparse.Namespace(
+        command_name="get-clients",
+        database_url=database_url,
+        salt_path=None,
+    )
+    assert _run_db_migrations(args) == 0
+
+    with patch("edupsyadmin.cli.lazy_import") as mock_lazy_import:
+        assert _run_db_migrations(args) == 0
+    mock_lazy_import.assert_not_called()
+
+
+def test_complete_index_backfill(mock_config, tmp_path):
+    """A command with the keys computes the indexes a migration left empty."""
+    from edupsyadmin.cli import _complete_index_backfill
+    from edupsyadmin.db.revision import INDEX_BACKFILL_KEY, index_backfill_pending
+
+    database_url = f"sqlite:///{tmp_path / 'test.sqlite'}"
+    upgrade_db(database_url)
+    clients_manager = managers.ClientsManager(database_url)
+    client_id = clients_manager.add_client(
+        school="FirstSchool",
+        gender_encr="f",
+        class_name_encr="7a",
+        first_name_encr="Erika",
+        last_name_encr="Mustermann",
+        birthday_encr="2012-03-04",
+    )
+    with clients_manager.engine.begin() as conn:
+        conn.execute(text("UPDATE clients SET last_name_bidx = NULL"))
+        conn.execute(
+            text("INSERT INTO system_metadata (key, value) VALUES (:key, '')"),
+            {"key": INDEX_BACKFILL_KEY},
+        )
+    args = argparse.Namespace(database_url=database_url)
+
+    assert _complete_index_backfill(args) == 0
+    assert not index_backfill_pending(database_url)
+    with clients_manager.engine.connect() as conn:
+        index = conn.execute(
+            text("SELECT last_name_bidx FROM clients WHERE client_id = :id"),
+            {"id": client_id},
+        ).scalar_one()
+    assert index == encr.blind_index("Mustermann")
+
+    # nothing is pending: the migration module is not loaded
+    with patch("edupsyadmin.cli.lazy_import") as mock_lazy_import:
+        assert _complete_index_backfill(args) == 0
+    mock_lazy_import.assert_not_called()
+
+
+def test_profile_db(capsys, mock_config, tmp_path):
+    """Test that --profile-db-json reports the statements of a command."""
+    from edupsyadmin.core.config import config
+    from edupsyadmin.core.encrypt import set_keys_in_keyring
+
+    database_path = tmp_path / "test.sqlite"
+    database_url = f"sqlite:///{database_path}"
+    profile_path = tmp_path / "profile.json"
+
+    config.load(mock_config)
+    key = Fernet.generate_key()
+    set_keys_in_keyring(APP_UID, config.core.app_username, [key])
+    encr.set_keys([key])
+    upgrade_db(database_url)
+    clients_manager = managers.ClientsManager(database_url)
+    for first_name in ["Erika", "Max"]:
+        clients_manager.add_client(
+            school="FirstSchool",
+            gender_encr="f",
+            class_name_encr="5a",
+            first_name_encr=first_name,
+            last_name_encr="Mustermann",
+            birthday_encr="2000-12-24",
+        )
+
+    status = main(
+        [
+            "-c",
+            str(mock_config),
+            "--database_url",
+            database_url,
+            "--profile-db-json",
+            str(profile_path),
+            "get-clients",
+        ],
+    )
+
+    assert status == 0
+    _, stderr = capsys.readouterr()
+    assert "Database statements" in stderr
+    profile = json.loads(profile_path.read_text(encoding="utf-8"))
+    assert profile["command"] == "get-clients"
+    assert profile["total"]["count"] == sum(
+        stats["count"] for stats in profile["statements"].values()
+    )
+    # the overview fetches both clients and decrypts their columns
+    assert profile["statements"]["SELECT"]["rows"] >= 2
+    assert profile["decryption"]["calls"] > 0
+
+
 # TODO: Do the same for `get_clients --tui` and `edit_client --tui`
 def test_create_documentation_tui(mock_config, tmp_path):
     """Test that `create_documentation --tui` starts the FillFormApp."""
@@ -459,6 +741,8 @@ class TestRotateKey:
                 database_url=database_url,
                 app_uid=APP_UID,
                 app_username=username,
+                checkpoint=False,
+                resume=False,
             )
             rotate_key.execute(args)
 
@@ -476,6 +760,32 @@ class TestRotateKey:
         # IF IT CURRENTLY FAILS, it means it's not cleaning up versioned keys
         assert keys_in_keyring == [new_key]
 
+    def test_rotate_key_resume_without_checkpoint(self, mock_config, tmp_path, capsys):
+        """Test that rotate-key --resume fails if no rotation was interrupted."""
+        from edupsyadmin.cli.commands import rotate_key
+
+        database_url = f"sqlite:///{tmp_path / 'test_resume.sqlite'}"
+        upgrade_db(database_url)
+        encr.set_keys([Fernet.generate_key()])
+
+        with (
+            patch("builtins.input", return_value="yes"),
+            pytest.raises(SystemExit) as excinfo,
+        ):
+            args = argparse.Namespace(
+                database_url=database_url,
+                app_uid=APP_UID,
+                app_username="test_user",
+                checkpoint=False,
+                resume=True,
+            )
+            rotate_key.execute(args)
+
+        assert excinfo.value.code == 1
+        out = capsys.readouterr().out
+        assert "no interrupted key rotation" in out
+        assert "rotate-key --resume" in out
+
     def test_rotate_key_cancelled(self, mock_config, tmp_path):
         """Test that rotate-key command does nothing if cancelled."""
         from edupsyadmin.cli.commands import rotate_key
@@ -493,6 +803,8 @@ class TestRotateKey:
                 database_url=database_url,
                 app_uid=APP_UID,
                 app_username="test_user",
+                checkpoint=False,
+                resume=False,
             )
             rotate_key.execute(args)
             mock_re_encrypt.assert_not_called()
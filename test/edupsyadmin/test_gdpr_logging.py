@@ -32,6 +32,8 @@ def test_scrubbing_sensitive_args_in_logs():
             config_path="config.yml",
             salt_path="salt.txt",
             warn=None,
+            profile_db=False,
+            profile_db_json=None,
         )
 
         with patch("edupsyadmin.cli._args", return_value=mock_args):
@@ -86,6 +88,8 @@ def test_scrubbing_set_client_args_in_logs():
             config_path="config.yml",
             salt_path="salt.txt",
             warn=None,
+            profile_db=False,
+            profile_db_json=None,
         )
 
         with patch("edupsyadmin.cli._args", return_value=mock_args):
@@ -1,8 +1,10 @@
-from unittest.mock import MagicMock
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from textual.widgets import DataTable
 
+from edupsyadmin.tui.clients_overview import ClientsOverview
 from edupsyadmin.tui.clients_overview_app import ClientsOverviewApp
 
 # Data that the manager is expected to return.
@@ -70,11 +72,24 @@ COLUMNS = [
 DATA = [dict(zip(COLUMNS, row, strict=True)) for row in ROWS]
 
 
+async def _pages(pages):
+    for page in pages:
+        yield page
+
+
+def _mock_manager() -> MagicMock:
+    """A mock AsyncClientsManager."""
+    manager = MagicMock()
+    manager.delete_client = AsyncMock()
+    manager.dispose = AsyncMock()
+    return manager
+
+
 def test_clients_overview(snap_compare) -> None:
     """Test that the clients overview table is correctly populated."""
-    mock_manager = MagicMock()
-    # The manager's method is called in a worker thread in on_mount
-    mock_manager.get_clients_overview.return_value = DATA
+    mock_manager = _mock_manager()
+    # The manager's method is called in a worker in on_mount
+    mock_manager.iter_clients_overview_pages.side_effect = lambda **_: _pages([DATA])
 
     app = ClientsOverviewApp(clients_manager=mock_manager)
 
@@ -94,7 +109,7 @@ def test_clients_overview(snap_compare) -> None:
 
 def test_clients_overview_long_names(snap_compare) -> None:
     """Test clients overview table with long names and width restriction."""
-    mock_manager = MagicMock()
+    mock_manager = _mock_manager()
     # Create a row with very long names
     long_rows = [
         (
@@ -113,7 +128,9 @@ def test_clients_overview_long_names(snap_compare) -> None:
     ]
 
     long_data = [dict(zip(COLUMNS, row, strict=True)) for row in long_rows]
-    mock_manager.get_clients_overview.return_value = long_data
+    mock_manager.iter_clients_overview_pages.side_effect = lambda **_: _pages(
+        [long_data]
+    )
 
     app = ClientsOverviewApp(clients_manager=mock_manager)
 
@@ -134,7 +151,7 @@ def test_clients_overview_long_names(snap_compare) -> None:
 @pytest.mark.asyncio
 async def test_delete_client_confirmed(mock_config):
     """Test deleting a client after confirmation."""
-    mock_manager = MagicMock()
+    mock_manager = _mock_manager()
 
     # Initial data
     initial_data = DATA
@@ -143,7 +160,10 @@ async def test_delete_client_confirmed(mock_config):
     data_after_delete = DATA[1:]
 
     # Set up the mock to return different data on subsequent calls
-    mock_manager.get_clients_overview.side_effect = [initial_data, data_after_delete]
+    mock_manager.iter_clients_overview_pages.side_effect = [
+        _pages([initial_data]),
+        _pages([data_after_delete]),
+    ]
 
     app = ClientsOverviewApp(clients_manager=mock_manager)
 
@@ -170,17 +190,49 @@ async def test_delete_client_confirmed(mock_config):
 
         # Check that the manager's delete method was called
         # client_id of first row is 1
-        mock_manager.delete_client.assert_called_once_with(1)
+        mock_manager.delete_client.assert_awaited_once_with(1)
 
         # Check that the table has been updated
         assert table.row_count == len(ROWS) - 1
 
 
+@pytest.mark.asyncio
+async def test_delete_client_fetches_hidden_name(mock_config):
+    """Without name columns, only the name is fetched for the confirmation."""
+    mock_manager = _mock_manager()
+    data = [{"client_id": row["client_id"], "school": row["school"]} for row in DATA]
+    mock_manager.iter_clients_overview_pages.side_effect = lambda **_: _pages([data])
+    mock_manager.get_client_fields = AsyncMock(
+        return_value={"first_name_encr": "abc123", "last_name_encr": "xyz789"},
+    )
+
+    app = ClientsOverviewApp(clients_manager=mock_manager)
+
+    async with app.run_test(size=(150, 30)) as pilot:
+        await pilot.pause()
+        table = pilot.app.query_one(DataTable)
+        while table.loading:
+            await pilot.pause()
+
+        await pilot.press("delete")
+        await app.workers.wait_for_complete()
+        await pilot.pause()
+
+        mock_manager.get_client_fields.assert_awaited_once()
+        client_id, columns = mock_manager.get_client_fields.await_args.args
+        assert client_id == 1
+        assert sorted(columns) == ["first_name_encr", "last_name_encr"]
+
+        await pilot.press("enter")
+        await pilot.pause()
+        mock_manager.delete_client.assert_awaited_once_with(1)
+
+
 @pytest.mark.asyncio
 async def test_delete_client_cancelled(mock_config):
     """Test cancelling the client deletion."""
-    mock_manager = MagicMock()
-    mock_manager.get_clients_overview.return_value = DATA
+    mock_manager = _mock_manager()
+    mock_manager.iter_clients_overview_pages.side_effect = lambda **_: _pages([DATA])
 
     app = ClientsOverviewApp(clients_manager=mock_manager)
 
@@ -207,3 +259,58 @@ async def test_delete_client_cancelled(mock_config):
 
         # Check that the table still has the same number of rows
         assert table.row_count == len(ROWS)
+
+
+@pytest.mark.asyncio
+async def test_clients_overview_pages(mock_config):
+    """Test that all pages of the overview end up in the table."""
+    mock_manager = _mock_manager()
+    pages = [DATA[:1], DATA[1:2], DATA[2:]]
+    mock_manager.iter_clients_overview_pages.side_effect = lambda **_: _pages(pages)
+
+    app = ClientsOverviewApp(clients_manager=mock_manager)
+
+    async with app.run_test(size=(150, 30)) as pilot:
+        await pilot.pause()
+        table = pilot.app.query_one(DataTable)
+        while table.loading:
+            await pilot.pause()
+
+        assert table.row_count == len(ROWS)
+        assert [int(row[0]) for row in map(table.get_row_at, range(len(ROWS)))] == [
+            row["client_id"] for row in DATA
+        ]
+
+
+@pytest.mark.asyncio
+async def test_reload_cancels_running_load(mock_config):
+    """Test that reloading cancels a load that is still waiting for data."""
+    cancelled = asyncio.Event()
+
+    async def stalled_pages():
+        try:
+            yield DATA[:1]
+            await asyncio.Event().wait()
+            yield DATA[1:]
+        finally:
+            cancelled.set()
+
+    mock_manager = _mock_manager()
+    mock_manager.iter_clients_overview_pages.side_effect = [
+        stalled_pages(),
+        _pages([DATA]),
+    ]
+
+    app = ClientsOverviewApp(clients_manager=mock_manager)
+
+    async with app.run_test(size=(150, 30)) as pilot:
+        await pilot.pause()
+        table = pilot.app.query_one(DataTable)
+        assert table.loading
+
+        pilot.app.query_one(ClientsOverview).action_reload()
+        await asyncio.wait_for(cancelled.wait(), timeout=5)
+        while table.loading:
+            await pilot.pause()
+
+        assert table.row_count == len(ROWS)
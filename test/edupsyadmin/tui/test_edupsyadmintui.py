@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from textual.widgets import DataTable, Input
@@ -28,14 +28,22 @@ COLUMNS = [
 DATA = [dict(zip(COLUMNS, row, strict=True)) for row in ROWS]
 
 
+async def _pages(pages):
+    for page in pages:
+        yield page
+
+
 @pytest.fixture
 def mock_clients_manager():
-    """Provides a mock ClientsManager."""
+    """Provides a mock AsyncClientsManager."""
     manager = MagicMock()
-    manager.get_clients_overview.return_value = DATA
-    manager.get_decrypted_client.return_value = ClientRecord.model_validate(
-        dict(zip(COLUMNS, ROWS[0], strict=False))
+    manager.iter_clients_overview_pages.side_effect = lambda **_: _pages([DATA])
+    manager.get_decrypted_client = AsyncMock(
+        return_value=ClientRecord.model_validate(
+            dict(zip(COLUMNS, ROWS[0], strict=False))
+        )
     )
+    manager.dispose = AsyncMock()
     return manager
 
 
@@ -84,12 +92,12 @@ async def test_select_client_populates_edit_form(mock_config, mock_clients_manag
 
 
 @pytest.mark.asyncio
-@patch("edupsyadmin.tui.edupsyadmintui.batch_fill_forms")
+@patch("edupsyadmin.tui.edupsyadmintui.async_batch_fill_forms")
 @patch("edupsyadmin.tui.edupsyadmintui.EdupsyadminTui.pop_screen")
 async def test_fill_form_worker_uses_convenience_data(
     mock_pop_screen, mock_batch_fill_forms, mock_clients_manager, mock_config
 ):
-    """Test that the TUI calls batch_fill_forms with correct IDs and paths."""
+    """Test that the TUI calls async_batch_fill_forms with correct IDs and paths."""
     # Arrange
     raw_client_data = {
         "first_name_encr": "Test",
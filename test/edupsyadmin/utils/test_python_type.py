@@ -12,7 +12,7 @@ from sqlalchemy import (
     String,
 )
 
-from edupsyadmin.db.clients import EncryptedString
+from edupsyadmin.db.column_types import EncryptedString
 from edupsyadmin.utils.python_type import get_python_type
 
 